@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_geometry.py
+
+Microbenchmarks for utils/geometry.py against the scalar NumPy helpers it replaces
+and against Python loops over the scalar functions.
+
+Usage:
+    python benchmarks/bench_geometry.py [--number N]
+"""
+
+import sys
+import argparse
+import timeit
+from pathlib import Path
+
+# Add parent directory to path
+parent_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(parent_dir))
+
+import numpy as np
+from utils import geometry
+
+
+class Quaternion:
+    """Stand-in for airsim.Quaternionr."""
+
+    def __init__(self, w, x, y, z):
+        self.w_val, self.x_val, self.y_val, self.z_val = w, x, y, z
+
+
+def numpy_distance(pt1, pt2):
+    # Previous utils.common.distance implementation.
+    return np.sqrt((pt1[0] - pt2[0]) ** 2 + (pt1[1] - pt2[1]) ** 2)
+
+
+def numpy_heading(quaternion):
+    # Previous utils.common.get_heading_from_quaternion implementation.
+    w, x, y, z = quaternion.w_val, quaternion.x_val, quaternion.y_val, quaternion.z_val
+    return np.rad2deg(np.arctan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z)))
+
+
+def bench(label: str, stmt, number: int, baseline: float = None) -> float:
+    per_call = min(timeit.repeat(stmt, number=number, repeat=5)) / number
+    speedup = f"{baseline / per_call:8.1f}x" if baseline else " " * 9
+    print(f"  {label:<48} {per_call * 1e6:10.3f} us {speedup}")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="Calls per scalar measurement")
+    args = parser.parse_args()
+    number = args.number
+    rng = np.random.default_rng(0)
+
+    p1, p2 = (12.5, -3.25), (80.0, 126.0)
+    q = Quaternion(0.92, 0.01, -0.02, 0.38)
+
+    print("Scalar fast paths (per call):")
+    base = bench("distance: np.sqrt on floats", lambda: numpy_distance(p1, p2), number)
+    bench("distance: utils.geometry (math.hypot)", lambda: geometry.distance(p1, p2), number, base)
+    base = bench("heading: np.arctan2 on floats", lambda: numpy_heading(q), number)
+    bench("heading: utils.geometry (math.atan2)", lambda: geometry.heading_from_quaternion(q), number, base)
+
+    n = 1000
+    number_batch = max(number // 100, 10)
+    a = rng.uniform(-150, 150, (n, 2))
+    b = rng.uniform(-150, 150, (n, 2))
+    polyline = np.cumsum(rng.uniform(-5, 5, (200, 2)), axis=0)
+    quats = rng.normal(size=(n, 4))
+    quats /= np.linalg.norm(quats, axis=1, keepdims=True)
+    quat_objects = [Quaternion(*row) for row in quats.tolist()]
+    angles = rng.uniform(-20, 20, n)
+    a_list, b_list, angle_list = a.tolist(), b.tolist(), angles.tolist()
+
+    print(f"\nBatched versions ({n} items per call):")
+    base = bench("distances: loop over geometry.distance",
+                 lambda: [geometry.distance(p, r) for p, r in zip(a_list, b_list)], number_batch)
+    bench("distances: geometry.distances", lambda: geometry.distances(a, b), number_batch, base)
+    base = bench("yaw: loop over geometry.heading_from_quaternion",
+                 lambda: [geometry.heading_from_quaternion(o) for o in quat_objects], number_batch)
+    bench("yaw: geometry.quaternions_to_euler", lambda: geometry.quaternions_to_euler(quats), number_batch, base)
+    base = bench("wrap: loop over geometry.wrap_angle",
+                 lambda: [geometry.wrap_angle(x) for x in angle_list], number_batch)
+    bench("wrap: geometry.wrap_angles", lambda: geometry.wrap_angles(angles), number_batch, base)
+
+    print(f"\nPoint-to-polyline projection ({n // 10} points, 200 vertices):")
+    pts = a[:n // 10]
+    bench("geometry.project_to_polyline", lambda: geometry.project_to_polyline(pts, polyline), number_batch)
+
+
+if __name__ == "__main__":
+    main()
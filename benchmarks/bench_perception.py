@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_perception.py
+
+Offline perception throughput: reads frames from a video, an image directory or a
+`.npy` recording and runs the detection pipeline on them at full CPU speed,
+without the simulator.
+
+Usage:
+    python benchmarks/bench_perception.py --source frames/ [--frames N] [--batch B]
+    python benchmarks/bench_perception.py --source drive.mp4 --record drive.npy --frames 500
+    python benchmarks/bench_perception.py --source drive.npy --read-only
+"""
+
+import sys
+import argparse
+import time
+from pathlib import Path
+
+# Add parent directory to path
+parent_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(parent_dir))
+
+from utils.image_source import open_source, record_frames
+
+
+def bench_read(source, frames: int, batch: int) -> None:
+    start = time.perf_counter()
+    count = 0
+    while count < frames:
+        batch_frames = source.read_batch(min(batch, frames - count))
+        if not batch_frames:
+            break
+        count += len(batch_frames)
+    elapsed = time.perf_counter() - start
+    print(f"  read {count} frames in {elapsed:.2f} s: {count / elapsed if elapsed else 0.0:8.1f} fps")
+
+
+def bench_detect(source, frames: int, batch: int) -> None:
+    from detection.object_detection import detect_stream, get_model
+    get_model()  # Keep model loading out of the measurement.
+    latencies = []
+    count = 0
+    boxes = 0
+    start = time.perf_counter()
+    last = start
+    for _, detections in detect_stream(source, batch_size=batch, max_frames=frames):
+        now = time.perf_counter()
+        latencies.append(now - last)
+        last = now
+        count += 1
+        boxes += len(detections)
+    elapsed = time.perf_counter() - start
+    if not count:
+        print("  no frames")
+        return
+    latencies.sort()
+    print(f"  detected {count} frames ({boxes} boxes) in {elapsed:.2f} s: {count / elapsed:8.1f} fps, "
+          f"p95 gap {latencies[int(0.95 * (count - 1))] * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline perception throughput benchmark.")
+    parser.add_argument("--source", required=True, help="Video file, image directory or .npy recording")
+    parser.add_argument("--frames", type=int, default=200, help="Frames to process")
+    parser.add_argument("--batch", type=int, default=1, help="Frames per read/model call")
+    parser.add_argument("--loop", action="store_true", help="Loop the source until --frames are processed")
+    parser.add_argument("--read-only", action="store_true", help="Only measure frame reading")
+    parser.add_argument("--record", help="Write the frames to this .npy recording instead of benchmarking")
+    args = parser.parse_args()
+
+    with open_source(args.source, loop=args.loop) as source:
+        if args.record:
+            written = record_frames(source, args.record, args.frames)
+            print(f"Recorded {written} frames to {args.record}")
+            return
+        print(f"Source: {args.source} (batch {args.batch})")
+        if args.read_only:
+            bench_read(source, args.frames, args.batch)
+        else:
+            bench_detect(source, args.frames, args.batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,35 @@
 
 import heapq
 import math
+from typing import NamedTuple
+import numpy as np
 from config.coordinates import coordinates
 from config.graph import graph
 
 
+class CompiledGraph(NamedTuple):
+    """
+    Array form of a graph/coordinates pair, shared by the batch planners.
+
+    Attributes:
+        version (int): The graph version the arrays were built from.
+        nodes (list): Node names, in coordinate-table order.
+        index (dict): Maps node name to its row in `xy`.
+        points (list): Node coordinate tuples, as stored in the coordinate table.
+        xy (np.ndarray): Node coordinates as an (N, 2) float array.
+        adjacency (list): For every node index, a list of (neighbor_index, edge_length) pairs.
+    """
+    version: int
+    nodes: list
+    index: dict
+    points: list
+    xy: np.ndarray
+    adjacency: list
+
+
+_compiled_graphs = {}
+
+
 def heuristic(coord1: tuple, coord2: tuple) -> float:
     """
     Calculates the Euclidean distance between two coordinates.
@@ -66,3 +91,173 @@ def astar(graph: dict, start_coord: tuple, goal_coord: tuple) -> list:
                 heapq.heappush(open_list, (f_score[neighbor], neighbor))
 
     return []
+
+
+def graph_version(graph: dict, coords: dict = coordinates) -> int:
+    """
+    Computes a version key that changes whenever the graph or its coordinates change.
+
+    Args:
+        graph (dict): A dictionary representing the graph where each key is a node and the value is a list of neighboring nodes.
+        coords (dict, optional): The node coordinates. Defaults to `config.coordinates.coordinates`.
+
+    Returns:
+        int: A hash of the adjacency lists and node coordinates.
+    """
+    return hash((
+        tuple((node, tuple(graph[node])) for node in sorted(graph)),
+        tuple((node, tuple(coords[node])) for node in sorted(coords)),
+    ))
+
+
+def compile_graph(graph: dict, coords: dict = coordinates) -> CompiledGraph:
+    """
+    Converts a graph into arrays with precomputed edge lengths, cached by graph version.
+
+    Args:
+        graph (dict): A dictionary representing the graph where each key is a node and the value is a list of neighboring nodes.
+        coords (dict, optional): The node coordinates. Defaults to `config.coordinates.coordinates`.
+
+    Returns:
+        CompiledGraph: The compiled graph.
+    """
+    version = graph_version(graph, coords)
+    compiled = _compiled_graphs.get(version)
+    if compiled is not None:
+        return compiled
+
+    nodes = list(coords)
+    index = {node: i for i, node in enumerate(nodes)}
+    points = [coords[node] for node in nodes]
+    xy = np.array(points, dtype=float)
+    adjacency = [[] for _ in nodes]
+    for node, neighbors in graph.items():
+        i = index[node]
+        js = [index[neighbor] for neighbor in neighbors]
+        lengths = np.hypot(*(xy[js] - xy[i]).T)
+        adjacency[i] = list(zip(js, lengths.tolist()))
+
+    compiled = CompiledGraph(version, nodes, index, points, xy, adjacency)
+    _compiled_graphs[version] = compiled
+    return compiled
+
+
+def nearest_nodes(compiled: CompiledGraph, points) -> np.ndarray:
+    """
+    Snaps a batch of points to their nearest graph nodes.
+
+    Args:
+        compiled (CompiledGraph): The compiled graph.
+        points: An (M, 2) array-like of (x, y) coordinates.
+
+    Returns:
+        np.ndarray: The index of the nearest node for every point.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    d2 = ((points[:, None, :] - compiled.xy[None, :, :]) ** 2).sum(axis=2)
+    return d2.argmin(axis=1)
+
+
+def shortest_path_tree(compiled: CompiledGraph, source: int, targets) -> tuple:
+    """
+    Grows a shortest-path tree from `source` until every target node is settled.
+
+    The search is A* towards the whole target set: the heuristic of a node is its
+    straight-line distance to the closest target, computed for all nodes at once.
+    That heuristic is consistent, so every settled node carries its exact distance.
+
+    Args:
+        compiled (CompiledGraph): The compiled graph.
+        source (int): Index of the source node.
+        targets: Indices of the nodes that must be reached.
+
+    Returns:
+        tuple: (dist, prev) arrays over all nodes. `dist` is infinite for nodes that
+               were not settled, and `prev` holds the predecessor index or -1.
+    """
+    targets = np.unique(np.asarray(targets, dtype=int))
+    n = len(compiled.nodes)
+    if len(targets) == n:
+        # Every node is a target, so the heuristic is zero everywhere (plain Dijkstra).
+        h = [0.0] * n
+    else:
+        h = np.hypot(*(compiled.xy[:, None, :] - compiled.xy[None, targets, :]).transpose(2, 0, 1)).min(axis=1)
+        h = h.tolist()
+
+    g = [math.inf] * n
+    prev = [-1] * n
+    settled = [False] * n
+    remaining = set(targets.tolist())
+    g[source] = 0.0
+    open_list = [(h[source], source)]
+
+    while open_list and remaining:
+        _, current = heapq.heappop(open_list)
+        if settled[current]:
+            continue
+        settled[current] = True
+        remaining.discard(current)
+
+        for neighbor, length in compiled.adjacency[current]:
+            tentative_g = g[current] + length
+            if tentative_g < g[neighbor]:
+                g[neighbor] = tentative_g
+                prev[neighbor] = current
+                heapq.heappush(open_list, (tentative_g + h[neighbor], neighbor))
+
+    dist = np.array(g)
+    dist[~np.array(settled)] = math.inf
+    return dist, np.array(prev)
+
+
+def _trace_path(compiled: CompiledGraph, prev: np.ndarray, goal: int) -> list:
+    path = []
+    node = goal
+    while node != -1:
+        path.append(compiled.points[node])
+        node = prev[node]
+    return path[::-1]
+
+
+def batch_astar(graph: dict, starts, goals, coords: dict = coordinates) -> tuple:
+    """
+    Finds shortest paths for many (start, goal) pairs at once.
+
+    Starts and goals are snapped to their nearest nodes in one vectorized step, and
+    queries sharing a start node share a single search that stops once all of their
+    goals are settled.
+
+    Args:
+        graph (dict): A dictionary representing the graph where each key is a node and the value is a list of neighboring nodes.
+        starts: An (M, 2) array-like of start coordinates.
+        goals: An (M, 2) array-like of goal coordinates.
+        coords (dict, optional): The node coordinates. Defaults to `config.coordinates.coordinates`.
+
+    Returns:
+        tuple: (paths, costs) where `paths` is a list of M coordinate lists in the same
+               format as `astar`, and `costs` is an array of M path lengths. Unreachable
+               goals get an empty path and an infinite cost.
+    """
+    compiled = compile_graph(graph, coords)
+    start_nodes = nearest_nodes(compiled, starts)
+    goal_nodes = nearest_nodes(compiled, goals)
+    if len(start_nodes) != len(goal_nodes):
+        raise ValueError(f"Got {len(start_nodes)} starts but {len(goal_nodes)} goals")
+
+    paths = [[] for _ in range(len(start_nodes))]
+    costs = np.full(len(start_nodes), math.inf)
+
+    for source in np.unique(start_nodes):
+        queries = np.nonzero(start_nodes == source)[0]
+        dist, prev = shortest_path_tree(compiled, source, goal_nodes[queries])
+        traced = {}
+        for q in queries:
+            goal = goal_nodes[q]
+            if math.isinf(dist[goal]):
+                continue
+            if goal not in traced:
+                traced[goal] = _trace_path(compiled, prev, goal)
+            paths[q] = list(traced[goal])
+            costs[q] = dist[goal]
+
+    return paths, costs
@@ -1,14 +1,25 @@
 # core/control.py
+import math
 import time
 import numpy as np
 from utils.common import distance, get_heading_from_quaternion
 from core.sensors import get_distance_sensors
-from detection.object_detection import yolov10_object_detection
+from core.occupancy import OccupancyGrid, local_target
+from core.path import DensePath
+from core.speed_profile import SpeedProfile, SpeedController, stopping_speed
+from core.mpc import SamplingMPC
+from core.motion_monitor import MotionMonitor
+from core.vehicle import WHEELBASE, MAX_STEERING_DEG
+from detection.object_detection import capture_and_detect, show_detections, PERCEPTION_BACKENDS
+from detection.segmentation_detection import configure_segmentation
+from utils.robust_image import default_format_selector, default_retry_policy
+from utils import tracing
+from utils.metrics import default_registry
+from core.startup import FIRST_COMMAND
 
 
-import numpy as np
-
-def pure_pursuit_control(current_position: tuple, current_heading: float, target_position: tuple, ld: float = 4) -> float:
+def pure_pursuit_control(current_position: tuple, current_heading: float, target_position: tuple, ld: float = 4,
+                         wheelbase: float = WHEELBASE, max_steering_deg: float = MAX_STEERING_DEG) -> float:
     """
     Calculates the steering angle for a pure pursuit control algorithm.
 
@@ -17,21 +28,63 @@ def pure_pursuit_control(current_position: tuple, current_heading: float, target
         current_heading (float): The current heading of the vehicle in degrees.
         target_position (tuple): The target position to track (x, y).
         ld (float, optional): The look-ahead distance. Defaults to 4.
+        wheelbase (float, optional): The vehicle wheelbase. Defaults to `core.vehicle.WHEELBASE`.
+        max_steering_deg (float, optional): The steering limit in degrees. Defaults to `core.vehicle.MAX_STEERING_DEG`.
 
     Returns:
         float: The calculated steering angle in radians.
     """
     dx = target_position[0] - current_position[0]
     dy = target_position[1] - current_position[1]
-    angle_to_target = np.arctan2(dy, dx)
-    angle_front_car = np.deg2rad(current_heading)
+    angle_to_target = math.atan2(dy, dx)
+    angle_front_car = math.radians(current_heading)
     alpha = angle_to_target - angle_front_car
-    steering_angle = np.arctan(2 * 2.5 * np.sin(alpha) / ld)
-    max_steering_angle = np.deg2rad(30)
-    return np.clip(steering_angle, -max_steering_angle, max_steering_angle)
+    steering_angle = math.atan(2 * wheelbase * math.sin(alpha) / ld)
+    max_steering_angle = math.radians(max_steering_deg)
+    return min(max(steering_angle, -max_steering_angle), max_steering_angle)
 
 
-def go_reverse(client, car_controls, current_position: tuple, target_position: tuple):
+def nearest_in_path_range(detections: list, image_width: int, band: float = 0.4) -> float:
+    """
+    Returns the smallest depth range among the detections ahead of the car.
+
+    A detection is ahead when its box overlaps the central `band` fraction of the
+    image width; detections without a 'range' are ignored.
+
+    Args:
+        detections (list): Detection dicts with 'box' and, from `attach_ranges`, 'range'.
+        image_width (int): Width of the frame the boxes refer to, in pixels.
+        band (float, optional): Fraction of the image width counted as the driving
+            corridor. Defaults to 0.4.
+
+    Returns:
+        float: The range in meters, or infinity if no ranged detection is ahead.
+    """
+    left = image_width * (1.0 - band) / 2.0
+    right = image_width - left
+    ranges = [d['range'] for d in detections
+              if d.get('range') is not None and d['box'][0] < right and d['box'][2] > left]
+    return min(ranges, default=math.inf)
+
+
+@tracing.traced("send_controls")
+def send_controls(client, car_controls, watchdog=None, vehicle_name: str = 'Car1'):
+    """
+    Sends the car controls, letting an engaged safety watchdog override them first.
+
+    Args:
+        client: The AirSim client object.
+        car_controls: The car controls object.
+        watchdog (SafetyWatchdog, optional): The emergency braking watchdog. Defaults to None.
+        vehicle_name (str, optional): The vehicle to control. Defaults to 'Car1'.
+    """
+    if watchdog is not None:
+        watchdog.filter(car_controls)
+    client.setCarControls(car_controls, vehicle_name)
+
+
+def go_reverse(client, car_controls, current_position: tuple, target_position: tuple, watchdog=None,
+               vehicle_name: str = 'Car1'):
     """
     Moves the car in reverse until a certain distance is covered.
 
@@ -40,21 +93,24 @@ def go_reverse(client, car_controls, current_position: tuple, target_position: t
         car_controls: The car controls object.
         current_position: The current position of the car as a tuple (x, y).
         target_position: The target position to reach as a tuple (x, y).
+        watchdog (SafetyWatchdog, optional): The emergency braking watchdog. Defaults to None.
+        vehicle_name (str, optional): The vehicle to control. Defaults to 'Car1'.
     """
     reverse_distance = 5
     reverse_speed = -0.3
     distance_covered = 0
     car_controls.throttle = reverse_speed
+    car_controls.brake = 0
     car_controls.is_manual_gear = True
     car_controls.manual_gear = -1
 
     while distance_covered < reverse_distance:
-        car_state = client.getCarState()
+        car_state = client.getCarState(vehicle_name)
         car_pos = car_state.kinematics_estimated.position
         new_position = (car_pos.x_val, car_pos.y_val)
         steering_angle = pure_pursuit_control(new_position, 180, target_position)
         car_controls.steering = steering_angle
-        client.setCarControls(car_controls)
+        send_controls(client, car_controls, watchdog, vehicle_name)
         distance_covered += distance(current_position, new_position)
         current_position = new_position
         time.sleep(0.05)
@@ -62,67 +118,208 @@ def go_reverse(client, car_controls, current_position: tuple, target_position: t
     car_controls.is_manual_gear = False
     car_controls.manual_gear = 0
     car_controls.throttle = 0
-    client.setCarControls(car_controls)
+    send_controls(client, car_controls, watchdog, vehicle_name)
     time.sleep(1)
 
 
-def control_vehicle(client, car_controls, path: list):
+def control_vehicle(client, car_controls, path: list, controller: str = 'pure_pursuit', watchdog=None,
+                    vehicle_name: str = 'Car1', detector=None, frame_pool=None, perception: str = 'yolo',
+                    telemetry=None, exporter=None, startup=None, clock=time.monotonic,
+                    mpc_seed: int = None, with_depth: bool = False, camera=None) -> dict:
     """
     Controls the vehicle to follow a given path using pure pursuit control algorithm.
 
+    The waypoints are densified into a `DensePath`, and the steering target is a
+    lookahead point on it whose distance grows with the vehicle speed. Throttle and
+    brake track a curvature-aware `SpeedProfile` along the same path.
+
+    With `controller='mpc'`, steering and the speed command come from a
+    `SamplingMPC` that also avoids cells occupied in the sensor grid.
+
     Args:
         client: The AirSim client object.
         car_controls: The car controls object.
         path (list): A list of waypoints representing the desired path.
+        controller (str, optional): 'pure_pursuit' or 'mpc'. Defaults to 'pure_pursuit'.
+        watchdog (SafetyWatchdog, optional): A running emergency braking watchdog whose
+            brake takes precedence over the commands sent here. Defaults to None.
+        vehicle_name (str, optional): The vehicle to drive. Defaults to 'Car1'.
+        detector (DetectorClient, optional): Shared detector service client; when None the
+            model runs in this process. Defaults to None.
+        frame_pool (SharedFramePool, optional): Pool the camera frames are captured into
+            so the detector service reads them without copying. Defaults to None.
+        perception (str, optional): 'yolo', or 'segmentation' for the cheap simulator
+            segmentation backend. Defaults to 'yolo'.
+        telemetry (TelemetryLogger, optional): Receives one row per control tick with the
+            vehicle state, commands, sensor distances, detection count and per-stage
+            latencies. Defaults to None.
+        exporter (DatasetExporter, optional): Offered every camera frame with its detections
+            for the training set. Defaults to None.
+        startup (StartupProfile, optional): Marked when the first control command has
+            been sent. Defaults to None.
+        clock (callable, optional): Returns the current time in seconds; read once per tick,
+            after the car state, for the speed controller and stuck detection. A replay
+            passes the recorded state times so the commands are reproduced exactly.
+            Defaults to `time.monotonic`.
+        mpc_seed (int, optional): Seed of the MPC's perturbation generator. Defaults to None.
+        with_depth (bool, optional): Capture the depth image with every frame and cap the
+            target speed so the car can stop short of the nearest detection ahead.
+            Defaults to False.
+        camera (CameraModel, optional): Model of the detection camera. Detections are placed
+            on the ground plane with it and marked in the occupancy grid, so the detour
+            planner and the MPC avoid them. Defaults to None.
 
     Returns:
-        None
+        dict: Run statistics - the vehicle name, number of control ticks, duration,
+              achieved loop rate, control tick latency percentiles in milliseconds and
+              the image capture format and retry statistics.
     """
-    stuck_counter = 0
-    stuck_position = None
-
-    for waypoint in path:
-        while True:
-            yolov10_object_detection(client)
-            car_state = client.getCarState()
-            car_pos = car_state.kinematics_estimated.position
-            car_orientation = car_state.kinematics_estimated.orientation
-            car_heading = get_heading_from_quaternion(car_orientation)
-            current_position = (car_pos.x_val, car_pos.y_val)
-            steering_angle = pure_pursuit_control(current_position, car_heading, waypoint)
-            car_controls.steering = steering_angle
-            car_controls.throttle = 0.3
-            front_distance, front_left_distance, front_right_distance, rear_distance, rear_left_distance, rear_right_distance, left_distance, right_distance = get_distance_sensors(client)
-
-            if front_distance < 4:
+    motion_monitor = MotionMonitor()
+    grid = OccupancyGrid()
+    dense_path = DensePath(path) if path else None
+    speed_profile = SpeedProfile(dense_path) if path else None
+    speed_controller = SpeedController()
+    if controller not in ('pure_pursuit', 'mpc'):
+        raise ValueError(f"Unknown controller '{controller}'")
+    mpc = SamplingMPC(seed=mpc_seed) if controller == 'mpc' else None
+    if perception not in PERCEPTION_BACKENDS:
+        raise ValueError(f"Unknown perception backend '{perception}'")
+    if perception == 'segmentation':
+        configure_segmentation(client)
+    tick_latencies = []
+    registry = default_registry()
+    labels = {'vehicle': vehicle_name}
+    loop_hz = registry.gauge('control_loop_hz', 'Achieved control loop rate', labels)
+    tick_seconds = registry.histogram('control_tick_seconds', 'Control tick latency excluding the loop sleep', labels)
+    dropped_frames = registry.counter('control_frames_dropped_total', 'Control ticks without a camera frame', labels)
+    last_tick_start = None
+    run_start = time.perf_counter()
+
+    while dense_path is not None:
+        tick_start = time.perf_counter()
+        with tracing.span("perception"):
+            img, detections = capture_and_detect(client, vehicle_name, detector, frame_pool, with_depth=with_depth,
+                                                 backend=perception, camera=camera)
+            if img is None:
+                dropped_frames.inc()
+            else:
+                if exporter is not None:
+                    exporter.offer(img, detections)
+                show_detections(img, detections, vehicle_name)
+        perception_end = time.perf_counter()
+        with tracing.span("sensing"):
+            car_state = client.getCarState(vehicle_name)
+            readings = get_distance_sensors(client, vehicle_name)
+        sensing_end = time.perf_counter()
+        now = clock()
+        car_pos = car_state.kinematics_estimated.position
+        car_orientation = car_state.kinematics_estimated.orientation
+        car_heading = get_heading_from_quaternion(car_orientation)
+        current_position = (car_pos.x_val, car_pos.y_val)
+        target, progress, _ = dense_path.lookahead(current_position, car_state.speed)
+        target = tuple(target)
+        steering_angle = pure_pursuit_control(current_position, car_heading, target,
+                                              max(distance(current_position, target), 1.0))
+        car_controls.steering = steering_angle
+        grid.update(current_position, car_heading, readings)
+        located = [d['position'] for d in detections if d.get('position') is not None]
+        if located:
+            grid.add_obstacles(current_position, car_heading, located)
+        front_distance, front_left_distance, front_right_distance, rear_distance, rear_left_distance, rear_right_distance, left_distance, right_distance = readings
+
+        obstacle_near = (front_distance < 4 or left_distance < 1 or front_left_distance < 2
+                         or right_distance < 1 or front_right_distance < 2)
+        target_speed = speed_profile.at(progress)
+        if obstacle_near:
+            target_speed = min(target_speed, 3.0)
+        if with_depth and img is not None:
+            target_speed = min(target_speed, stopping_speed(nearest_in_path_range(detections, img.shape[1])))
+
+        if mpc is not None:
+            state = (current_position[0], current_position[1], math.radians(car_heading), car_state.speed)
+            car_controls.steering, target_speed = mpc.solve(state, dense_path, progress, target_speed, grid)
+            car_controls.throttle, car_controls.brake = speed_controller.update(target_speed, car_state.speed, now)
+            if front_distance < 1.5:
+                car_controls.throttle = 0
+                send_controls(client, car_controls, watchdog, vehicle_name)
+                go_reverse(client, car_controls, current_position, target, watchdog, vehicle_name)
+                speed_controller.reset()
+                mpc.reset()
+                motion_monitor.clear()
+        else:
+            # Steer around nearby obstacles on the local grid; only back up when the
+            # obstacle is too close to turn away from or no detour exists.
+            detour = None
+            if obstacle_near and front_distance >= 1.5:
+                detour = local_target(grid, current_position, tuple(dense_path.point_at(progress + 15)))
+            car_controls.throttle, car_controls.brake = speed_controller.update(target_speed, car_state.speed, now)
+
+            if detour is not None:
+                car_controls.steering = pure_pursuit_control(current_position, car_heading, detour)
+            elif front_distance < 4:
                 car_controls.throttle = 0
-                client.setCarControls(car_controls)
-                go_reverse(client, car_controls, current_position, waypoint)
+                send_controls(client, car_controls, watchdog, vehicle_name)
+                go_reverse(client, car_controls, current_position, target, watchdog, vehicle_name)
+                speed_controller.reset()
+                motion_monitor.clear()
             elif left_distance < 1 or front_left_distance < 2:
-                car_controls.steering = np.deg2rad(30)
+                car_controls.steering = math.radians(30)
             elif right_distance < 1 or front_right_distance < 2:
-                car_controls.steering = np.deg2rad(-30)
+                car_controls.steering = math.radians(-30)
 
-            client.setCarControls(car_controls)
+        planning_end = time.perf_counter()
+        send_controls(client, car_controls, watchdog, vehicle_name)
+        tick_end = time.perf_counter()
+        if startup is not None:
+            startup.mark(FIRST_COMMAND)
+        tick_latencies.append(tick_end - tick_start)
+        tick_seconds.observe(tick_end - tick_start)
+        if last_tick_start is not None:
+            loop_hz.set(1.0 / (tick_start - last_tick_start))
+        last_tick_start = tick_start
+        if telemetry is not None:
+            telemetry.log(t=tick_end - run_start, tick=len(tick_latencies), x=current_position[0],
+                          y=current_position[1], heading=car_heading, speed=car_state.speed,
+                          target_speed=target_speed, steering=car_controls.steering,
+                          throttle=car_controls.throttle, brake=car_controls.brake, sensors=readings,
+                          detections=len(detections),
+                          perception_ms=(perception_end - tick_start) * 1000.0,
+                          sensing_ms=(sensing_end - perception_end) * 1000.0,
+                          planning_ms=(planning_end - sensing_end) * 1000.0,
+                          actuation_ms=(tick_end - planning_end) * 1000.0,
+                          tick_ms=(tick_end - tick_start) * 1000.0)
 
-            if distance(current_position, waypoint) < 5:
-                break
+        if dense_path.remaining(progress) < 5 and distance(current_position, path[-1]) < 5:
+            break
 
-            if stuck_position is None or distance(current_position, stuck_position) > 1:
-                stuck_position = current_position
-                stuck_counter = 0
-            else:
-                stuck_counter += 1
-
-            if stuck_counter > 100:
-                go_reverse(client, car_controls, current_position, waypoint)
-                stuck_counter = 0
-                stuck_position = None
+        motion_monitor.push(now, current_position[0], current_position[1], car_state.speed, target_speed)
+        if motion_monitor.is_stuck():
+            go_reverse(client, car_controls, current_position, target, watchdog, vehicle_name)
+            speed_controller.reset()
+            if mpc is not None:
+                mpc.reset()
+            motion_monitor.clear()
 
-            time.sleep(0.05)
+        time.sleep(0.05)
 
     car_controls.throttle = 0
     car_controls.brake = 1
-    client.setCarControls(car_controls)
+    client.setCarControls(car_controls, vehicle_name)
     time.sleep(1)
-    client.enableApiControl(False)
+    client.enableApiControl(False, vehicle_name)
+
+    duration = time.perf_counter() - run_start
+    latencies = np.array(tick_latencies) * 1000.0 if tick_latencies else np.zeros(1)
+    return {
+        'vehicle_name': vehicle_name,
+        'ticks': len(tick_latencies),
+        'duration_s': duration,
+        'loop_hz': len(tick_latencies) / duration if duration > 0 else 0.0,
+        'latency_ms': {
+            'mean': float(latencies.mean()),
+            'p50': float(np.percentile(latencies, 50)),
+            'p95': float(np.percentile(latencies, 95)),
+            'max': float(latencies.max()),
+        },
+        'capture': {'format': default_format_selector().stats(), 'retry': default_retry_policy().stats()},
+    }
@@ -0,0 +1,344 @@
+# core/fleet.py
+"""
+Fleet launcher: drives several vehicles in one simulator, one process per car.
+
+Each vehicle gets its own process with its own AirSim RPC connection, route,
+safety watchdog and statistics. Processes can be pinned to CPUs, and their run
+statistics are aggregated into a single report.
+
+Usage:
+    python -m core.fleet --settings configs/settings.example.json
+    python -m core.fleet --routes configs/fleet.example.json --pin-cpus --report fleet_report.json
+    python -m core.fleet --routes configs/fleet.example.json --shared-detector --trace fleet_trace.json
+"""
+
+import sys
+from pathlib import Path
+
+current_directory = Path(__file__).resolve().parent
+parent_directory = current_directory.parent
+sys.path.append(str(parent_directory))
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import time
+
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_START = (0, 0)
+DEFAULT_GOAL = (126, 126)
+
+
+def load_vehicle_names(settings_path: str) -> list:
+    """
+    Reads the vehicle names defined in an AirSim settings file.
+
+    Args:
+        settings_path (str): Path to the settings JSON.
+
+    Returns:
+        list: The vehicle names, in file order.
+    """
+    with open(settings_path) as f:
+        settings = json.load(f)
+    return list(settings.get("Vehicles", {}))
+
+
+def load_fleet_config(routes_path: str = None, settings_path: str = None) -> list:
+    """
+    Builds the per-vehicle specs for a fleet run.
+
+    A routes file lists vehicles explicitly (see `configs/fleet.example.json`).
+    Without one, every vehicle from the settings file drives the default route.
+
+    Args:
+        routes_path (str, optional): Path to a fleet routes JSON. Defaults to None.
+        settings_path (str, optional): Path to an AirSim settings JSON. Defaults to None.
+
+    Returns:
+        list: One dict per vehicle with 'name', 'start' and either 'goal' or 'stops',
+              plus optional 'cpu', 'controller', 'perception', 'with_depth' and
+              'settings' (the AirSim settings file the vehicle's camera model is built from).
+    """
+    if routes_path:
+        with open(routes_path) as f:
+            return json.load(f)["vehicles"]
+    if settings_path:
+        return [{"name": name, "start": DEFAULT_START, "goal": DEFAULT_GOAL} for name in load_vehicle_names(settings_path)]
+    raise ValueError("Either a routes file or a settings file is required")
+
+
+def _pin_to_cpu(cpu: int) -> bool:
+    """Restricts the current process to one CPU where the platform supports it."""
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu})
+        return True
+    logger.warning("CPU pinning is not supported on this platform")
+    return False
+
+
+def run_vehicle(spec: dict, ip: str, port: int, results, detector=None, trace: bool = False) -> None:
+    """
+    Process entry point: plans and drives one vehicle, then reports its statistics.
+
+    Args:
+        spec (dict): The vehicle spec from `load_fleet_config`.
+        ip (str): The simulator RPC address.
+        port (int): The simulator RPC port.
+        results: A multiprocessing queue receiving the stats dict.
+        detector (DetectorClient, optional): Shared detector service client. Defaults to None.
+        trace (bool, optional): Record spans and send them back with the stats under
+            'trace'. Defaults to False.
+    """
+    name = spec["name"]
+    stats = {"vehicle_name": name, "pid": os.getpid()}
+    if trace:
+        tracing.enable()
+    try:
+        if spec.get("cpu") is not None:
+            stats["cpu"] = spec["cpu"] if _pin_to_cpu(spec["cpu"]) else None
+
+        # Heavy imports happen in the child so each process owns its own state.
+        import airsim
+        from config.graph import graph
+        from core.astar import astar
+        from core.mission import plan_mission
+        from core.control import control_vehicle
+        from core.safety import SafetyWatchdog
+        from detection.camera_model import load_camera_model
+        from utils.shared_frames import SharedFramePool
+
+        start = tuple(spec.get("start", DEFAULT_START))
+        if spec.get("stops"):
+            path, _, _ = plan_mission(graph, start, [tuple(s) for s in spec["stops"]])
+        else:
+            path = astar(graph, start, tuple(spec.get("goal", DEFAULT_GOAL)))
+
+        client = airsim.CarClient(ip=ip, port=port)
+        client.confirmConnection()
+        client.enableApiControl(True, name)
+
+        camera = load_camera_model(spec["settings"], name) if spec.get("settings") else None
+
+        # Frames for the shared detector go through shared memory instead of the queue.
+        frame_pool = SharedFramePool() if detector is not None else None
+        watchdog = SafetyWatchdog(airsim.CarClient(ip=ip, port=port), vehicle_name=name)
+        watchdog.start()
+        try:
+            stats.update(control_vehicle(client, airsim.CarControls(), path,
+                                         controller=spec.get("controller", "pure_pursuit"),
+                                         watchdog=watchdog, vehicle_name=name, detector=detector,
+                                         frame_pool=frame_pool, perception=spec.get("perception", "yolo"),
+                                         with_depth=spec.get("with_depth", False), camera=camera))
+            stats["emergency_brakes"] = watchdog.brake_count
+        finally:
+            watchdog.stop()
+            if frame_pool is not None:
+                frame_pool.close()
+    except Exception as e:
+        logger.error("Vehicle %s failed: %s", name, e)
+        stats["error"] = str(e)
+    if trace:
+        stats["trace"] = tracing.snapshot()
+    results.put(stats)
+
+
+def _collect_results(results, processes: dict, vehicles: dict, poll: float = 1.0) -> None:
+    """
+    Waits for one stats dict per vehicle process.
+
+    A child that dies without reporting (segfault, OOM kill, BaseException) gets an
+    error entry with its exit code instead of blocking the launcher forever.
+
+    Args:
+        results: The queue the children put their stats on.
+        processes (dict): Vehicle name -> its process.
+        vehicles (dict): Filled with vehicle name -> stats dict as results arrive, so
+            the ones collected so far survive a KeyboardInterrupt.
+        poll (float, optional): Seconds between liveness checks. Defaults to 1.
+    """
+    while len(vehicles) < len(processes):
+        try:
+            stats = results.get(timeout=poll)
+            vehicles[stats["vehicle_name"]] = stats
+            continue
+        except queue.Empty:
+            pass
+        dead = [name for name, process in processes.items()
+                if name not in vehicles and not process.is_alive()]
+        if not dead:
+            continue
+        # A child may have put its result just before exiting; drain before declaring it lost.
+        try:
+            while True:
+                stats = results.get(timeout=0.1)
+                vehicles[stats["vehicle_name"]] = stats
+        except queue.Empty:
+            pass
+        for name in dead:
+            if name not in vehicles:
+                exitcode = processes[name].exitcode
+                logger.error("Vehicle %s exited with code %s without reporting", name, exitcode)
+                vehicles[name] = {"vehicle_name": name, "error": f"exit code {exitcode}"}
+
+
+def run_fleet(specs: list, ip: str = "127.0.0.1", port: int = 41451, pin_cpus: bool = False,
+              shared_detector: bool = False, trace: str = None) -> dict:
+    """
+    Starts one control process per vehicle and waits for all of them.
+
+    Args:
+        specs (list): Vehicle specs from `load_fleet_config`.
+        ip (str, optional): The simulator RPC address. Defaults to "127.0.0.1".
+        port (int, optional): The simulator RPC port. Defaults to 41451.
+        pin_cpus (bool, optional): Pin vehicles without an explicit 'cpu' to CPUs
+            round-robin. Defaults to False.
+        shared_detector (bool, optional): Run one `DetectorService` for all vehicles
+            instead of a model per process. Defaults to False.
+        trace (str, optional): Write a Chrome trace with the spans of every vehicle
+            process and the detector service to this file. Defaults to None.
+
+    Returns:
+        dict: The fleet report from `aggregate_stats`.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    cpu_count = os.cpu_count() or 1
+    if trace:
+        tracing.enable()
+
+    service = None
+    detectors = {spec["name"]: None for spec in specs}
+    if shared_detector:
+        from detection.detector_service import DetectorService
+        service = DetectorService(context=ctx)
+        detectors = {spec["name"]: service.create_client(spec["name"]) for spec in specs}
+        service.start()
+
+    processes = []
+    for i, spec in enumerate(specs):
+        spec = dict(spec)
+        if pin_cpus and spec.get("cpu") is None:
+            spec["cpu"] = i % cpu_count
+        process = ctx.Process(target=run_vehicle,
+                              args=(spec, ip, port, results, detectors[spec["name"]], bool(trace)),
+                              name=f"vehicle-{spec['name']}")
+        process.start()
+        processes.append(process)
+
+    start = time.perf_counter()
+    vehicles = {}
+    try:
+        _collect_results(results, dict(zip((spec["name"] for spec in specs), processes)), vehicles)
+    except KeyboardInterrupt:
+        logger.info("KeyboardInterrupt received, stopping fleet...")
+        for process in processes:
+            process.terminate()
+    for process in processes:
+        process.join()
+
+    for stats in vehicles.values():
+        if "trace" in stats:
+            tracing.merge(stats.pop("trace"))
+    report = aggregate_stats(list(vehicles.values()))
+    report["wall_time_s"] = time.perf_counter() - start
+    if service is not None:
+        report["detector"] = service.stop()
+    if trace:
+        tracing.disable()
+        tracing.export_chrome_trace(trace)
+    return report
+
+
+def aggregate_stats(vehicles: list) -> dict:
+    """
+    Combines per-vehicle run statistics into a fleet report.
+
+    Args:
+        vehicles (list): Stats dicts returned by `control_vehicle`, one per vehicle.
+
+    Returns:
+        dict: The per-vehicle stats plus fleet totals: total ticks, combined control
+              rate, tick-weighted mean latency and the worst p95/max latencies.
+    """
+    ok = [v for v in vehicles if "error" not in v and v.get("ticks")]
+    total_ticks = sum(v["ticks"] for v in ok)
+    fleet = {
+        "vehicles_ok": len(ok),
+        "vehicles_failed": len(vehicles) - len(ok),
+        "total_ticks": total_ticks,
+        "combined_loop_hz": sum(v["loop_hz"] for v in ok),
+    }
+    if ok:
+        fleet["latency_ms"] = {
+            "mean": sum(v["latency_ms"]["mean"] * v["ticks"] for v in ok) / total_ticks,
+            "worst_p95": max(v["latency_ms"]["p95"] for v in ok),
+            "max": max(v["latency_ms"]["max"] for v in ok),
+        }
+    return {"vehicles": sorted(vehicles, key=lambda v: v["vehicle_name"]), "fleet": fleet}
+
+
+def format_report(report: dict) -> str:
+    """
+    Renders a fleet report as a text table.
+
+    Args:
+        report (dict): The report from `run_fleet`.
+
+    Returns:
+        str: The formatted report.
+    """
+    lines = [f"{'vehicle':<12} {'cpu':>4} {'ticks':>7} {'Hz':>7} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+    for v in report["vehicles"]:
+        if "error" in v:
+            lines.append(f"{v['vehicle_name']:<12} FAILED: {v['error']}")
+            continue
+        lat = v["latency_ms"]
+        cpu = v.get("cpu")
+        lines.append(f"{v['vehicle_name']:<12} {'-' if cpu is None else cpu:>4} {v['ticks']:>7} {v['loop_hz']:>7.1f} "
+                     f"{lat['mean']:>9.1f} {lat['p95']:>9.1f} {lat['max']:>9.1f}")
+    fleet = report["fleet"]
+    lines.append(f"fleet: {fleet['vehicles_ok']} ok, {fleet['vehicles_failed']} failed, "
+                 f"{fleet['total_ticks']} ticks, {fleet['combined_loop_hz']:.1f} Hz combined")
+    if "latency_ms" in fleet:
+        lat = fleet["latency_ms"]
+        lines.append(f"latency: mean {lat['mean']:.1f} ms, worst p95 {lat['worst_p95']:.1f} ms, max {lat['max']:.1f} ms")
+    if report.get("detector"):
+        det = report["detector"]
+        lines.append(f"detector: {det['frames']} frames in {det['batches']} batches (mean batch {det['mean_batch']:.2f}, "
+                     f"{det.get('stale_frames', 0)} stale)")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive several AirSim vehicles, one process per car.")
+    parser.add_argument("--settings", default="configs/settings.example.json", help="AirSim settings file listing the vehicles")
+    parser.add_argument("--routes", help="Fleet routes file (see configs/fleet.example.json)")
+    parser.add_argument("--ip", default="127.0.0.1", help="Simulator RPC address")
+    parser.add_argument("--port", type=int, default=41451, help="Simulator RPC port")
+    parser.add_argument("--pin-cpus", action="store_true", help="Pin each vehicle process to its own CPU")
+    parser.add_argument("--shared-detector", action="store_true", help="Share one batched YOLO model across all vehicles")
+    parser.add_argument("--report", help="Also write the report as JSON to this file")
+    parser.add_argument("--trace", help="Write a Chrome trace of all vehicle and detector processes to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    specs = load_fleet_config(args.routes, args.settings)
+    if args.settings:
+        for spec in specs:
+            spec.setdefault("settings", args.settings)
+    report = run_fleet(specs, args.ip, args.port, args.pin_cpus, args.shared_detector, args.trace)
+    print(format_report(report))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
 # core/main.py
+import time
+
+# Origin of the --profile-startup report; taken before any other import.
+_IMPORT_START = time.perf_counter()
+
 import sys
 from pathlib import Path
 
@@ -6,203 +11,200 @@ current_directory = Path(__file__).resolve().parent
 parent_directory = current_directory.parent
 sys.path.append(str(parent_directory))
 
+import argparse
 import threading
-import airsim
 from config.graph import graph
 from core.astar import astar
-from core.control import control_vehicle
-from utils.robust_image import validate_connection
+from core.mission import plan_mission
+from core.startup import FIRST_COMMAND, StartupProfile, run_parallel
+from utils import tracing
+from utils.metrics import default_registry
+from utils.hot_logging import configure_logging
 
-def main():
-    """
-    The main function controls the execution flow of the program.
-    It initializes the start and goal coordinates, finds the path using the A* algorithm,
-    connects to the AirSim CarClient, controls the vehicle, and handles keyboard interrupts.
-    
-    Enhanced with connection validation to prevent Issue #2.
-    """
+# airsim, cv2 and the detection stack (ultralytics, torch) are imported inside the
+# startup tasks below, so their import time overlaps with connecting and planning.
+
+
+def _plan_route(stops: list = None) -> list:
     start_coord = (0, 0)
     goal_coord = (126, 126)
+    if stops:
+        path, _, _ = plan_mission(graph, start_coord, stops)
+        return path
+    return astar(graph, start_coord, goal_coord)
+
 
-    path = astar(graph, start_coord, goal_coord)
+def _connect():
+    import airsim
+    from utils.robust_image import validate_connection
 
     client = airsim.CarClient()
     client.confirmConnection()
-    
     # Validate connection before proceeding (fixes Issue #2)
     if not validate_connection(client, timeout=10.0):
-        print("❌ Failed to validate AirSim connection")
-        return
-    
-    client.enableApiControl(True)
-    client.reset()
+        return None
+    return client
 
-    car_controls = airsim.CarControls()
-    control_thread = threading.Thread(target=control_vehicle, args=(client, car_controls, path))
-    control_thread.start()
 
-    try:
-        while control_thread.is_alive():
-            control_thread.join(0.1)
-        print("The vehicle has reached the destination")
-    except KeyboardInterrupt:
-        print("KeyboardInterrupt has been caught")
-    finally:
-        try:
-            client.enableApiControl(False)
-        except:
-            pass
+def _load_model() -> None:
+    from detection.object_detection import warm_up_model
+    import core.control  # noqa: F401 - imports the rest of the control stack on this thread
+    warm_up_model()
 
-if __name__ == "__main__":
-    main()
 
-
-def validate_airsim_connection(client, timeout=10.0):
-    """
-    Validate AirSim connection before starting main operations.
-    
-    Args:
-        client: AirSim CarClient object
-        timeout: Maximum time to wait for connection validation
-    
-    Returns:
-        bool: True if connection is ready, False otherwise
-    """
-    try:
-        start_time = time.time()
-        
-        logger.info("Validating AirSim connection...")
-        
-        while time.time() - start_time < timeout:
-            try:
-                # Test basic API calls
-                client.getCarState()
-                
-                # Test image API specifically (this addresses Issue #2)
-                test_response = client.simGetImages([
-                    airsim.ImageRequest("0", airsim.ImageType.Scene, False, True)
-                ])
-                
-                if test_response and len(test_response) > 0:
-                    logger.info("AirSim connection and image API validated successfully")
-                    return True
-                    
-            except Exception as e:
-                logger.debug(f"Connection validation attempt failed: {str(e)}")
-                time.sleep(0.5)
-        
-        logger.error("AirSim connection validation timed out")
-        return False
-        
-    except Exception as e:
-        logger.error(f"AirSim connection validation failed: {str(e)}")
-        return False
-
-
-def main():
+def main(stops: list = None, record: str = None, telemetry: str = None, export: str = None,
+         trace: str = None, metrics_port: int = None, metrics_file: str = None,
+         profile_startup: bool = False, with_depth: bool = False, settings: str = None):
     """
     The main function controls the execution flow of the program.
     It initializes the start and goal coordinates, finds the path using the A* algorithm,
     connects to the AirSim CarClient, controls the vehicle, and handles keyboard interrupts.
     
-    Improvements in this version:
-    1. Added connection validation to prevent Issue #2
-    2. Added proper error handling and logging
-    3. Added graceful shutdown handling
-    4. Added retry mechanism for connection issues
+    Enhanced with connection validation to prevent Issue #2.
 
-    Parameters:
-        None
+    Route planning, the simulator connection and loading (and warming up) the
+    detection model run in parallel, see `core.startup`.
 
-    Returns:
-        None
+    Args:
+        stops (list, optional): Coordinates of several stops to visit. When given, the
+            visiting order is optimized with `core.mission.plan_mission` instead of
+            driving to the single default goal.
+        record (str, optional): Session directory to record every state, sensor reading,
+            frame and control command into, for replay with `core/replay.py`.
+        telemetry (str, optional): Directory to write the per-tick telemetry log into;
+            load it afterwards with `utils.telemetry.load_telemetry`.
+        export (str, optional): Directory to harvest camera frames and their detections
+            into as a YOLO-format training set.
+        trace (str, optional): File to write a Chrome trace of the run's capture,
+            inference, sensing and control spans to; open it in Perfetto.
+        metrics_port (int, optional): Serve live metrics (loop rate, RPC and inference
+            latency histograms, dropped frames, capture retries) in the Prometheus text
+            format on http://127.0.0.1:<port>/metrics.
+        metrics_file (str, optional): File to write the final metrics to at shutdown.
+        profile_startup (bool, optional): Print a breakdown of the time to the first
+            control command once it has been sent.
+        with_depth (bool, optional): Estimate the range to every detection from the depth
+            image and slow down for the nearest one ahead.
+        settings (str, optional): AirSim settings file to build the camera model from, so
+            detections are placed on the ground plane and avoided through the occupancy grid.
     """
-    logger.info("Starting Airsim101_Yolov10 application...")
-    
-    start_coord = (0, 0)
-    goal_coord = (126, 126)
+    startup = StartupProfile(_IMPORT_START)
+    startup.add_phase('import core.main', _IMPORT_START, time.perf_counter())
+
+    if trace:
+        tracing.enable()
+    if metrics_port is not None:
+        default_registry().serve(metrics_port)
+
+    with startup.phase('parallel startup'):
+        ready = run_parallel({
+            'plan route': lambda: _plan_route(stops),
+            'connect and validate': _connect,
+            'load model': _load_model,
+        }, startup)
+    path = ready['plan route']
+    client = ready['connect and validate']
+    if client is None:
+        print("❌ Failed to validate AirSim connection")
+        return
+
+    with startup.phase('prepare vehicle'):
+        import airsim
+        from core.control import control_vehicle
+        from core.safety import SafetyWatchdog
+
+        recorder = None
+        control_kwargs = {}
+        if record:
+            import secrets
+            from utils.recording import SessionRecorder, RecordingClient
+            # Wrapped after validation so replay starts with the control loop's own calls.
+            recorder = SessionRecorder(record)
+            recorder.meta['path'] = [list(p) for p in path]
+            recorder.meta['mpc_seed'] = secrets.randbits(32)
+            client = RecordingClient(client, recorder)
+            # Recorded state times and seed, so core/replay.py reproduces the commands exactly.
+            control_kwargs = {'clock': client.clock, 'mpc_seed': recorder.meta['mpc_seed']}
 
-    try:
-        # Generate path using A* algorithm
-        logger.info(f"Calculating path from {start_coord} to {goal_coord}")
-        path = astar(graph, start_coord, goal_coord)
-        
-        if not path:
-            logger.error("Failed to find path with A* algorithm")
-            return
-        
-        logger.info(f"Path calculated successfully with {len(path)} waypoints")
-
-        # Initialize AirSim client with retry mechanism
-        max_connection_attempts = 3
-        client = None
-        
-        for attempt in range(max_connection_attempts):
-            try:
-                logger.info(f"Connecting to AirSim (attempt {attempt + 1}/{max_connection_attempts})...")
-                client = airsim.CarClient()
-                client.confirmConnection()
-                
-                # Validate connection thoroughly (addresses Issue #2)
-                if validate_airsim_connection(client, timeout=10.0):
-                    break
-                else:
-                    logger.warning("Connection validation failed, retrying...")
-                    client = None
-                    
-            except Exception as e:
-                logger.warning(f"Connection attempt {attempt + 1} failed: {str(e)}")
-                if attempt < max_connection_attempts - 1:
-                    logger.info("Retrying in 2 seconds...")
-                    time.sleep(2)
-                client = None
-        
-        if client is None:
-            logger.error("Failed to establish valid AirSim connection after all attempts")
-            return
-
-        # Initialize vehicle controls
-        logger.info("Initializing vehicle controls...")
         client.enableApiControl(True)
         client.reset()
 
-        car_controls = airsim.CarControls()
-        
-        # Start vehicle control in separate thread
-        logger.info("Starting vehicle control thread...")
-        control_thread = threading.Thread(target=control_vehicle, args=(client, car_controls, path))
-        control_thread.daemon = True  # Allow main thread to exit
-        control_thread.start()
+        # The watchdog gets its own connection because the RPC client is not thread-safe.
+        watchdog_client = airsim.CarClient()
+        if recorder is not None:
+            watchdog_client = RecordingClient(watchdog_client, recorder, source='watchdog')
+        watchdog = SafetyWatchdog(watchdog_client)
+        watchdog.start()
+
+        telemetry_logger = None
+        if telemetry:
+            from utils.telemetry import TelemetryLogger
+            telemetry_logger = TelemetryLogger(telemetry)
+        exporter = None
+        if export:
+            from detection.dataset_export import DatasetExporter
+            exporter = DatasetExporter(export, policies=('every', 'low_confidence', 'new_classes'))
+        camera = None
+        if settings:
+            from detection.camera_model import load_camera_model
+            camera = load_camera_model(settings)
 
-        # Main monitoring loop
-        try:
-            while control_thread.is_alive():
-                control_thread.join(0.1)
-            logger.info("The vehicle has reached the destination")
-            
-        except KeyboardInterrupt:
-            logger.info("KeyboardInterrupt received, shutting down gracefully...")
-            
-        finally:
-            # Cleanup
-            try:
-                if client:
-                    logger.info("Cleaning up AirSim connection...")
-                    car_controls.throttle = 0
-                    car_controls.brake = 1
-                    client.setCarControls(car_controls)
-                    client.enableApiControl(False)
-                    logger.info("AirSim cleanup completed")
-            except Exception as e:
-                logger.warning(f"Error during cleanup: {str(e)}")
-
-    except Exception as e:
-        logger.error(f"Fatal error in main function: {str(e)}")
-        raise
+    car_controls = airsim.CarControls()
+    control_thread = threading.Thread(target=control_vehicle, args=(client, car_controls, path),
+                                      kwargs={'watchdog': watchdog, 'telemetry': telemetry_logger,
+                                              'exporter': exporter, 'startup': startup, 'with_depth': with_depth,
+                                              'camera': camera, **control_kwargs})
+    control_thread.start()
 
+    try:
+        reported = not profile_startup
+        while control_thread.is_alive():
+            control_thread.join(0.1)
+            if not reported and startup.wait(FIRST_COMMAND, 0):
+                print(startup.report())
+                reported = True
+        print("The vehicle has reached the destination")
+    except KeyboardInterrupt:
+        print("KeyboardInterrupt has been caught")
     finally:
-        logger.info("Application shutdown complete")
+        watchdog.stop()
+        try:
+            client.enableApiControl(False)
+        except:
+            pass
+        if recorder is not None:
+            recorder.close()
+        if telemetry_logger is not None:
+            telemetry_logger.close()
+        if exporter is not None:
+            exporter.close()
+        if trace:
+            tracing.disable()
+            tracing.export_chrome_trace(trace)
+        if metrics_file:
+            default_registry().dump(metrics_file)
+        default_registry().stop()
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Drive the car along the planned route.")
+    parser.add_argument("--record", help="Session directory to record the drive into")
+    parser.add_argument("--telemetry", help="Directory for the per-tick telemetry log")
+    parser.add_argument("--export", help="Directory to export a YOLO training set into")
+    parser.add_argument("--trace", help="Chrome trace output file")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this localhost port")
+    parser.add_argument("--metrics-file", help="Write the final metrics to this file")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print a breakdown of the time to the first control command")
+    parser.add_argument("--with-depth", action="store_true",
+                        help="Range detections with the depth camera and slow down for the nearest one ahead")
+    parser.add_argument("--settings", help="AirSim settings file describing the camera, to place detections on the ground")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    main()
+    configure_logging(async_handlers=True)
+    args = _parse_args()
+    main(record=args.record, telemetry=args.telemetry, export=args.export, trace=args.trace,
+         metrics_port=args.metrics_port, metrics_file=args.metrics_file, profile_startup=args.profile_startup,
+         with_depth=args.with_depth, settings=args.settings)
@@ -0,0 +1,217 @@
+# core/mission.py
+"""
+Multi-stop mission planning on top of `core.astar`.
+
+The pairwise shortest-path distances between stops come from shortest-path trees
+that are cached per graph version, so re-planning a mission on an unchanged graph
+does not run any new searches. The visiting order is found with nearest insertion
+followed by 2-opt and Or-opt local search, all evaluated with vectorized NumPy
+deltas over the distance matrix.
+"""
+
+import numpy as np
+from config.coordinates import coordinates
+from core.astar import compile_graph, nearest_nodes, shortest_path_tree
+
+_tree_cache = {}
+
+
+def _get_tree(compiled, source: int) -> tuple:
+    """
+    Returns the full shortest-path tree of `source`, cached by graph version.
+    """
+    trees = _tree_cache.get(compiled.version)
+    if trees is None:
+        # Trees of older graph versions can never be hit again.
+        _tree_cache.clear()
+        trees = _tree_cache[compiled.version] = {}
+    tree = trees.get(source)
+    if tree is None:
+        tree = trees[source] = shortest_path_tree(compiled, source, range(len(compiled.nodes)))
+    return tree
+
+
+def distance_matrix(graph: dict, points, coords: dict = coordinates) -> tuple:
+    """
+    Builds the pairwise shortest-path distance matrix between a set of points.
+
+    Args:
+        graph (dict): A dictionary representing the graph where each key is a node and the value is a list of neighboring nodes.
+        points: An (N, 2) array-like of coordinates; each is snapped to its nearest node.
+        coords (dict, optional): The node coordinates. Defaults to `config.coordinates.coordinates`.
+
+    Returns:
+        tuple: (matrix, nodes) where `matrix[i, j]` is the path length from point i to
+               point j (infinite if unreachable) and `nodes` holds the snapped node indices.
+    """
+    compiled = compile_graph(graph, coords)
+    nodes = nearest_nodes(compiled, points)
+    matrix = np.empty((len(nodes), len(nodes)))
+    for i, node in enumerate(nodes):
+        dist, _ = _get_tree(compiled, node)
+        matrix[i] = dist[nodes]
+    return matrix, nodes
+
+
+def _nearest_insertion(cost: np.ndarray, free_end: bool = False) -> list:
+    """
+    Builds an initial route from node 0 to the last node of `cost` by nearest insertion.
+
+    With `free_end` the last node costs nothing to reach or leave, so it is left out
+    when choosing the next stop; otherwise every stop would be equally close to it.
+    """
+    end = len(cost) - 1
+    route = [0, end]
+    unvisited = np.ones(len(cost), dtype=bool)
+    unvisited[[0, end]] = False
+
+    while unvisited.any():
+        candidates = np.nonzero(unvisited)[0]
+        anchors = route[:-1] if free_end else route
+        closeness = np.minimum(cost[np.ix_(anchors, candidates)].min(axis=0),
+                               cost[np.ix_(candidates, anchors)].min(axis=1))
+        k = candidates[closeness.argmin()]
+        a = np.array(route[:-1])
+        b = np.array(route[1:])
+        increase = cost[a, k] + cost[k, b] - cost[a, b]
+        route.insert(int(increase.argmin()) + 1, int(k))
+        unvisited[k] = False
+
+    return route
+
+
+def _two_opt(cost: np.ndarray, route: list) -> bool:
+    """
+    Applies the best improving segment reversal for each segment start, in place.
+
+    Reversal costs are taken from forward/backward prefix sums, so the matrix does
+    not need to be symmetric.
+
+    Returns:
+        bool: True if the route was improved.
+    """
+    improved = False
+    n = len(route)
+    i = 1
+    while i < n - 2:
+        r = np.array(route)
+        forward = np.concatenate(([0.0], np.cumsum(cost[r[:-1], r[1:]])))
+        backward = np.concatenate(([0.0], np.cumsum(cost[r[1:], r[:-1]])))
+        j = np.arange(i + 1, n - 1)
+        old = cost[r[i - 1], r[i]] + (forward[j] - forward[i]) + cost[r[j], r[j + 1]]
+        new = cost[r[i - 1], r[j]] + (backward[j] - backward[i]) + cost[r[i], r[j + 1]]
+        delta = new - old
+        best = delta.argmin()
+        if delta[best] < -1e-9:
+            route[i:j[best] + 1] = route[i:j[best] + 1][::-1]
+            improved = True
+        i += 1
+    return improved
+
+
+def _or_opt(cost: np.ndarray, route: list, max_segment: int = 3) -> bool:
+    """
+    Moves segments of up to `max_segment` stops to their best position, in place,
+    optionally reversing them.
+
+    Returns:
+        bool: True if the route was improved.
+    """
+    improved = False
+    for length in range(1, max_segment + 1):
+        i = 1
+        while i + length < len(route):
+            segment = route[i:i + length]
+            prev_node, next_node = route[i - 1], route[i + length]
+            first, last = segment[0], segment[-1]
+            removal_gain = cost[prev_node, first] + cost[last, next_node] - cost[prev_node, next_node]
+
+            rest = route[:i] + route[i + length:]
+            a = np.array(rest[:-1])
+            b = np.array(rest[1:])
+            # Row 0 inserts the segment as is, row 1 inserts it reversed.
+            reversed_inner = cost[segment[1:], segment[:-1]].sum() - cost[segment[:-1], segment[1:]].sum()
+            insertion = np.stack((cost[a, first] + cost[last, b] - cost[a, b],
+                                  cost[a, last] + cost[first, b] - cost[a, b] + reversed_inner))
+            flip, best = np.unravel_index(insertion.argmin(), insertion.shape)
+            if insertion[flip, best] < removal_gain - 1e-9:
+                moved = segment[::-1] if flip else segment
+                route[:] = rest[:best + 1] + moved + rest[best + 1:]
+                improved = True
+            i += 1
+    return improved
+
+
+def solve_order(matrix: np.ndarray, return_to_start: bool = False, max_rounds: int = 50) -> tuple:
+    """
+    Finds a short visiting order over a distance matrix whose row/column 0 is the start.
+
+    Args:
+        matrix (np.ndarray): An (N, N) distance matrix; index 0 is the start.
+        return_to_start (bool, optional): Whether the route ends back at the start. Defaults to False.
+        max_rounds (int, optional): Maximum number of local-search rounds. Defaults to 50.
+
+    Returns:
+        tuple: (order, cost) where `order` lists the indices 1..N-1 in visiting order.
+    """
+    n = len(matrix)
+    if not np.isfinite(matrix).all():
+        raise ValueError("Some stops are unreachable from each other")
+
+    # Append a fixed end node: a copy of the start for closed tours, or a free
+    # end (zero cost to reach) for open routes.
+    cost = np.zeros((n + 1, n + 1))
+    cost[:n, :n] = matrix
+    if return_to_start:
+        cost[:n, n] = matrix[:, 0]
+        cost[n, :n] = matrix[0, :]
+
+    route = _nearest_insertion(cost, free_end=not return_to_start)
+    for _ in range(max_rounds):
+        improved = _two_opt(cost, route)
+        improved = _or_opt(cost, route) or improved
+        if not improved:
+            break
+
+    r = np.array(route)
+    total = float(cost[r[:-1], r[1:]].sum())
+    return route[1:-1], total
+
+
+def plan_mission(graph: dict, start_coord: tuple, stops: list, return_to_start: bool = False,
+                 coords: dict = coordinates) -> tuple:
+    """
+    Plans a route from `start_coord` that visits every stop in a short order.
+
+    Args:
+        graph (dict): A dictionary representing the graph where each key is a node and the value is a list of neighboring nodes.
+        start_coord (tuple): The coordinates of the starting point.
+        stops (list): The coordinates of the stops to visit, in any order.
+        return_to_start (bool, optional): Whether to come back to the start. Defaults to False.
+        coords (dict, optional): The node coordinates. Defaults to `config.coordinates.coordinates`.
+
+    Returns:
+        tuple: (path, order, cost) where `path` is the concatenated list of waypoint
+               coordinates, `order` lists indices into `stops` in visiting order, and
+               `cost` is the total path length.
+    """
+    if not stops:
+        return [], [], 0.0
+
+    points = [start_coord] + list(stops)
+    matrix, nodes = distance_matrix(graph, points, coords)
+    order, total = solve_order(matrix, return_to_start)
+
+    compiled = compile_graph(graph, coords)
+    sequence = [0] + order + ([0] if return_to_start else [])
+    path = [compiled.points[nodes[0]]]
+    for a, b in zip(sequence[:-1], sequence[1:]):
+        _, prev = _get_tree(compiled, nodes[a])
+        leg = []
+        node = nodes[b]
+        while node != nodes[a]:
+            leg.append(compiled.points[node])
+            node = prev[node]
+        path.extend(leg[::-1])
+
+    return path, [i - 1 for i in order], total
@@ -0,0 +1,103 @@
+# core/motion_monitor.py
+"""
+Time-based stuck detection.
+
+The monitor keeps the most recent (timestamp, x, y, speed, commanded speed)
+samples in a preallocated ring buffer and judges progress over a fixed time
+window, so its reaction time does not depend on how long each control tick takes.
+"""
+
+import math
+import numpy as np
+
+_T, _X, _Y, _SPEED, _COMMANDED = range(5)
+
+
+class MotionMonitor:
+    """
+    Declares the vehicle stuck when it was asked to move but barely did.
+
+    Args:
+        window (float, optional): Length of the judged time window in seconds. Defaults to 3.
+        min_displacement (float, optional): Distance in meters the car must cover within
+            the window to count as moving. Defaults to 1.
+        min_commanded_speed (float, optional): The commanded speed must stay at or above
+            this value for the whole window, so deliberate stops are not flagged. Defaults to 0.5.
+        speed_ratio (float, optional): Stuck also requires the mean actual speed to be below
+            this fraction of the mean commanded speed. Defaults to 0.25.
+        capacity (int, optional): Ring buffer size in samples; must cover the window at the
+            fastest expected loop rate. Defaults to 512.
+    """
+
+    def __init__(self, window: float = 3.0, min_displacement: float = 1.0, min_commanded_speed: float = 0.5,
+                 speed_ratio: float = 0.25, capacity: int = 512):
+        self.window = window
+        self.min_displacement = min_displacement
+        self.min_commanded_speed = min_commanded_speed
+        self.speed_ratio = speed_ratio
+        self._buffer = np.zeros((capacity, 5))
+        self._capacity = capacity
+        self._head = 0
+        self._count = 0
+
+    def clear(self):
+        """Drops all samples, e.g. after a recovery manoeuvre."""
+        self._head = 0
+        self._count = 0
+
+    def push(self, timestamp: float, x: float, y: float, speed: float, commanded_speed: float):
+        """
+        Records one sample, overwriting the oldest one when the buffer is full.
+
+        Args:
+            timestamp (float): Sample time in seconds (monotonic clock).
+            x (float): X position in meters.
+            y (float): Y position in meters.
+            speed (float): Measured speed in m/s.
+            commanded_speed (float): Speed the controller asked for, in m/s.
+        """
+        row = self._buffer[self._head]
+        row[_T] = timestamp
+        row[_X] = x
+        row[_Y] = y
+        row[_SPEED] = speed
+        row[_COMMANDED] = commanded_speed
+        self._head = (self._head + 1) % self._capacity
+        self._count = min(self._count + 1, self._capacity)
+
+    def is_stuck(self) -> bool:
+        """
+        Checks the samples of the last `window` seconds.
+
+        Returns:
+            bool: True if the window is fully covered, the commanded speed stayed above
+                  `min_commanded_speed`, and both displacement and mean speed stayed low.
+        """
+        if self._count < 2:
+            return False
+
+        buf = self._buffer
+        newest = (self._head - 1) % self._capacity
+        t_now = buf[newest, _T]
+        speed_sum = 0.0
+        commanded_sum = 0.0
+        samples = 0
+        start = -1
+        # Walk back from the newest sample to the first one at or before the window start.
+        for k in range(self._count):
+            i = (newest - k) % self._capacity
+            if buf[i, _COMMANDED] < self.min_commanded_speed:
+                return False
+            speed_sum += buf[i, _SPEED]
+            commanded_sum += buf[i, _COMMANDED]
+            samples += 1
+            if t_now - buf[i, _T] >= self.window:
+                start = i
+                break
+
+        if start < 0:
+            return False  # Not enough history to cover the window yet.
+
+        displacement = math.hypot(buf[newest, _X] - buf[start, _X], buf[newest, _Y] - buf[start, _Y])
+        return (displacement < self.min_displacement
+                and speed_sum < self.speed_ratio * commanded_sum)
@@ -0,0 +1,147 @@
+# core/mpc.py
+"""
+Sampling-based model predictive control (MPPI style) in batched NumPy.
+
+Every tick, `samples` perturbed copies of the previous steering/acceleration plan
+are rolled out through the kinematic bicycle model at once. Each rollout is scored
+for deviation from the reference path, speed tracking, occupied grid cells and
+comfort, and the plan is updated as the cost-weighted average of the samples.
+"""
+
+import numpy as np
+from core.path import DensePath
+from core.vehicle import WHEELBASE, MAX_STEERING_DEG, bicycle_step
+
+
+class SamplingMPC:
+    """
+    Sampling-based MPC for steering and acceleration.
+
+    Args:
+        horizon (int, optional): Number of prediction steps. Defaults to 20.
+        dt (float, optional): Prediction step in seconds. Defaults to 0.1.
+        samples (int, optional): Number of candidate control sequences. Defaults to 256.
+        wheelbase (float, optional): Axle distance in meters. Defaults to `WHEELBASE`.
+        max_steering_deg (float, optional): Steering limit in degrees. Defaults to `MAX_STEERING_DEG`.
+        max_accel (float, optional): Acceleration limit in m/s^2. Defaults to 2.
+        max_decel (float, optional): Braking limit in m/s^2. Defaults to 4.
+        steering_noise (float, optional): Std-dev of steering perturbations in radians. Defaults to 0.15.
+        accel_noise (float, optional): Std-dev of acceleration perturbations in m/s^2. Defaults to 1.
+        temperature (float, optional): Softmax temperature, relative to the spread between
+            the best and the median rollout cost. Defaults to 0.2.
+        seed (int, optional): Seed for the perturbation generator. Defaults to None.
+
+    Attributes:
+        weights (dict): Cost weights for 'path', 'speed', 'obstacle', 'steering_rate'
+            and 'accel'; may be tuned after construction.
+    """
+
+    def __init__(self, horizon: int = 20, dt: float = 0.1, samples: int = 256,
+                 wheelbase: float = WHEELBASE, max_steering_deg: float = MAX_STEERING_DEG,
+                 max_accel: float = 2.0, max_decel: float = 4.0, steering_noise: float = 0.15,
+                 accel_noise: float = 1.0, temperature: float = 0.2, seed: int = None):
+        self.horizon = horizon
+        self.dt = dt
+        self.samples = samples
+        self.wheelbase = wheelbase
+        self.max_steering = np.deg2rad(max_steering_deg)
+        self.max_accel = max_accel
+        self.max_decel = max_decel
+        self.noise_std = np.array([steering_noise, accel_noise])
+        self.temperature = temperature
+        self.weights = {'path': 1.0, 'speed': 0.5, 'obstacle': 50.0, 'steering_rate': 5.0, 'accel': 0.05}
+        self.rng = np.random.default_rng(seed)
+
+        self.plan = np.zeros((horizon, 2))
+        self._noise = np.empty((samples, horizon, 2))
+        self._controls = np.empty((samples, horizon, 2))
+        self._positions = np.empty((samples, horizon, 2))
+        self._speeds = np.empty((samples, horizon))
+
+    def reset(self):
+        """Forgets the warm-start plan, e.g. after a manual manoeuvre."""
+        self.plan[:] = 0.0
+
+    def rollout(self, state: tuple, controls: np.ndarray) -> tuple:
+        """
+        Simulates a batch of control sequences from `state`.
+
+        Args:
+            state (tuple): The current (x, y, yaw, v), with yaw in radians.
+            controls (np.ndarray): A (K, T, 2) array of (steering, accel) per step.
+
+        Returns:
+            tuple: (positions, speeds) as (K, T, 2) and (K, T) arrays, state after each step.
+        """
+        k = len(controls)
+        positions = self._positions[:k]
+        speeds = self._speeds[:k]
+        x = np.full(k, float(state[0]))
+        y = np.full(k, float(state[1]))
+        yaw = np.full(k, float(state[2]))
+        v = np.full(k, float(state[3]))
+        for t in range(controls.shape[1]):
+            x, y, yaw, v = bicycle_step(x, y, yaw, v, controls[:, t, 0], controls[:, t, 1], self.dt, self.wheelbase)
+            positions[:, t, 0] = x
+            positions[:, t, 1] = y
+            speeds[:, t] = v
+        return positions, speeds
+
+    def solve(self, state: tuple, path: DensePath, progress: float, target_speed: float,
+              grid=None, speed_lead: float = 0.5) -> tuple:
+        """
+        Runs one MPC iteration and returns the commands to apply now.
+
+        Args:
+            state (tuple): The current (x, y, yaw, v), with yaw in radians.
+            path (DensePath): The reference path.
+            progress (float): Arc length of the vehicle's closest point on `path`.
+            target_speed (float): Reference speed in m/s.
+            grid (OccupancyGrid, optional): Sensor occupancy grid for obstacle costs. Defaults to None.
+            speed_lead (float, optional): How far ahead in the plan to read the speed
+                command, in seconds. Defaults to 0.5.
+
+        Returns:
+            tuple: (steering, speed) - the steering angle in radians and the planned speed
+                   `speed_lead` seconds ahead, for the speed controller to track.
+        """
+        # Warm start: shift last tick's plan by one step.
+        self.plan[:-1] = self.plan[1:]
+
+        self.rng.standard_normal(out=self._noise)
+        self._noise *= self.noise_std
+        self._noise[0] = 0.0  # Always evaluate the unperturbed plan too.
+        controls = self._controls
+        np.add(self.plan, self._noise, out=controls)
+        np.clip(controls[..., 0], -self.max_steering, self.max_steering, out=controls[..., 0])
+        np.clip(controls[..., 1], -self.max_decel, self.max_accel, out=controls[..., 1])
+
+        positions, speeds = self.rollout(state, controls)
+
+        # Reference points over the distance the car could cover within the horizon.
+        reach = max(float(state[3]), target_speed) * self.horizon * self.dt + 5.0
+        reference = path.points_at(np.arange(progress, progress + reach, 1.0))
+        flat = positions.reshape(-1, 2)
+        d2 = ((flat[:, None, :] - reference[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+
+        w = self.weights
+        cost = w['path'] * d2.reshape(self.samples, self.horizon).sum(axis=1)
+        cost += w['speed'] * ((speeds - target_speed) ** 2).sum(axis=1)
+        if grid is not None:
+            occupancy = grid.occupancy_at(positions)
+            cost += w['obstacle'] * np.maximum(occupancy, 0.0).sum(axis=1)
+        cost += w['steering_rate'] * (np.diff(controls[..., 0], axis=1) ** 2).sum(axis=1)
+        cost += w['accel'] * (controls[..., 1] ** 2).sum(axis=1)
+
+        # Scale the temperature by the cost spread so it works across cost magnitudes.
+        spread = max(float(np.median(cost) - cost.min()), 1e-9)
+        weights = np.exp(-(cost - cost.min()) / (self.temperature * spread))
+        weights /= weights.sum()
+        self.plan[:] = np.tensordot(weights, controls, axes=1)
+
+        steering = float(self.plan[0, 0])
+        lead_steps = min(max(int(round(speed_lead / self.dt)), 1), self.horizon)
+        speed = float(state[3])
+        for t in range(lead_steps):
+            speed = max(speed + self.plan[t, 1] * self.dt, 0.0)
+        return steering, speed
@@ -0,0 +1,267 @@
+# core/occupancy.py
+"""
+Rolling ego-centric occupancy grid built from the distance sensors, plus a grid A*
+local planner that steers around obstacles.
+
+The grid is world-aligned and follows the car. Cells are stored in a ring buffer
+indexed by world cell modulo the grid size, so moving the window only clears the
+rows/columns that scroll in instead of copying the whole grid.
+"""
+
+import heapq
+import math
+import numpy as np
+from core.sensors import SENSOR_YAW_DEG, SENSOR_MAX_DISTANCE
+
+
+class OccupancyGrid:
+    """
+    Log-odds occupancy grid centered on the vehicle.
+
+    Args:
+        size (float, optional): Side length of the square window in meters. Defaults to 40.
+        resolution (float, optional): Cell size in meters. Defaults to 0.5.
+        decay (float, optional): Factor applied to all log-odds every update, so stale
+            obstacles fade out. Defaults to 0.9.
+        max_range (float, optional): Sensor range; readings at or beyond it are not hits.
+            Defaults to `SENSOR_MAX_DISTANCE`.
+    """
+
+    L_OCCUPIED = 0.85
+    L_FREE = -0.4
+    L_CLAMP = 4.0
+
+    def __init__(self, size: float = 40.0, resolution: float = 0.5, decay: float = 0.9,
+                 max_range: float = SENSOR_MAX_DISTANCE):
+        self.resolution = resolution
+        self.cells = int(round(size / resolution))
+        self.half = self.cells // 2
+        self.decay = decay
+        self.max_range = max_range
+        self.log_odds = np.zeros((self.cells, self.cells), dtype=np.float32)
+        self.center = None
+
+        self._sensor_yaw = np.deg2rad(np.array(SENSOR_YAW_DEG, dtype=float))
+        # Sample each ray at half-cell spacing, only as far as the window reaches.
+        ray_length = min(max_range, size / 2 * math.sqrt(2))
+        self._ray_steps = np.arange(0.0, ray_length, resolution / 2)
+
+    def _world_to_cell(self, points: np.ndarray) -> np.ndarray:
+        return np.floor(points / self.resolution).astype(int)
+
+    def _scroll(self, new_center: np.ndarray):
+        """Moves the window to `new_center`, clearing the cells that enter it."""
+        if self.center is None:
+            self.center = new_center
+            return
+        for axis in range(2):
+            shift = int(new_center[axis] - self.center[axis])
+            if shift == 0:
+                continue
+            if abs(shift) >= self.cells:
+                self.log_odds.fill(0)
+                break
+            if shift > 0:
+                entering = np.arange(self.center[axis] + self.half, new_center[axis] + self.half)
+            else:
+                entering = np.arange(new_center[axis] - self.half, self.center[axis] - self.half)
+            rows = entering % self.cells
+            if axis == 0:
+                self.log_odds[rows, :] = 0
+            else:
+                self.log_odds[:, rows] = 0
+        self.center = new_center
+
+    def _in_window(self, cells: np.ndarray) -> np.ndarray:
+        offset = cells - self.center
+        return ((offset >= -self.half) & (offset < self.cells - self.half)).all(axis=-1)
+
+    def update(self, position: tuple, heading: float, readings) -> None:
+        """
+        Decays the grid and projects one set of sensor readings into it.
+
+        Args:
+            position (tuple): The vehicle position (x, y) in world coordinates.
+            heading (float): The vehicle heading in degrees.
+            readings: The eight distances in `core.sensors.SENSOR_NAMES` order.
+        """
+        pos = np.asarray(position, dtype=float)
+        self._scroll(self._world_to_cell(pos))
+        self.log_odds *= self.decay
+
+        readings = np.asarray(readings, dtype=float)
+        angles = np.deg2rad(heading) + self._sensor_yaw
+        directions = np.stack((np.cos(angles), np.sin(angles)), axis=1)
+
+        # Free space: every sample strictly before the hit, on all rays at once.
+        points = pos + directions[:, None, :] * self._ray_steps[None, :, None]
+        free = self._ray_steps[None, :] < (readings[:, None] - self.resolution)
+        free_cells = self._world_to_cell(points[free])
+        free_cells = free_cells[self._in_window(free_cells)] % self.cells
+        self.log_odds[free_cells[:, 0], free_cells[:, 1]] += self.L_FREE
+
+        hit = readings < self.max_range * 0.99
+        hit_cells = self._world_to_cell(pos + directions[hit] * readings[hit, None])
+        hit_cells = hit_cells[self._in_window(hit_cells)] % self.cells
+        self.log_odds[hit_cells[:, 0], hit_cells[:, 1]] += self.L_OCCUPIED
+
+        np.clip(self.log_odds, -self.L_CLAMP, self.L_CLAMP, out=self.log_odds)
+
+    def add_obstacles(self, position: tuple, heading: float, points) -> None:
+        """
+        Marks obstacles given relative to the vehicle, e.g. detections placed on the
+        ground plane by `detection.camera_model.CameraModel`, as occupied.
+
+        Args:
+            position (tuple): The vehicle position (x, y) in world coordinates.
+            heading (float): The vehicle heading in degrees.
+            points: An (N, 2) array of body-frame points (x forward, y right) in meters.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if self.center is None or len(points) == 0:
+            return
+        yaw = math.radians(heading)
+        cos_yaw, sin_yaw = math.cos(yaw), math.sin(yaw)
+        world = np.asarray(position, dtype=float) + np.stack(
+            (points[:, 0] * cos_yaw - points[:, 1] * sin_yaw, points[:, 0] * sin_yaw + points[:, 1] * cos_yaw), axis=1)
+        cells = self._world_to_cell(world)
+        cells = cells[self._in_window(cells)] % self.cells
+        self.log_odds[cells[:, 0], cells[:, 1]] += self.L_OCCUPIED
+        np.clip(self.log_odds, -self.L_CLAMP, self.L_CLAMP, out=self.log_odds)
+
+    def window(self) -> np.ndarray:
+        """
+        Returns a copy of the log-odds in ego-centric order.
+
+        Row/column `half` holds the vehicle's cell; increasing indices follow +x/+y.
+        """
+        start = (self.center - self.half) % self.cells
+        return np.roll(self.log_odds, (-start[0], -start[1]), axis=(0, 1))
+
+    def occupancy_at(self, points) -> np.ndarray:
+        """
+        Looks up the log-odds at arbitrary world points, vectorized.
+
+        Args:
+            points: An (..., 2) array of world coordinates.
+
+        Returns:
+            np.ndarray: Log-odds per point; points outside the window read as 0 (unknown).
+        """
+        points = np.asarray(points, dtype=float)
+        result = np.zeros(points.shape[:-1], dtype=np.float32)
+        if self.center is None:
+            return result
+        cells = self._world_to_cell(points)
+        inside = self._in_window(cells)
+        wrapped = cells[inside] % self.cells
+        result[inside] = self.log_odds[wrapped[..., 0], wrapped[..., 1]]
+        return result
+
+
+def _inflate(blocked: np.ndarray, radius: int) -> np.ndarray:
+    """Dilates a boolean mask by a disk of `radius` cells."""
+    inflated = blocked.copy()
+    n, m = blocked.shape
+    for di in range(-radius, radius + 1):
+        for dj in range(-radius, radius + 1):
+            if (di == 0 and dj == 0) or di * di + dj * dj > radius * radius:
+                continue
+            inflated[max(di, 0):n + min(di, 0), max(dj, 0):m + min(dj, 0)] |= \
+                blocked[max(-di, 0):n + min(-di, 0), max(-dj, 0):m + min(-dj, 0)]
+    return inflated
+
+
+def plan_local_path(grid: OccupancyGrid, goal: tuple, inflation: float = 1.5,
+                    threshold: float = 0.5) -> list:
+    """
+    Plans a collision-free path from the vehicle to `goal` on the occupancy grid.
+
+    Goals outside the window are replaced by the point where the straight line to
+    them leaves the window. The search is 8-connected A* with an octile heuristic
+    over the inflated obstacle mask.
+
+    Args:
+        grid (OccupancyGrid): An updated occupancy grid.
+        goal (tuple): The goal position (x, y) in world coordinates.
+        inflation (float, optional): Obstacle inflation radius in meters. Defaults to 1.5.
+        threshold (float, optional): Log-odds above which a cell is blocked. Defaults to 0.5.
+
+    Returns:
+        list: World coordinates of the path cell centers, or an empty list if no path exists.
+    """
+    if grid.center is None:
+        return []
+
+    n = grid.cells
+    blocked = _inflate(grid.window() > threshold, int(math.ceil(inflation / grid.resolution)))
+    start = (grid.half, grid.half)
+    blocked[start] = False
+
+    offset = np.asarray(goal, dtype=float) / grid.resolution - grid.center
+    limit = grid.half - 1
+    scale = max(1.0, np.abs(offset).max() / limit)
+    goal_cell = tuple(np.clip(np.floor(offset / scale).astype(int) + grid.half, 0, n - 1))
+    blocked[goal_cell] = False
+
+    moves = [(-1, -1, math.sqrt(2)), (-1, 0, 1.0), (-1, 1, math.sqrt(2)), (0, -1, 1.0),
+             (0, 1, 1.0), (1, -1, math.sqrt(2)), (1, 0, 1.0), (1, 1, math.sqrt(2))]
+
+    def octile(cell):
+        dx = abs(cell[0] - goal_cell[0])
+        dy = abs(cell[1] - goal_cell[1])
+        return max(dx, dy) + (math.sqrt(2) - 1) * min(dx, dy)
+
+    g_score = {start: 0.0}
+    came_from = {start: None}
+    open_list = [(octile(start), start)]
+    closed = set()
+
+    while open_list:
+        _, current = heapq.heappop(open_list)
+        if current == goal_cell:
+            break
+        if current in closed:
+            continue
+        closed.add(current)
+        for di, dj, step in moves:
+            neighbor = (current[0] + di, current[1] + dj)
+            if not (0 <= neighbor[0] < n and 0 <= neighbor[1] < n) or blocked[neighbor]:
+                continue
+            tentative_g = g_score[current] + step
+            if tentative_g < g_score.get(neighbor, math.inf):
+                g_score[neighbor] = tentative_g
+                came_from[neighbor] = current
+                heapq.heappush(open_list, (tentative_g + octile(neighbor), neighbor))
+    else:
+        return []
+
+    cells = []
+    node = goal_cell
+    while node is not None:
+        cells.append(node)
+        node = came_from[node]
+    cells = np.array(cells[::-1]) - grid.half + grid.center
+    return [tuple(p) for p in ((cells + 0.5) * grid.resolution).tolist()]
+
+
+def local_target(grid: OccupancyGrid, position: tuple, goal: tuple, lookahead: float = 4.0) -> tuple:
+    """
+    Plans around nearby obstacles and returns the point to steer towards.
+
+    Args:
+        grid (OccupancyGrid): An updated occupancy grid.
+        position (tuple): The vehicle position (x, y).
+        goal (tuple): The point the vehicle is trying to reach.
+        lookahead (float, optional): Distance along the local path to aim at. Defaults to 4.
+
+    Returns:
+        tuple: The first local path point at least `lookahead` away from the vehicle,
+               or None if the goal cannot be reached on the grid.
+    """
+    path = plan_local_path(grid, goal)
+    if not path:
+        return None
+    points = np.array(path)
+    far = np.nonzero(np.hypot(*(points - np.asarray(position, dtype=float)).T) >= lookahead)[0]
+    return path[far[0]] if len(far) else path[-1]
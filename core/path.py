@@ -0,0 +1,144 @@
+# core/path.py
+"""
+Densified reference path for path tracking.
+
+The sparse A* waypoints are resampled at a fixed spacing and indexed by cumulative
+arc length. The closest-point search only scans a short window ahead of the last
+match, so tracking a path costs amortized O(1) per tick, and lookahead points are
+found by binary search on the arc-length table.
+"""
+
+import numpy as np
+from utils.geometry import project_to_polyline
+
+
+class DensePath:
+    """
+    A polyline resampled at (at most) `spacing` meters with cumulative arc length.
+
+    Args:
+        waypoints (list): The path as a list of (x, y) coordinates.
+        spacing (float, optional): Maximum distance between samples in meters. Defaults to 0.5.
+        search_window (float, optional): Arc length scanned ahead of the last closest
+            point per lookup, in meters. Defaults to 10.
+
+    Attributes:
+        points (np.ndarray): The (N, 2) resampled points.
+        s (np.ndarray): Cumulative arc length at each point.
+        length (float): Total path length.
+    """
+
+    def __init__(self, waypoints: list, spacing: float = 0.5, search_window: float = 10.0):
+        pts = np.asarray(waypoints, dtype=float).reshape(-1, 2)
+        if len(pts) == 0:
+            raise ValueError("Cannot build a path without waypoints")
+        # Drop repeated waypoints so every segment has a non-zero length.
+        keep = np.ones(len(pts), dtype=bool)
+        keep[1:] = np.hypot(*np.diff(pts, axis=0).T) > 1e-9
+        pts = pts[keep]
+
+        if len(pts) == 1:
+            self.points = pts
+        else:
+            seg = np.diff(pts, axis=0)
+            counts = np.ceil(np.hypot(*seg.T) / spacing).astype(int)
+            starts = np.repeat(np.arange(len(seg)), counts)
+            fractions = np.concatenate([np.arange(c) / c for c in counts])
+            self.points = np.vstack((pts[starts] + seg[starts] * fractions[:, None], pts[-1:]))
+
+        steps = np.hypot(*np.diff(self.points, axis=0).T)
+        self.s = np.concatenate(([0.0], np.cumsum(steps)))
+        self.length = float(self.s[-1])
+        self._window = max(2, int(np.ceil(search_window / spacing)))
+        self._index = 0
+
+    def reset(self):
+        """Restarts closest-point tracking from the beginning of the path."""
+        self._index = 0
+
+    def closest(self, position: tuple) -> tuple:
+        """
+        Projects `position` onto the path near the last match.
+
+        Args:
+            position (tuple): The vehicle position (x, y).
+
+        Returns:
+            tuple: (point, s) - the closest point on the path and its arc length.
+        """
+        p = np.asarray(position, dtype=float)
+        if len(self.points) == 1:
+            return self.points[0], 0.0
+
+        while True:
+            lo = max(self._index - 1, 0)
+            hi = min(self._index + self._window, len(self.points) - 1)
+            proj, segment, t, _ = project_to_polyline(p, self.points[lo:hi + 1])
+            best = int(segment[0])
+            self._index = lo + best
+            # Keep sliding while the best match sits at the far end of the window.
+            if best < hi - lo - 1 or hi == len(self.points) - 1:
+                break
+
+        s = self.s[self._index] + t[0] * (self.s[self._index + 1] - self.s[self._index])
+        return proj[0], float(s)
+
+    def point_at(self, s: float) -> np.ndarray:
+        """
+        Returns the path point at arc length `s`, clamped to the path ends.
+
+        Args:
+            s (float): Arc length along the path in meters.
+
+        Returns:
+            np.ndarray: The (x, y) point.
+        """
+        if s <= 0 or len(self.points) == 1:
+            return self.points[0]
+        if s >= self.length:
+            return self.points[-1]
+        i = int(np.searchsorted(self.s, s, side='right')) - 1
+        t = (s - self.s[i]) / (self.s[i + 1] - self.s[i])
+        return self.points[i] + t * (self.points[i + 1] - self.points[i])
+
+    def points_at(self, s: np.ndarray) -> np.ndarray:
+        """
+        Vectorized `point_at` for an array of arc lengths.
+
+        Args:
+            s (np.ndarray): Arc lengths in meters.
+
+        Returns:
+            np.ndarray: An (len(s), 2) array of points.
+        """
+        s = np.asarray(s, dtype=float)
+        if len(self.points) == 1:
+            return np.repeat(self.points, len(s), axis=0)
+        return np.stack((np.interp(s, self.s, self.points[:, 0]),
+                         np.interp(s, self.s, self.points[:, 1])), axis=1)
+
+    def lookahead(self, position: tuple, speed: float, gain: float = 0.6,
+                  min_distance: float = 4.0, max_distance: float = 15.0) -> tuple:
+        """
+        Finds the pure pursuit target point for the current position and speed.
+
+        The lookahead distance is `gain * speed`, clamped to [min_distance, max_distance].
+
+        Args:
+            position (tuple): The vehicle position (x, y).
+            speed (float): The vehicle speed in m/s.
+            gain (float, optional): Lookahead time in seconds. Defaults to 0.6.
+            min_distance (float, optional): Minimum lookahead in meters. Defaults to 4.
+            max_distance (float, optional): Maximum lookahead in meters. Defaults to 15.
+
+        Returns:
+            tuple: (target, s, ld) - the target point, the arc length of the closest point,
+                   and the lookahead distance used.
+        """
+        ld = min(max(gain * abs(speed), min_distance), max_distance)
+        _, s = self.closest(position)
+        return self.point_at(s + ld), s, ld
+
+    def remaining(self, s: float) -> float:
+        """Returns the path length left after arc length `s`."""
+        return self.length - s
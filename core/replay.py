@@ -0,0 +1,113 @@
+# core/replay.py
+"""
+Re-runs the control loop offline over a recorded session.
+
+The vehicle is driven by a `ReplayClient`, so `control_vehicle` and the perception
+pipeline see exactly the states, sensor readings and frames of the recorded
+drive. The commands it issues are compared with the recorded ones, and the run
+can be profiled with cProfile.
+
+Sessions are recorded with `core.main.main(record="sessions/drive1")`.
+
+Usage:
+    python core/replay.py sessions/drive1 [--controller mpc] [--profile replay.prof] [--trace trace.json]
+"""
+
+import sys
+from pathlib import Path
+
+current_directory = Path(__file__).resolve().parent
+parent_directory = current_directory.parent
+sys.path.append(str(parent_directory))
+
+import argparse
+import cProfile
+import logging
+import pstats
+
+import airsim
+import numpy as np
+from core.control import control_vehicle
+from utils.recording import Recording, ReplayClient, ReplayFinished
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+
+def replay_session(session: str, controller: str = 'pure_pursuit', vehicle_name: str = None) -> dict:
+    """
+    Drives `control_vehicle` with a recorded session until the recording runs out.
+
+    The loop runs on the recorded state times and MPC seed, so its commands match the
+    recorded ones except on ticks where the live safety watchdog overrode them.
+
+    Args:
+        session (str): The session directory.
+        controller (str, optional): Controller to re-run. Defaults to 'pure_pursuit'.
+        vehicle_name (str, optional): The recorded vehicle name. Defaults to the first
+            vehicle of the control stream.
+
+    Returns:
+        dict: 'ticks' replayed, 'finished' (whether the loop ended by itself rather than
+              by running out of recorded input), the loop's own statistics when it
+              finished, and 'max_control_diff' between re-issued and recorded throttle,
+              steering and brake.
+    """
+    recording = Recording(session)
+    path = [tuple(p) for p in recording.meta.get('path', [])]
+    if not path:
+        raise ValueError(f"Session '{session}' has no recorded path")
+    if vehicle_name is None:
+        states = recording.tables['states']
+        control = recording.name_id('control')
+        vehicles = states['vehicle'][states['source'] == control]
+        vehicle_name = recording.names[vehicles[0]] if len(vehicles) else ''
+
+    client = ReplayClient(recording)
+    result = {'finished': False}
+    try:
+        result.update(control_vehicle(client, airsim.CarControls(), path, controller=controller,
+                                      vehicle_name=vehicle_name, clock=client.clock, mpc_seed=client.mpc_seed))
+        result['finished'] = True
+    except ReplayFinished as e:
+        logger.info("Replay ended: %s", e)
+
+    controls = recording.tables['controls']
+    mask = (controls['source'] == recording.name_id('control')) & \
+           (controls['vehicle'] == recording.name_id(vehicle_name))
+    recorded = np.stack([controls['throttle'][mask], controls['steering'][mask], controls['brake'][mask]], axis=1)
+    issued = np.array([c[1:] for c in client.issued_controls if c[0] == vehicle_name], dtype=float).reshape(-1, 3)
+    n = min(len(recorded), len(issued))
+    result['replayed_commands'] = len(issued)
+    result['max_control_diff'] = float(np.abs(recorded[:n] - issued[:n]).max()) if n else 0.0
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run the control loop over a recorded session.")
+    parser.add_argument("session", help="Session directory written by a recording run")
+    parser.add_argument("--controller", default="pure_pursuit", choices=("pure_pursuit", "mpc"))
+    parser.add_argument("--vehicle", help="Recorded vehicle name (default: the first one)")
+    parser.add_argument("--profile", help="Write cProfile statistics to this file and print the top entries")
+    parser.add_argument("--trace", help="Write a Chrome trace of the replayed spans to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    if args.trace:
+        tracing.enable()
+    result = replay_session(args.session, args.controller, args.vehicle)
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+    if args.trace:
+        tracing.disable()
+        tracing.export_chrome_trace(args.trace)
+    print(result)
+
+
+if __name__ == "__main__":
+    main()
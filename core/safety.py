@@ -0,0 +1,169 @@
+# core/safety.py
+"""
+Emergency braking watchdog that runs independently of the control loop.
+
+The watchdog polls the front and rear distance sensors at a high rate on its own
+AirSim connection, estimates time-to-collision from the recent range history and
+the vehicle speed, and sends a full brake directly to the simulator when a
+collision is imminent. While it is engaged, the control loop must pass its
+commands through `SafetyWatchdog.filter` so it cannot drive back into the obstacle.
+"""
+
+import threading
+import time
+import logging
+import numpy as np
+import airsim
+from core.sensors import SENSOR_MAX_DISTANCE
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class SafetyWatchdog:
+    """
+    Background thread issuing emergency brakes based on time-to-collision.
+
+    Args:
+        client: A dedicated AirSim CarClient. The RPC client is not thread-safe, so
+            this must not be the client used by the control loop.
+        vehicle_name (str, optional): The vehicle to protect. Defaults to 'Car1'.
+        rate_hz (float, optional): Polling rate. Defaults to 100.
+        ttc_threshold (float, optional): Brake when the time-to-collision drops below
+            this many seconds. Defaults to 1.0.
+        min_distance (float, optional): Brake whenever the obstacle is closer than this,
+            in meters. Defaults to 1.0.
+        release_time (float, optional): How long the path must stay clear before the
+            brake is released, in seconds. Defaults to 0.5.
+        history (int, optional): Number of range samples used to estimate the closing
+            speed. Defaults to 8.
+    """
+
+    def __init__(self, client, vehicle_name: str = 'Car1', rate_hz: float = 100.0, ttc_threshold: float = 1.0,
+                 min_distance: float = 1.0, release_time: float = 0.5, history: int = 8):
+        self.client = client
+        self.vehicle_name = vehicle_name
+        self.period = 1.0 / rate_hz
+        self.ttc_threshold = ttc_threshold
+        self.min_distance = min_distance
+        self.release_time = release_time
+
+        self.engaged = threading.Event()
+        self.engaged_direction = None
+        self.brake_count = 0
+        self.last_ttc = float('inf')
+
+        # Per direction: ring buffer of (timestamp, range) samples.
+        self._history = {'front': np.zeros((history, 2)), 'rear': np.zeros((history, 2))}
+        self._filled = {'front': 0, 'rear': 0}
+        self._head = {'front': 0, 'rear': 0}
+        self._clear_since = None
+        self._brake_controls = airsim.CarControls(throttle=0, brake=1)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts the watchdog thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='safety-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """Stops the watchdog thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def filter(self, car_controls) -> bool:
+        """
+        Overrides a command that would drive towards the obstacle that engaged the brake.
+
+        Args:
+            car_controls: The car controls object about to be sent; modified in place.
+
+        Returns:
+            bool: True if the command was overridden.
+        """
+        if not self.engaged.is_set():
+            return False
+        reversing = car_controls.is_manual_gear and car_controls.manual_gear < 0
+        if (self.engaged_direction == 'rear') != reversing:
+            return False
+        car_controls.throttle = 0
+        car_controls.brake = 1
+        return True
+
+    def _record(self, direction: str, timestamp: float, distance: float):
+        buf = self._history[direction]
+        buf[self._head[direction]] = (timestamp, distance)
+        self._head[direction] = (self._head[direction] + 1) % len(buf)
+        self._filled[direction] = min(self._filled[direction] + 1, len(buf))
+
+    def _closing_speed(self, direction: str, speed: float) -> float:
+        """Estimates how fast the obstacle approaches, from the range history when possible."""
+        n = self._filled[direction]
+        buf = self._history[direction][:n]
+        valid = buf[:, 1] < SENSOR_MAX_DISTANCE * 0.99
+        if valid.sum() >= 3:
+            t = buf[valid, 0]
+            d = buf[valid, 1]
+            t = t - t.mean()
+            denom = (t * t).sum()
+            if denom > 0:
+                # Least-squares slope of range over time; negative means closing in.
+                return max(-float((t * (d - d.mean())).sum() / denom), 0.0)
+        return abs(speed)
+
+    @tracing.traced("watchdog")
+    def check(self) -> float:
+        """
+        Polls the sensors once and brakes if needed.
+
+        Returns:
+            float: The time-to-collision in the current driving direction, in seconds.
+        """
+        now = time.monotonic()
+        state = self.client.getCarState(self.vehicle_name)
+        front = self.client.getDistanceSensorData(distance_sensor_name='FrontDistance', vehicle_name=self.vehicle_name).distance
+        rear = self.client.getDistanceSensorData(distance_sensor_name='RearDistance', vehicle_name=self.vehicle_name).distance
+        self._record('front', now, front)
+        self._record('rear', now, rear)
+
+        direction = 'rear' if state.gear < 0 else 'front'
+        distance = rear if direction == 'rear' else front
+        closing = self._closing_speed(direction, state.speed)
+        ttc = distance / closing if closing > 1e-3 else float('inf')
+        self.last_ttc = ttc
+
+        if distance < self.min_distance or ttc < self.ttc_threshold:
+            self._clear_since = None
+            if not self.engaged.is_set():
+                self.client.setCarControls(self._brake_controls, self.vehicle_name)
+                self.engaged_direction = direction
+                self.engaged.set()
+                self.brake_count += 1
+                logger.warning("Emergency brake: %s obstacle at %.2f m, TTC %.2f s", direction, distance, ttc)
+        elif self.engaged.is_set():
+            if self._clear_since is None:
+                self._clear_since = now
+            elif now - self._clear_since >= self.release_time:
+                self.engaged.clear()
+                self.engaged_direction = None
+                self._clear_since = None
+                logger.info("Emergency brake released")
+        return ttc
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                logger.error("Safety watchdog poll failed: %s", e)
+            next_tick += self.period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_tick = time.monotonic()
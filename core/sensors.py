@@ -1,11 +1,40 @@
 # core/sensors.py
+import time
 
-def get_distance_sensors(client) -> tuple:
+from utils import tracing
+from utils.metrics import default_registry
+
+# Sensor names in the order returned by `get_distance_sensors`.
+SENSOR_NAMES = (
+    'FrontDistance',
+    'FrontLeftDistance',
+    'FrontRightDistance',
+    'RearDistance',
+    'RearLeftDistance',
+    'RearRightDistance',
+    'LeftDistance',
+    'RightDistance',
+)
+
+# Mounting yaw of each sensor relative to the vehicle's forward axis, in degrees.
+# AirSim uses NED coordinates, so positive yaw points to the right (+y).
+SENSOR_YAW_DEG = (0, -45, 45, 180, -135, 135, -90, 90)
+
+# AirSim's default DistanceSensor MaxDistance, in meters. Readings at this range mean "no hit".
+SENSOR_MAX_DISTANCE = 40.0
+
+_read_seconds = default_registry().histogram('airsim_sensor_read_seconds',
+                                             'Time to read all distance sensors of a vehicle')
+
+
+@tracing.traced("get_distance_sensors")
+def get_distance_sensors(client, vehicle_name: str = 'Car1') -> tuple:
     """
     Retrieves distance sensor data from the client for various sensor positions.
 
     Args:
         client: The client object used to communicate with the vehicle.
+        vehicle_name (str, optional): The vehicle to read the sensors of. Defaults to 'Car1'.
 
     Returns:
         A tuple containing the distance sensor data for the following positions:
@@ -18,12 +47,10 @@ def get_distance_sensors(client) -> tuple:
         - left_distance: Distance from the left sensor.
         - right_distance: Distance from the right sensor.
     """
-    front_distance = client.getDistanceSensorData(vehicle_name='Car1', distance_sensor_name='FrontDistance').distance
-    front_left_distance = client.getDistanceSensorData(vehicle_name='Car1', distance_sensor_name='FrontLeftDistance').distance
-    front_right_distance = client.getDistanceSensorData(vehicle_name='Car1', distance_sensor_name='FrontRightDistance').distance
-    rear_distance = client.getDistanceSensorData(vehicle_name='Car1', distance_sensor_name='RearDistance').distance
-    rear_left_distance = client.getDistanceSensorData(vehicle_name='Car1', distance_sensor_name='RearLeftDistance').distance
-    rear_right_distance = client.getDistanceSensorData(vehicle_name='Car1', distance_sensor_name='RearRightDistance').distance
-    left_distance = client.getDistanceSensorData(vehicle_name='Car1', distance_sensor_name='LeftDistance').distance
-    right_distance = client.getDistanceSensorData(vehicle_name='Car1', distance_sensor_name='RightDistance').distance
-    return front_distance, front_left_distance, front_right_distance, rear_distance, rear_left_distance, rear_right_distance, left_distance, right_distance
+    start = time.perf_counter()
+    readings = tuple(
+        client.getDistanceSensorData(vehicle_name=vehicle_name, distance_sensor_name=name).distance
+        for name in SENSOR_NAMES
+    )
+    _read_seconds.observe(time.perf_counter() - start)
+    return readings
@@ -0,0 +1,178 @@
+# core/speed_profile.py
+"""
+Curvature-aware speed planning and closed-loop speed tracking.
+
+A `SpeedProfile` assigns a target speed to every sample of a `DensePath`: the
+curvature caps the speed through the lateral acceleration limit, then a forward
+pass (acceleration limit) and a backward pass (braking limit) make the profile
+drivable. A `SpeedController` turns the target speed into throttle and brake.
+"""
+
+import math
+import time
+import numpy as np
+from core.path import DensePath
+
+
+def path_curvature(points: np.ndarray, stencil: int = 1) -> np.ndarray:
+    """
+    Computes the unsigned curvature at every point of a polyline.
+
+    The curvature is the Menger curvature of each point and its neighbors `stencil`
+    samples away on either side, so a wider stencil smooths out sharp corners.
+
+    Args:
+        points (np.ndarray): An (N, 2) array of points.
+        stencil (int, optional): Neighbor offset in samples. Defaults to 1.
+
+    Returns:
+        np.ndarray: Curvature (1/m) per point; 0 on straight sections and path ends.
+    """
+    n = len(points)
+    if n < 3:
+        return np.zeros(n)
+    idx = np.arange(n)
+    a = points[np.clip(idx - stencil, 0, n - 1)]
+    b = points
+    c = points[np.clip(idx + stencil, 0, n - 1)]
+    ab = np.hypot(*(b - a).T)
+    bc = np.hypot(*(c - b).T)
+    ca = np.hypot(*(a - c).T)
+    cross = (b - a)[:, 0] * (c - a)[:, 1] - (b - a)[:, 1] * (c - a)[:, 0]
+    denom = ab * bc * ca
+    curvature = np.zeros(n)
+    valid = denom > 1e-12
+    curvature[valid] = 2.0 * np.abs(cross[valid]) / denom[valid]
+    return curvature
+
+
+class SpeedProfile:
+    """
+    Target speeds along a `DensePath` under lateral and longitudinal acceleration limits.
+
+    Args:
+        path (DensePath): The path to plan speeds for.
+        max_speed (float, optional): Speed limit in m/s. Defaults to 10.
+        min_speed (float, optional): Floor for the target speed in m/s, so the car
+            still pulls away from standstill. Defaults to 1.5.
+        max_lateral_accel (float, optional): Lateral acceleration limit in m/s^2. Defaults to 3.
+        max_accel (float, optional): Longitudinal acceleration limit in m/s^2. Defaults to 2.
+        max_decel (float, optional): Braking limit in m/s^2. Defaults to 3.
+        curvature_span (float, optional): Stencil half-width for the curvature, in meters.
+            Defaults to 4.
+
+    Attributes:
+        s (np.ndarray): Arc length of every path sample.
+        curvature (np.ndarray): Curvature of every path sample.
+        speeds (np.ndarray): Target speed at every path sample.
+    """
+
+    def __init__(self, path: DensePath, max_speed: float = 10.0, min_speed: float = 1.5,
+                 max_lateral_accel: float = 3.0, max_accel: float = 2.0, max_decel: float = 3.0,
+                 curvature_span: float = 4.0):
+        self.s = path.s
+        spacing = path.length / max(len(path.s) - 1, 1)
+        stencil = max(1, int(round(curvature_span / spacing))) if spacing > 0 else 1
+        self.curvature = path_curvature(path.points, stencil)
+
+        limit = np.full(len(self.s), max_speed)
+        curved = self.curvature > 1e-9
+        limit[curved] = np.minimum(max_speed, np.sqrt(max_lateral_accel / self.curvature[curved]))
+        limit[0] = 0.0
+        limit[-1] = 0.0
+
+        # v^2 grows at most by 2*a*ds between samples; both passes are sequential by nature.
+        ds = np.diff(self.s).tolist()
+        v2 = (limit ** 2).tolist()
+        for i in range(1, len(v2)):
+            v2[i] = min(v2[i], v2[i - 1] + 2.0 * max_accel * ds[i - 1])
+        for i in range(len(v2) - 2, -1, -1):
+            v2[i] = min(v2[i], v2[i + 1] + 2.0 * max_decel * ds[i])
+
+        self.speeds = np.maximum(np.sqrt(v2), min_speed)
+
+    def at(self, s: float) -> float:
+        """
+        Returns the target speed at arc length `s`.
+
+        Args:
+            s (float): Arc length along the path in meters.
+
+        Returns:
+            float: The target speed in m/s.
+        """
+        return float(np.interp(s, self.s, self.speeds))
+
+
+def stopping_speed(distance: float, max_decel: float = 3.0, margin: float = 3.0) -> float:
+    """
+    Returns the highest speed from which the car can still stop `margin` meters short
+    of an obstacle `distance` meters ahead.
+
+    Args:
+        distance (float): Range to the obstacle in meters; infinite if there is none.
+        max_decel (float, optional): Braking limit in m/s^2. Defaults to 3.
+        margin (float, optional): Gap to keep to the obstacle, in meters. Defaults to 3.
+
+    Returns:
+        float: The speed limit in m/s; 0 inside the margin.
+    """
+    return math.sqrt(2.0 * max_decel * max(distance - margin, 0.0))
+
+
+class SpeedController:
+    """
+    PI speed controller with throttle feedforward and a braking band.
+
+    Args:
+        kp (float, optional): Proportional gain (throttle per m/s of error). Defaults to 0.25.
+        ki (float, optional): Integral gain. Defaults to 0.05.
+        feedforward (float, optional): Throttle per m/s of target speed. Defaults to 0.05.
+        brake_gain (float, optional): Brake per m/s of overspeed beyond the band. Defaults to 0.3.
+        brake_band (float, optional): Overspeed tolerated before braking, in m/s. Defaults to 1.
+        max_throttle (float, optional): Throttle ceiling. Defaults to 1.
+    """
+
+    def __init__(self, kp: float = 0.25, ki: float = 0.05, feedforward: float = 0.05,
+                 brake_gain: float = 0.3, brake_band: float = 1.0, max_throttle: float = 1.0):
+        self.kp = kp
+        self.ki = ki
+        self.feedforward = feedforward
+        self.brake_gain = brake_gain
+        self.brake_band = brake_band
+        self.max_throttle = max_throttle
+        self.reset()
+
+    def reset(self):
+        """Clears the integral term, e.g. after a manual manoeuvre."""
+        self.integral = 0.0
+        self._last_time = None
+
+    def update(self, target_speed: float, current_speed: float, now: float = None) -> tuple:
+        """
+        Computes the throttle and brake commands for one control tick.
+
+        Args:
+            target_speed (float): The desired speed in m/s.
+            current_speed (float): The measured speed in m/s.
+            now (float, optional): Time of the tick in seconds; the integral step is the
+                difference to the previous tick. Defaults to `time.monotonic()`.
+
+        Returns:
+            tuple: (throttle, brake), both in [0, 1].
+        """
+        if now is None:
+            now = time.monotonic()
+        dt = 0.0 if self._last_time is None else min(now - self._last_time, 0.5)
+        self._last_time = now
+
+        error = target_speed - current_speed
+        if error < -self.brake_band:
+            self.integral = 0.0
+            return 0.0, min(1.0, self.brake_gain * (-error - self.brake_band))
+
+        throttle = self.feedforward * target_speed + self.kp * error + self.ki * self.integral
+        # Only integrate while the output is not saturated (anti-windup).
+        if 0.0 < throttle < self.max_throttle:
+            self.integral += error * dt
+        return min(max(throttle, 0.0), self.max_throttle), 0.0
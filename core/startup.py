@@ -0,0 +1,120 @@
+# core/startup.py
+"""
+Startup timing and parallel initialization for `core.main`.
+
+Startup is dominated by three independent jobs: loading the YOLO model (which
+imports ultralytics and torch), connecting to and validating the simulator, and
+planning the route. `run_parallel` runs them on threads, which overlap well since
+most of the time is spent in file and network I/O and in extension code.
+
+`StartupProfile` records when each phase started and ended and on which thread,
+relative to the moment `core/main.py` began importing, plus point events such as
+the first control command, and formats them as a report.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+FIRST_COMMAND = 'first control command'
+
+
+class StartupProfile:
+    """
+    Collects startup phase timings.
+
+    Args:
+        origin (float, optional): `time.perf_counter()` value that times are measured
+            from. Defaults to now.
+    """
+
+    def __init__(self, origin: float = None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.phases = []
+        self.marks = {}
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def phase(self, name: str):
+        """Context manager timing the enclosed block as phase `name`."""
+        return _Phase(self, name)
+
+    def add_phase(self, name: str, start: float, end: float) -> None:
+        with self._lock:
+            self.phases.append((name, threading.current_thread().name, start - self.origin, end - self.origin))
+
+    def mark(self, name: str) -> None:
+        """Records the first occurrence of the point event `name`."""
+        with self._lock:
+            if name in self.marks:
+                return
+            self.marks[name] = time.perf_counter() - self.origin
+            event = self._events.get(name)
+        if event is not None:
+            event.set()
+
+    def wait(self, name: str, timeout: float = None) -> bool:
+        """Blocks until `mark(name)` has been called; returns False on timeout."""
+        with self._lock:
+            if name in self.marks:
+                return True
+            event = self._events.setdefault(name, threading.Event())
+        return event.wait(timeout)
+
+    def report(self) -> str:
+        """Returns the phases and marks as a table, in seconds since the origin."""
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p[2])
+            marks = sorted(self.marks.items(), key=lambda m: m[1])
+        lines = [f"{'phase':<28} {'thread':<22} {'start':>7} {'end':>7} {'took':>7}"]
+        for name, thread, start, end in phases:
+            lines.append(f"{name:<28} {thread:<22} {start:7.3f} {end:7.3f} {end - start:7.3f}")
+        if phases:
+            busy = sum(end - start for _, _, start, end in phases)
+            span = max(end for *_, end in phases) - min(start for _, _, start, _ in phases)
+            lines.append(f"{'sum of phases':<28} {'':<22} {'':>7} {'':>7} {busy:7.3f}")
+            lines.append(f"{'wall clock':<28} {'':<22} {'':>7} {'':>7} {span:7.3f}")
+        for name, at in marks:
+            lines.append(f"{name:<28} {'':<22} {'':>7} {at:7.3f}")
+        return '\n'.join(lines)
+
+
+class _Phase:
+    __slots__ = ('profile', 'name', 'start')
+
+    def __init__(self, profile: StartupProfile, name: str):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profile.add_phase(self.name, self.start, time.perf_counter())
+        return False
+
+
+def run_parallel(tasks: dict, profile: StartupProfile = None) -> dict:
+    """
+    Runs independent initialization tasks concurrently.
+
+    Args:
+        tasks (dict): Phase name -> zero-argument callable.
+        profile (StartupProfile, optional): Receives one phase per task.
+
+    Returns:
+        dict: Phase name -> the callable's return value.
+
+    Raises:
+        Exception: The first task failure, after all tasks have finished.
+    """
+    def timed(name, fn):
+        if profile is None:
+            return fn()
+        with profile.phase(name):
+            return fn()
+
+    with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix='startup') as pool:
+        futures = {name: pool.submit(timed, name, fn) for name, fn in tasks.items()}
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,39 @@
+# core/vehicle.py
+"""
+Vehicle geometry and the kinematic bicycle model shared by the controllers.
+"""
+
+import numpy as np
+
+# Distance between the front and rear axles of the simulated car, in meters.
+WHEELBASE = 2.5
+
+# Steering angle limit, in degrees.
+MAX_STEERING_DEG = 30.0
+
+
+def bicycle_step(x, y, yaw, v, steering, accel, dt: float, wheelbase: float = WHEELBASE) -> tuple:
+    """
+    Advances a kinematic bicycle model by one time step.
+
+    All state and control arguments may be scalars or NumPy arrays of the same
+    shape, so many candidate trajectories can be rolled out at once.
+
+    Args:
+        x: X position in meters.
+        y: Y position in meters.
+        yaw: Heading in radians (NED: positive turns towards +y).
+        v: Speed in m/s.
+        steering: Front wheel angle in radians.
+        accel: Longitudinal acceleration in m/s^2.
+        dt (float): Time step in seconds.
+        wheelbase (float, optional): Axle distance in meters. Defaults to `WHEELBASE`.
+
+    Returns:
+        tuple: The next (x, y, yaw, v); speed does not go below zero.
+    """
+    x = x + v * np.cos(yaw) * dt
+    y = y + v * np.sin(yaw) * dt
+    yaw = yaw + v / wheelbase * np.tan(steering) * dt
+    v = np.maximum(v + accel * dt, 0.0)
+    return x, y, yaw, v
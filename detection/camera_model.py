@@ -0,0 +1,168 @@
+# detection/camera_model.py
+"""
+Pinhole camera model for placing detections on the ground plane.
+
+The model is built from the camera entry of an AirSim settings file: the image
+size and horizontal FOV give the intrinsics, and the mount offset and angles
+give the extrinsics in the vehicle body frame (NED: x forward, y right, z down).
+A unit ray in the body frame is precomputed for every pixel, so locating all
+detections of a frame is one table lookup and one ray/ground intersection.
+"""
+
+import json
+import math
+
+import numpy as np
+
+_camera_models = {}
+
+
+def _rotation(roll: float, pitch: float, yaw: float) -> np.ndarray:
+    """Body-from-camera rotation for AirSim angles in degrees (positive pitch looks up)."""
+    r, p, y = np.radians((roll, pitch, yaw))
+    rx = np.array([[1, 0, 0], [0, math.cos(r), -math.sin(r)], [0, math.sin(r), math.cos(r)]])
+    ry = np.array([[math.cos(p), 0, math.sin(p)], [0, 1, 0], [-math.sin(p), 0, math.cos(p)]])
+    rz = np.array([[math.cos(y), -math.sin(y), 0], [math.sin(y), math.cos(y), 0], [0, 0, 1]])
+    return rz @ ry @ rx
+
+
+class CameraModel:
+    """
+    Intrinsics, extrinsics and per-pixel ray table of one vehicle camera.
+
+    Args:
+        width (int): Image width in pixels.
+        height (int): Image height in pixels.
+        fov_deg (float): Horizontal field of view in degrees.
+        mount (tuple, optional): Camera position (x, y, z) in the body frame, meters.
+            Defaults to (0, 0, 0).
+        angles (tuple, optional): Camera (roll, pitch, yaw) in degrees. Defaults to (0, 0, 0).
+        origin_height (float, optional): Height of the vehicle body origin above the
+            road, meters. Defaults to 0.5.
+    """
+
+    def __init__(self, width: int, height: int, fov_deg: float, mount: tuple = (0.0, 0.0, 0.0),
+                 angles: tuple = (0.0, 0.0, 0.0), origin_height: float = 0.5):
+        self.width = width
+        self.height = height
+        self.fx = self.fy = (width / 2.0) / math.tan(math.radians(fov_deg) / 2.0)
+        self.cx = width / 2.0
+        self.cy = height / 2.0
+        self.position = np.asarray(mount, dtype=float)
+        self.rotation = _rotation(*angles)
+        self.ground_z = origin_height  # The road plane, z down in the body frame.
+
+        # Camera axes follow the body frame convention: x along the optical axis,
+        # y to the image right, z to the image bottom.
+        u = (np.arange(width) + 0.5 - self.cx) / self.fx
+        v = (np.arange(height) + 0.5 - self.cy) / self.fy
+        rays = np.empty((height, width, 3), dtype=np.float32)
+        rays[..., 0] = 1.0
+        rays[..., 1] = u[None, :]
+        rays[..., 2] = v[:, None]
+        rays /= np.linalg.norm(rays, axis=2, keepdims=True)
+        self.rays = rays @ self.rotation.T.astype(np.float32)
+
+    @classmethod
+    def from_settings(cls, settings_path: str, vehicle_name: str = None, camera: str = "0",
+                      origin_height: float = 0.5) -> "CameraModel":
+        """
+        Builds the model of a camera defined in an AirSim settings file.
+
+        The Scene capture settings of the camera are used, falling back to
+        `CameraDefaults` for anything the camera does not set.
+
+        Args:
+            settings_path (str): Path to the settings JSON.
+            vehicle_name (str, optional): Vehicle owning the camera. Defaults to the first vehicle.
+            camera (str, optional): Camera name. Defaults to "0".
+            origin_height (float, optional): See `CameraModel`. Defaults to 0.5.
+
+        Returns:
+            CameraModel: The camera model.
+        """
+        with open(settings_path) as f:
+            settings = json.load(f)
+        vehicles = settings.get("Vehicles", {})
+        vehicle = vehicles.get(vehicle_name) if vehicle_name else next(iter(vehicles.values()), {})
+        camera_settings = (vehicle or {}).get("Cameras", {}).get(camera, {})
+
+        capture = {"Width": 256, "Height": 144, "FOV_Degrees": 90}
+        for source in (settings.get("CameraDefaults", {}), camera_settings):
+            for entry in source.get("CaptureSettings", []):
+                if entry.get("ImageType", 0) == 0:
+                    capture.update(entry)
+
+        mount = tuple(camera_settings.get(k, 0.0) for k in ("X", "Y", "Z"))
+        angles = tuple(camera_settings.get(k, 0.0) for k in ("Roll", "Pitch", "Yaw"))
+        return cls(capture["Width"], capture["Height"], capture["FOV_Degrees"], mount, angles, origin_height)
+
+    def boxes_to_ground(self, boxes, image_shape: tuple = None) -> tuple:
+        """
+        Places boxes on the road plane through the bottom center of each box.
+
+        Args:
+            boxes: (N, 4) boxes as (x1, y1, x2, y2) in pixels.
+            image_shape (tuple, optional): Shape of the frame the boxes refer to, if it
+                differs from the camera resolution. Defaults to None.
+
+        Returns:
+            tuple: (positions, distances, bearings) - (N, 2) body-frame (x forward, y right)
+                   positions in meters, distances from the body origin in meters and
+                   bearings in radians (positive to the right). Boxes whose contact
+                   point is at or above the horizon are NaN.
+        """
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        scale_x = scale_y = 1.0
+        if image_shape is not None:
+            scale_x = self.width / image_shape[1]
+            scale_y = self.height / image_shape[0]
+        cols = np.clip(((boxes[:, 0] + boxes[:, 2]) * 0.5 * scale_x).astype(int), 0, self.width - 1)
+        rows = np.clip((boxes[:, 3] * scale_y).astype(int), 0, self.height - 1)
+
+        rays = self.rays[rows, cols].astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (self.ground_z - self.position[2]) / rays[:, 2]
+        t[~(rays[:, 2] > 1e-6)] = np.nan
+        points = self.position[:2] + rays[:, :2] * t[:, None]
+        return points, np.hypot(points[:, 0], points[:, 1]), np.arctan2(points[:, 1], points[:, 0])
+
+    def locate(self, detections: list, image_shape: tuple = None) -> list:
+        """
+        Adds 'position' (x forward, y right), 'distance' and 'bearing' to every detection
+        dict in place; None where the box does not touch the ground.
+
+        Args:
+            detections (list): Detection dicts as returned by `parse_results`.
+            image_shape (tuple, optional): Shape of the frame the boxes refer to.
+
+        Returns:
+            list: The same detections.
+        """
+        if not detections:
+            return detections
+        points, dists, bearings = self.boxes_to_ground([d['box'] for d in detections], image_shape)
+        for detection, point, dist, bearing in zip(detections, points.tolist(), dists.tolist(), bearings.tolist()):
+            valid = not math.isnan(dist)
+            detection['position'] = tuple(point) if valid else None
+            detection['distance'] = dist if valid else None
+            detection['bearing'] = bearing if valid else None
+        return detections
+
+
+def load_camera_model(settings_path: str, vehicle_name: str = None, camera: str = "0") -> CameraModel:
+    """
+    Returns the camera model for a settings file, building it only once per process.
+
+    Args:
+        settings_path (str): Path to the settings JSON.
+        vehicle_name (str, optional): Vehicle owning the camera. Defaults to the first vehicle.
+        camera (str, optional): Camera name. Defaults to "0".
+
+    Returns:
+        CameraModel: The cached camera model.
+    """
+    key = (settings_path, vehicle_name, camera)
+    if key not in _camera_models:
+        _camera_models[key] = CameraModel.from_settings(settings_path, vehicle_name, camera)
+    return _camera_models[key]
@@ -0,0 +1,258 @@
+# detection/dataset_export.py
+"""
+Harvests camera frames and their detections into a YOLO-format training set.
+
+`DatasetExporter.offer` is called from the control loop with every frame. It only
+decides, cheaply and synchronously, whether a frame is worth keeping: a sampling
+policy picks candidate frames, and a 64-bit difference hash (dHash) of each
+candidate is compared with the recently exported ones so near-identical frames,
+e.g. while the car is waiting, are skipped. Kept frames are copied and queued for
+a small pool of writer threads that encode the image and write the label file;
+when the queue is full the frame is dropped rather than stalling the caller.
+
+Layout, sharded so no directory grows past `shard_size` files:
+
+    root/images/000/00000000.jpg
+    root/labels/000/00000000.txt    # class x_center y_center width height, normalized
+    root/data.yaml                  # written on close
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+
+import cv2
+import numpy as np
+
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ('every', 'low_confidence', 'new_classes')
+
+
+def dhash(img: np.ndarray, size: int = 8) -> int:
+    """
+    Computes the difference hash of an image.
+
+    The image is shrunk to (size + 1) x size grayscale pixels and every bit records
+    whether a pixel is brighter than its right neighbour, so the hash survives
+    resizing, recompression and small exposure changes.
+
+    Args:
+        img (np.ndarray): A BGR or grayscale image.
+        size (int, optional): Hash side; the hash has size * size bits. Defaults to 8.
+
+    Returns:
+        int: The hash.
+    """
+    # Striding first makes the area resize ~4x cheaper; the hash only needs coarse structure.
+    step = max(1, min(img.shape[0], img.shape[1]) // (size * 16))
+    small = cv2.resize(img[::step, ::step], (size + 1, size), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def yolo_labels(detections: list, image_shape: tuple) -> str:
+    """
+    Formats detections as the lines of a YOLO label file.
+
+    Args:
+        detections (list): Detection dicts with 'box' (x1, y1, x2, y2) in pixels and 'class_id'.
+        image_shape (tuple): Shape of the frame the boxes refer to.
+
+    Returns:
+        str: One "class x_center y_center width height" line per detection, normalized to [0, 1].
+    """
+    if not detections:
+        return ''
+    height, width = image_shape[:2]
+    boxes = np.array([d['box'] for d in detections], dtype=float).reshape(-1, 4)
+    boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, width) / width
+    boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, height) / height
+    centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+    sizes = boxes[:, 2:] - boxes[:, :2]
+    return ''.join(
+        f"{d['class_id']} {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}\n"
+        for d, (cx, cy), (w, h) in zip(detections, centers, sizes)
+        if w > 0 and h > 0
+    )
+
+
+class DatasetExporter:
+    """
+    Samples, deduplicates and asynchronously writes frames with YOLO labels.
+
+    A frame is a candidate if any of the selected policies accepts it:
+
+    - 'every': every `every`-th offered frame.
+    - 'low_confidence': some detection is below `confidence_threshold`, i.e. the
+      frames the current model is least sure about.
+    - 'new_classes': some detection has a class that has not been exported yet.
+
+    Args:
+        root (str): Dataset directory.
+        policies (tuple, optional): Sampling policies from `POLICIES`. Defaults to ('every',).
+        every (int, optional): Interval of the 'every' policy. Defaults to 10.
+        confidence_threshold (float, optional): Threshold of the 'low_confidence' policy. Defaults to 0.5.
+        hash_distance (int, optional): Candidates within this many dHash bits of a recently
+            exported frame are skipped as duplicates; negative disables deduplication. Defaults to 6.
+        hash_window (int, optional): Number of recent hashes compared against. Defaults to 256.
+        workers (int, optional): Writer threads. Defaults to 2.
+        max_pending (int, optional): Frames allowed to wait for a writer. Defaults to 32.
+        shard_size (int, optional): Files per shard directory. Defaults to 1000.
+        image_format (str, optional): Image file extension, 'jpg' or 'png'. Defaults to 'jpg'.
+        start_index (int, optional): First frame index, to add to an existing dataset
+            without overwriting it. Defaults to 0.
+        names (dict, optional): The detector's full class id -> name table written to
+            data.yaml, which needs every id from 0 to n-1. Defaults to the in-process
+            model's `names`.
+    """
+
+    def __init__(self, root: str, policies: tuple = ('every',), every: int = 10,
+                 confidence_threshold: float = 0.5, hash_distance: int = 6, hash_window: int = 256,
+                 workers: int = 2, max_pending: int = 32, shard_size: int = 1000,
+                 image_format: str = 'jpg', start_index: int = 0, names: dict = None):
+        if isinstance(policies, str):
+            policies = (policies,)
+        unknown = set(policies) - set(POLICIES)
+        if unknown or not policies:
+            raise ValueError(f"Unknown sampling policies {sorted(unknown)}; expected some of {POLICIES}")
+        self.root = root
+        self.policies = tuple(policies)
+        self.every = max(1, every)
+        self.confidence_threshold = confidence_threshold
+        self.hash_distance = hash_distance
+        self.shard_size = shard_size
+        self.image_format = image_format
+        self.names = names
+        self._seen_classes = set()
+        self.counts = {'offered': 0, 'sampled': 0, 'duplicates': 0, 'dropped': 0, 'written': 0, 'failed': 0}
+        self._hashes = np.zeros(hash_window, dtype=np.uint64)
+        self._hash_count = 0
+        self._index = start_index
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._workers = [threading.Thread(target=self._run, name=f"dataset-writer-{i}", daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def _sample(self, detections: list) -> bool:
+        if 'every' in self.policies and self.counts['offered'] % self.every == 0:
+            return True
+        if 'low_confidence' in self.policies and any(
+                d.get('confidence', 1.0) < self.confidence_threshold for d in detections):
+            return True
+        if 'new_classes' in self.policies and any(d['class_id'] not in self._seen_classes for d in detections):
+            return True
+        return False
+
+    def _is_duplicate(self, frame_hash: int) -> bool:
+        if self.hash_distance < 0:
+            return False
+        count = min(self._hash_count, len(self._hashes))
+        if not count:
+            return False
+        diff = np.bitwise_xor(self._hashes[:count], np.uint64(frame_hash))
+        distances = np.unpackbits(diff.view(np.uint8).reshape(count, 8), axis=1).sum(axis=1)
+        return bool(distances.min() <= self.hash_distance)
+
+    def _remember(self, frame_hash: int) -> None:
+        self._hashes[self._hash_count % len(self._hashes)] = frame_hash
+        self._hash_count += 1
+
+    def offer(self, img: np.ndarray, detections: list) -> bool:
+        """
+        Considers one frame for export. Must be called before anything is drawn on it.
+
+        Args:
+            img (np.ndarray): The BGR frame; copied if it is kept.
+            detections (list): Its detection dicts.
+
+        Returns:
+            bool: True if the frame was queued for writing.
+        """
+        sampled = self._sample(detections)
+        self.counts['offered'] += 1
+        if not sampled:
+            return False
+        self.counts['sampled'] += 1
+        frame_hash = dhash(img)
+        if self._is_duplicate(frame_hash):
+            self.counts['duplicates'] += 1
+            return False
+        try:
+            self._queue.put_nowait((self._index, img.copy(), yolo_labels(detections, img.shape)))
+        except queue.Full:
+            self.counts['dropped'] += 1
+            return False
+        # Only frames that will be written count for deduplication and new classes.
+        self._remember(frame_hash)
+        self._index += 1
+        self._seen_classes.update(d['class_id'] for d in detections)
+        return True
+
+    def _paths(self, index: int) -> tuple:
+        shard = f"{index // self.shard_size:03d}"
+        image_dir = os.path.join(self.root, 'images', shard)
+        label_dir = os.path.join(self.root, 'labels', shard)
+        return (os.path.join(image_dir, f"{index:08d}.{self.image_format}"),
+                os.path.join(label_dir, f"{index:08d}.txt"))
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            index, img, labels = item
+            image_path, label_path = self._paths(index)
+            try:
+                with tracing.span("dataset write"):
+                    os.makedirs(os.path.dirname(image_path), exist_ok=True)
+                    os.makedirs(os.path.dirname(label_path), exist_ok=True)
+                    if not cv2.imwrite(image_path, img):
+                        raise IOError(f"cv2.imwrite failed for {image_path}")
+                    with open(label_path, 'w') as f:
+                        f.write(labels)
+                key = 'written'
+            except Exception as e:
+                logger.error("Failed to export frame %d: %s", index, e)
+                key = 'failed'
+            with self._lock:
+                self.counts[key] += 1
+
+    def stats(self) -> dict:
+        """Returns the frame counts per outcome."""
+        with self._lock:
+            return dict(self.counts)
+
+    def close(self) -> None:
+        """Waits for the pending frames to be written and writes data.yaml."""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        names = self.names
+        if names is None:
+            from detection.object_detection import get_model
+            names = get_model().names
+        if not isinstance(names, dict):
+            names = dict(enumerate(names))
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, 'data.yaml'), 'w') as f:
+            f.write(f"path: {os.path.abspath(self.root)}\ntrain: images\nval: images\nnames:\n")
+            for class_id in sorted(names):
+                # JSON strings are valid YAML scalars, so names with spaces or colons survive.
+                f.write(f"  {class_id}: {json.dumps(names[class_id])}\n")
+        logger.info("Dataset export finished: %s", self.stats())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,131 @@
+# detection/depth_fusion.py
+"""
+Depth-image fusion for per-detection range estimates.
+
+Scene and DepthPerspective images are captured from the same camera in a single
+`simGetImages` call, so the depth map matches the frame the detector sees. Each
+detection box is then given a range: the median depth over the pixels inside the
+box, computed for all boxes at once.
+"""
+
+from typing import Optional
+
+import airsim
+import cv2
+import numpy as np
+
+from utils.hot_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def get_scene_and_depth(client, camera: str = "0", vehicle_name: str = '') -> tuple:
+    """
+    Captures a Scene frame and the matching DepthPerspective image in one RPC.
+
+    Args:
+        client: AirSim CarClient object.
+        camera (str, optional): Camera name. Defaults to "0".
+        vehicle_name (str, optional): Vehicle owning the camera. Defaults to the first vehicle.
+
+    Returns:
+        tuple: (scene, depth) - the BGR frame and an (H, W) float32 depth map in meters,
+               or (None, None) if either image is missing.
+    """
+    try:
+        responses = client.simGetImages([
+            airsim.ImageRequest(camera, airsim.ImageType.Scene, False, True),
+            airsim.ImageRequest(camera, airsim.ImageType.DepthPerspective, True, False),
+        ], vehicle_name)
+    except Exception as e:
+        logger.error("Scene/depth retrieval failed: %s", e)
+        return None, None
+    if not responses or len(responses) < 2:
+        return None, None
+
+    scene_response, depth_response = responses[0], responses[1]
+    if not scene_response.image_data_uint8 or len(depth_response.image_data_float) == 0:
+        return None, None
+    scene = cv2.imdecode(np.frombuffer(scene_response.image_data_uint8, np.uint8), cv2.IMREAD_COLOR)
+    depth = np.asarray(depth_response.image_data_float, dtype=np.float32)
+    if scene is None or depth.size != depth_response.height * depth_response.width:
+        return None, None
+    return scene, depth.reshape(depth_response.height, depth_response.width)
+
+
+def box_ranges(depth: np.ndarray, boxes, scene_shape: tuple = None, inset: float = 0.1,
+               max_range: float = 100.0) -> np.ndarray:
+    """
+    Estimates the range to every box from a depth map.
+
+    Each box is shrunk by `inset` on every side to stay off the background around
+    the object and rescaled to the depth resolution. The range is the median of the
+    valid depth pixels inside it. All boxes are gathered into one array padded with
+    NaN to the largest box, so memory grows with the box count times the largest box
+    area in depth pixels.
+
+    Args:
+        depth (np.ndarray): (H, W) depth map in meters.
+        boxes: (N, 4) boxes as (x1, y1, x2, y2) in scene pixels.
+        scene_shape (tuple, optional): Shape of the frame the boxes refer to. Defaults
+            to the depth map shape.
+        inset (float, optional): Fraction of the box size trimmed from each side. Defaults to 0.1.
+        max_range (float, optional): Depth values at or beyond this are ignored, as the
+            sky and far background saturate. Defaults to 100.
+
+    Returns:
+        np.ndarray: (N,) ranges in meters; NaN where a box has no valid depth.
+    """
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+    if len(boxes) == 0:
+        return np.empty(0)
+    height, width = depth.shape
+    scene_h, scene_w = (scene_shape or depth.shape)[:2]
+
+    x1, y1, x2, y2 = (boxes * (width / scene_w, height / scene_h, width / scene_w, height / scene_h)).T
+    dx = (x2 - x1) * inset
+    dy = (y2 - y1) * inset
+    # Pixel bounds, end exclusive; every box keeps at least one pixel.
+    c1 = np.clip(np.floor(x1 + dx), 0, width - 1).astype(int)
+    r1 = np.clip(np.floor(y1 + dy), 0, height - 1).astype(int)
+    c2 = np.clip(np.ceil(x2 - dx), c1 + 1, width).astype(int)
+    r2 = np.clip(np.ceil(y2 - dy), r1 + 1, height).astype(int)
+    box_w = c2 - c1
+    box_h = r2 - r1
+
+    offsets_x = np.arange(box_w.max())
+    offsets_y = np.arange(box_h.max())
+    cols = np.minimum(c1[:, None] + offsets_x, width - 1)
+    rows = np.minimum(r1[:, None] + offsets_y, height - 1)
+    values = depth[rows[:, :, None], cols[:, None, :]].astype(float)
+    outside = (offsets_y[None, :, None] >= box_h[:, None, None]) | (offsets_x[None, None, :] >= box_w[:, None, None])
+    values[outside | (values <= 0) | (values >= max_range) | ~np.isfinite(values)] = np.nan
+    values = values.reshape(len(boxes), -1)
+
+    ranges = np.full(len(boxes), np.nan)
+    valid = ~np.isnan(values).all(axis=1)
+    ranges[valid] = np.nanmedian(values[valid], axis=1)
+    return ranges
+
+
+def attach_ranges(detections: list, depth: Optional[np.ndarray], scene_shape: tuple = None, **kwargs) -> list:
+    """
+    Adds a 'range' entry (meters, or None if unknown) to every detection dict in place.
+
+    Args:
+        detections (list): Detection dicts as returned by `parse_results`.
+        depth (np.ndarray): (H, W) depth map in meters, or None.
+        scene_shape (tuple, optional): Shape of the frame the boxes refer to.
+        **kwargs: Arguments passed to `box_ranges`.
+
+    Returns:
+        list: The same detections.
+    """
+    if depth is None or not detections:
+        for detection in detections:
+            detection['range'] = None
+        return detections
+    ranges = box_ranges(depth, [d['box'] for d in detections], scene_shape, **kwargs)
+    for detection, rng in zip(detections, ranges):
+        detection['range'] = None if np.isnan(rng) else float(rng)
+    return detections
@@ -0,0 +1,225 @@
+# detection/detector_service.py
+"""
+Shared detector service with dynamic batching.
+
+One service process owns the only YOLO model instance. Clients (vehicles,
+cameras, threads) put frames on a shared request queue; the service collects
+them into a batch until it is full or the oldest frame has waited for the
+latency deadline, runs one batched inference, and routes every result back to
+the response queue of the client that sent the frame.
+
+Clients must be created with `DetectorService.create_client` before the service
+is started, and handed to other processes as `Process` arguments.
+
+Frames can be sent either as arrays, which are pickled through the queue, or as
+`utils.shared_frames.FrameRef`s to frames in a `SharedFramePool`, which the
+service reads in place without copying.
+
+If tracing is enabled in the process that starts the service, the service records
+its batches too and `stop` merges those spans into this process's trace.
+"""
+
+import itertools
+import multiprocessing
+import queue
+import time
+
+from detection.object_detection import MODEL_WEIGHTS, parse_results
+from utils.shared_frames import FrameRef, SharedFramePool
+from utils.hot_logging import get_logger
+from utils import tracing
+
+logger = get_logger(__name__)
+
+
+class DetectorClient:
+    """
+    Handle for sending frames to a `DetectorService`.
+
+    Each client must be used by one thread at a time.
+    """
+
+    def __init__(self, client_id: str, requests, responses):
+        self.client_id = client_id
+        self._requests = requests
+        self._responses = responses
+        self._counter = itertools.count()
+
+    def detect(self, frame, timeout: float = 2.0) -> list:
+        """
+        Sends one BGR frame and waits for its detections.
+
+        Args:
+            frame (np.ndarray or FrameRef): The frame to run detection on, or a
+                reference to it in a `SharedFramePool`.
+            timeout (float, optional): Seconds to wait for the result. Defaults to 2.
+
+        Returns:
+            list: Detection dicts as returned by `detection.object_detection.parse_results`,
+                  or an empty list if the service did not answer in time or the shared
+                  frame was overwritten before it was processed.
+        """
+        request_id = next(self._counter)
+        self._requests.put((self.client_id, request_id, frame))
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("Detector service timed out for client %s", self.client_id)
+                return []
+            try:
+                response_id, detections = self._responses.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            # Answers to requests that already timed out are dropped.
+            if response_id == request_id:
+                return detections
+
+
+def _resolve(frame, pools: dict):
+    """Returns the array for a request frame, attaching to shared frame pools on first use."""
+    if not isinstance(frame, FrameRef):
+        return frame
+    pool = pools.get(frame.pool)
+    if pool is None:
+        pool = pools[frame.pool] = SharedFramePool.attach(frame.pool)
+    return pool.read(frame)
+
+
+def _serve(weights: str, requests, responses: dict, max_batch: int, max_latency: float, stats, trace: bool = False):
+    """Service process main loop."""
+    if trace:
+        tracing.enable()
+    from ultralytics import YOLO
+    model = YOLO(weights)
+    pools = {}
+    batches = 0
+    frames = 0
+    stale = 0
+    running = True
+
+    while running:
+        item = requests.get()
+        if item is None:
+            break
+        batch = [item]
+        deadline = time.monotonic() + max_latency
+        while len(batch) < max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                running = False
+                break
+            batch.append(item)
+
+        with tracing.span("detector batch"):
+            detections = [[] for _ in batch]
+            try:
+                images = [_resolve(frame, pools) for _, _, frame in batch]
+                live = [i for i, img in enumerate(images) if img is not None]
+                if live:
+                    with tracing.span("inference"):
+                        results = model([images[i] for i in live], verbose=False)
+                    for i, result in zip(live, results):
+                        detections[i] = parse_results(result, model.names)
+            except Exception as e:
+                logger.error("Batched inference failed: %s", e)
+
+            # A shared slot reused during inference may have fed the model a torn frame.
+            for i, (_, _, frame) in enumerate(batch):
+                if isinstance(frame, FrameRef) and frame.pool in pools and not pools[frame.pool].is_current(frame):
+                    detections[i] = []
+                    stale += 1
+
+            for (client_id, request_id, _), client_detections in zip(batch, detections):
+                responses[client_id].put((request_id, client_detections))
+        batches += 1
+        frames += len(batch)
+
+    for pool in pools.values():
+        pool.close()
+    report = {'batches': batches, 'frames': frames, 'stale_frames': stale,
+              'mean_batch': frames / batches if batches else 0.0}
+    if trace:
+        report['trace'] = tracing.snapshot()
+    stats.put(report)
+
+
+class DetectorService:
+    """
+    Owns the shared model process.
+
+    Args:
+        weights (str, optional): YOLO weights to load. Defaults to `MODEL_WEIGHTS`.
+        max_batch (int, optional): Largest batch sent to the model. Defaults to 8.
+        max_latency (float, optional): Longest time a frame waits for the batch to fill,
+            in seconds. Defaults to 0.01.
+        context (optional): multiprocessing context. Defaults to the 'spawn' context.
+    """
+
+    def __init__(self, weights: str = MODEL_WEIGHTS, max_batch: int = 8, max_latency: float = 0.01, context=None):
+        self.weights = weights
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self._ctx = context or multiprocessing.get_context("spawn")
+        self._requests = self._ctx.Queue()
+        self._responses = {}
+        self._stats = self._ctx.Queue()
+        self._process = None
+
+    def create_client(self, client_id: str = None) -> DetectorClient:
+        """
+        Registers a new client; must be called before `start`.
+
+        Args:
+            client_id (str, optional): Unique client name. Defaults to a sequential id.
+
+        Returns:
+            DetectorClient: The client handle.
+        """
+        if self._process is not None:
+            raise RuntimeError("Clients must be created before the detector service is started")
+        client_id = client_id or f"client-{len(self._responses)}"
+        if client_id in self._responses:
+            raise ValueError(f"Detector client '{client_id}' already exists")
+        self._responses[client_id] = self._ctx.Queue()
+        return DetectorClient(client_id, self._requests, self._responses[client_id])
+
+    def start(self):
+        """Starts the service process and loads the model in it."""
+        self._process = self._ctx.Process(
+            target=_serve,
+            args=(self.weights, self._requests, self._responses, self.max_batch, self.max_latency, self._stats,
+                  tracing.is_enabled()),
+            name="detector-service",
+            daemon=True,
+        )
+        self._process.start()
+
+    def stop(self, timeout: float = 5.0) -> dict:
+        """
+        Stops the service after it has answered the frames already queued.
+
+        Returns:
+            dict: Batching statistics ('batches', 'frames', 'stale_frames', 'mean_batch'), or an empty
+                  dict if the service did not report in time.
+        """
+        if self._process is None:
+            return {}
+        self._requests.put(None)
+        try:
+            stats = self._stats.get(timeout=timeout)
+        except queue.Empty:
+            stats = {}
+        if 'trace' in stats:
+            tracing.merge(stats.pop('trace'))
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process = None
+        return stats
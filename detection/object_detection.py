@@ -1,42 +1,287 @@
 # detection/object_detection.py
-import airsim
+import time
 import numpy as np
 import cv2
-from ultralytics import YOLO
-from utils.robust_image import get_image_safe
+from utils.robust_image import get_image_safe, default_retry_policy
+from utils import tracing
+from utils.metrics import default_registry
+from detection.depth_fusion import attach_ranges, get_scene_and_depth
+from detection.segmentation_detection import SegmentationDetector, get_scene_and_segmentation
 
-model = YOLO("yolov10n.pt")
+MODEL_WEIGHTS = "yolov10n.pt"
+PERCEPTION_BACKENDS = ('yolo', 'segmentation')
 
-def yolov10_object_detection(client) -> bool:
+_model = None
+_segmenter = None
+
+_inference_seconds = {
+    where: default_registry().histogram('inference_seconds', 'Object detection time per frame',
+                                        labels={'model': where})
+    for where in ('local', 'service')
+}
+
+
+def get_model():
+    """
+    Returns the process-wide YOLO model, loading it on first use.
+
+    Processes that send their frames to a shared `DetectorService` never call this,
+    so they do not pay for their own copy of the model.
+
+    Returns:
+        The ultralytics YOLO model.
+    """
+    global _model
+    if _model is None:
+        from ultralytics import YOLO
+        _model = YOLO(MODEL_WEIGHTS)
+    return _model
+
+
+def warm_up_model(shape: tuple = (720, 1280, 3)) -> None:
+    """
+    Loads the model and runs it once on a blank frame.
+
+    The first inference pays for lazy initialization inside torch and ultralytics;
+    doing it during startup keeps that out of the first control tick.
+
+    Args:
+        shape (tuple, optional): Frame shape to warm up with. Defaults to 720p BGR.
+    """
+    get_model()(np.zeros(shape, dtype=np.uint8), verbose=False)
+
+
+def parse_results(result, names) -> list:
+    """
+    Converts one ultralytics result into plain detection dicts.
+
+    Args:
+        result: A single ultralytics `Results` object.
+        names: The model's class-id to label mapping.
+
+    Returns:
+        list: One dict per box with 'box' (x1, y1, x2, y2) in pixels, 'class_id',
+              'label' and 'confidence'.
+    """
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return []
+    xyxy = boxes.xyxy.cpu().numpy().astype(int)
+    class_ids = boxes.cls.cpu().numpy().astype(int)
+    confidences = boxes.conf.cpu().numpy()
+    return [
+        {'box': tuple(box.tolist()), 'class_id': int(class_id), 'label': names[int(class_id)], 'confidence': float(conf)}
+        for box, class_id, conf in zip(xyxy, class_ids, confidences)
+    ]
+
+
+def detect_objects(img, detector=None) -> list:
+    """
+    Runs object detection on one BGR frame.
+
+    Args:
+        img (np.ndarray or FrameRef): The frame, or a reference to it in a
+            `SharedFramePool` when a detector service client is given.
+        detector (DetectorClient, optional): A shared detector service client. Defaults
+            to None, which runs the in-process model.
+
+    Returns:
+        list: Detection dicts as returned by `parse_results`.
+    """
+    start = time.perf_counter()
+    if detector is not None:
+        detections = detector.detect(img)
+        _inference_seconds['service'].observe(time.perf_counter() - start)
+        return detections
+    model = get_model()
+    with tracing.span("inference"):
+        result = model(img)[0]
+    _inference_seconds['local'].observe(time.perf_counter() - start)
+    return parse_results(result, model.names)
+
+
+def detect_objects_batch(imgs: list, detector=None) -> list:
+    """
+    Runs object detection on several frames, as one batch for the in-process model.
+
+    Args:
+        imgs (list): BGR frames.
+        detector (DetectorClient, optional): A shared detector service client; it batches
+            across clients itself, so frames are sent one by one. Defaults to None.
+
+    Returns:
+        list: One list of detection dicts per frame.
+    """
+    if not imgs:
+        return []
+    if detector is not None:
+        return [detector.detect(img) for img in imgs]
+    model = get_model()
+    return [parse_results(result, model.names) for result in model(imgs, verbose=False)]
+
+
+def detect_stream(source, batch_size: int = 1, detector=None, max_frames: int = None):
+    """
+    Runs detection over every frame of an `ImageSource`.
+
+    Args:
+        source (ImageSource): The frame source (AirSim, video, directory or recording).
+        batch_size (int, optional): Frames per model call. Defaults to 1.
+        detector (DetectorClient, optional): A shared detector service client. Defaults to None.
+        max_frames (int, optional): Stop after this many frames. Defaults to None (until
+            the source ends).
+
+    Yields:
+        tuple: (img, detections) for each frame.
+    """
+    done = 0
+    while max_frames is None or done < max_frames:
+        size = batch_size if max_frames is None else min(batch_size, max_frames - done)
+        imgs = source.read_batch(size)
+        if not imgs:
+            return
+        for img, detections in zip(imgs, detect_objects_batch(imgs, detector)):
+            yield img, detections
+        done += len(imgs)
+
+
+def draw_detections(img: np.ndarray, detections: list) -> None:
+    """
+    Draws detection boxes and labels onto a frame in place.
+
+    Args:
+        img (np.ndarray): The frame.
+        detections (list): Detection dicts as returned by `parse_results`.
+    """
+    for detection in detections:
+        x1, y1, x2, y2 = detection['box']
+        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        label = f"{detection['label']} {detection['confidence']:.2f}"
+        if detection.get('range') is not None:
+            label += f" {detection['range']:.1f}m"
+        elif detection.get('distance') is not None:
+            label += f" ~{detection['distance']:.1f}m"
+        cv2.putText(img, label, (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+
+
+def get_segmenter() -> SegmentationDetector:
+    """Returns the process-wide segmentation backend, creating it on first use."""
+    global _segmenter
+    if _segmenter is None:
+        _segmenter = SegmentationDetector()
+    return _segmenter
+
+
+@tracing.traced("capture_and_detect")
+def capture_and_detect(client, vehicle_name: str = '', detector=None, frame_pool=None, with_depth: bool = False,
+                       backend: str = 'yolo', camera=None) -> tuple:
+    """
+    Grabs one camera frame and runs detection on it.
+
+    Args:
+        client: The AirSim client object.
+        vehicle_name (str, optional): The vehicle whose camera is used. Defaults to the first vehicle.
+        detector (DetectorClient, optional): A shared detector service client to send the
+            frame to instead of running a model in this process. Defaults to None.
+        frame_pool (SharedFramePool, optional): Pool to capture the frame into; the
+            detector service then receives a `FrameRef` instead of the pixels. Defaults to None.
+        with_depth (bool, optional): Capture the DepthPerspective image in the same RPC
+            and add a 'range' in meters to every detection. Defaults to False.
+        backend (str, optional): 'yolo', or 'segmentation' to derive the boxes from the
+            simulator's Segmentation image instead of running a model. Defaults to 'yolo'.
+        camera (CameraModel, optional): Camera model used to add a ground-plane 'position',
+            'distance' and 'bearing' relative to the car to every detection. Defaults to None.
+
+    Returns:
+        tuple: (img, detections) - a BGR frame owned by the caller and the detection
+               dicts, or (None, []) if image retrieval failed.
+    """
+    if backend not in PERCEPTION_BACKENDS:
+        raise ValueError(f"Unknown perception backend '{backend}'")
+    pooled = frame_pool is not None and detector is not None
+    depth = None
+    if backend == 'segmentation':
+        img, seg, depth = get_scene_and_segmentation(client, camera="0", vehicle_name=vehicle_name, with_depth=with_depth)
+        if img is None:
+            return None, []
+        detections = get_segmenter().detect(seg)
+    elif with_depth:
+        img, depth = get_scene_and_depth(client, camera="0", vehicle_name=vehicle_name)
+        if img is None:
+            return None, []
+        detections = detect_objects(frame_pool.write(img) if pooled else img, detector)
+    elif pooled:
+        ref = frame_pool.capture(client, camera="0", compress="auto", vehicle_name=vehicle_name,
+                                 policy=default_retry_policy())
+        if ref is None:
+            return None, []
+        detections = detect_objects(ref, detector)
+        # Copy out of the slot: it is shared and gets reused by later captures.
+        img = frame_pool.read(ref)
+        if img is None:
+            return None, []
+        img = img.copy()
+    else:
+        # Use robust image retrieval instead of direct simGetImage call
+        img = get_image_safe(client, camera="0", compress="auto", vehicle_name=vehicle_name,
+                             policy=default_retry_policy())
+        if img is None:
+            return None, []
+        if img.shape[2] == 4:
+            img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+        detections = detect_objects(img, detector)
+
+    if with_depth:
+        attach_ranges(detections, depth, img.shape)
+    if camera is not None:
+        camera.locate(detections, img.shape)
+    return img, detections
+
+
+def yolov10_object_detection(client, vehicle_name: str = '', detector=None, frame_pool=None,
+                             with_depth: bool = False, backend: str = 'yolo', exporter=None, camera=None) -> bool:
     """
     Perform object detection using YOLOv10 model with robust image retrieval.
 
     Args:
         client: The AirSim client object.
+        vehicle_name (str, optional): The vehicle whose camera is used. Defaults to the first vehicle.
+        detector (DetectorClient, optional): A shared detector service client to send the
+            frame to instead of running a model in this process. Defaults to None.
+        frame_pool (SharedFramePool, optional): Pool to capture the frame into. Defaults to None.
+        with_depth (bool, optional): Estimate and display the range to every detection. Defaults to False.
+        backend (str, optional): 'yolo' or 'segmentation'. Defaults to 'yolo'.
+        exporter (DatasetExporter, optional): Offered every frame for the training set. Defaults to None.
+        camera (CameraModel, optional): Adds ground-plane positions to the detections and
+            their distance to the labels. Defaults to None.
 
     Returns:
         bool: True if the detection is successful, False otherwise.
     """
-    # Use robust image retrieval instead of direct simGetImage call
-    img = get_image_safe(client, camera="0", retries=3, sleep=0.2, compress=True)
-    
+    img, detections = capture_and_detect(client, vehicle_name, detector, frame_pool, with_depth, backend, camera)
     if img is None:
         return True  # Continue operation even if image retrieval fails
-    
-    if img.shape[2] == 4:
-        img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    if exporter is not None:
+        exporter.offer(img, detections)
+    return show_detections(img, detections, vehicle_name)
 
-    results = model(img)
 
-    for box in results[0].boxes:
-        x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
-        label = model.names[int(box.cls[0].cpu().numpy())]
-        confidence = box.conf[0].cpu().numpy()
-        
-        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        cv2.putText(img, f"{label} {confidence:.2f}", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+def show_detections(img: np.ndarray, detections: list, vehicle_name: str = '') -> bool:
+    """
+    Draws the detections onto the frame and shows it in the vehicle's window.
+
+    Args:
+        img (np.ndarray): The frame; drawn on in place.
+        detections (list): Detection dicts as returned by `parse_results`.
+        vehicle_name (str, optional): Used in the window title. Defaults to ''.
+
+    Returns:
+        bool: False if the user pressed 'q', True otherwise.
+    """
+    draw_detections(img, detections)
 
-    cv2.imshow("Top", img)
+    cv2.imshow(f"Top {vehicle_name}".rstrip(), img)
 
     if cv2.waitKey(1) & 0xFF == ord('q'):
         return False
@@ -7,20 +7,18 @@ This module addresses Issue #2 'simGetImage' error with comprehensive fixes.
 import airsim
 import numpy as np
 import cv2
-import logging
 from ultralytics import YOLO
 from utils.image_utils import get_image_safe, validate_airsim_connection
+from utils.hot_logging import configure_logging, get_logger
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 # Initialize YOLO model
 try:
     model = YOLO("yolov10n.pt")
     logger.info("YOLO model loaded successfully")
 except Exception as e:
-    logger.error(f"Failed to load YOLO model: {str(e)}")
+    logger.error("Failed to load YOLO model: %s", e)
     model = None
 
 
@@ -69,7 +67,7 @@ def yolov10_object_detection_improved(client: airsim.CarClient) -> bool:
         
         # Ensure image is in correct format for YOLO
         if len(img.shape) != 3:
-            logger.warning(f"Unexpected image shape: {img.shape}, skipping detection")
+            logger.warning("Unexpected image shape: %s, skipping detection", img.shape)
             return True
         
         # Run YOLO detection
@@ -115,10 +113,10 @@ def yolov10_object_detection_improved(client: airsim.CarClient) -> bool:
                             2
                         )
                         
-                        logger.debug(f"Detected: {label} with confidence {confidence:.2f}")
+                        logger.debug("Detected: %s with confidence %.2f", label, confidence)
                         
                     except Exception as e:
-                        logger.warning(f"Error processing detection box: {str(e)}")
+                        logger.warning("Error processing detection box: %s", e)
                         continue
                 
                 # Display the image
@@ -129,7 +127,7 @@ def yolov10_object_detection_improved(client: airsim.CarClient) -> bool:
                 cv2.imshow("YOLO Detection", img)
                 
         except Exception as e:
-            logger.error(f"YOLO detection failed: {str(e)}")
+            logger.error("YOLO detection failed: %s", e)
             # Show original image even if detection fails
             cv2.imshow("YOLO Detection", img)
         
@@ -140,7 +138,7 @@ def yolov10_object_detection_improved(client: airsim.CarClient) -> bool:
         return True
         
     except Exception as e:
-        logger.error(f"Object detection function failed: {str(e)}")
+        logger.error("Object detection function failed: %s", e)
         return True  # Continue operation even if detection fails
 
 
@@ -180,7 +178,7 @@ def yolov10_object_detection_legacy(client: airsim.CarClient) -> bool:
         return True
         
     except Exception as e:
-        logger.error(f"Legacy object detection failed: {str(e)}")
+        logger.error("Legacy object detection failed: %s", e)
         return False
 
 
@@ -209,7 +207,7 @@ def test_image_retrieval(client: airsim.CarClient) -> bool:
     img = get_image_safe(client, camera="0", retries=3)
     
     if img is not None:
-        logger.info(f"Image retrieval test successful: shape={img.shape}, dtype={img.dtype}")
+        logger.info("Image retrieval test successful: shape=%s, dtype=%s", img.shape, img.dtype)
         return True
     else:
         logger.error("Image retrieval test failed")
@@ -220,6 +218,7 @@ if __name__ == "__main__":
     # Test the improved image retrieval
     import airsim
     
+    configure_logging()
     logger.info("Starting image retrieval test...")
     
     try:
@@ -233,7 +232,7 @@ if __name__ == "__main__":
             logger.error("Tests failed!")
             
     except Exception as e:
-        logger.error(f"Test setup failed: {str(e)}")
+        logger.error("Test setup failed: %s", e)
     finally:
         try:
             client.enableApiControl(False)
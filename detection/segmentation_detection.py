@@ -0,0 +1,166 @@
+# detection/segmentation_detection.py
+"""
+Cheap perception backend built on AirSim's Segmentation image.
+
+AirSim paints every mesh with the palette color of its segmentation object ID.
+`configure_segmentation` assigns object IDs to the mesh patterns of interest; a
+Segmentation frame is then turned into detections by mapping colors to class
+indices through a sorted color lookup table and running connected components
+per class. The output uses the same detection dicts as the YOLO backend.
+"""
+
+import airsim
+import cv2
+import numpy as np
+
+from utils.hot_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Object ID -> (label, COCO class id, mesh name regex). Mesh names depend on the
+# environment; adjust the patterns for maps other than the default ones.
+SEGMENTATION_CLASSES = {
+    1: ('car', 2, r'[Cc]ar[\w]*'),
+    2: ('person', 0, r'[Pp]erson[\w]*|[Pp]edestrian[\w]*'),
+    3: ('truck', 7, r'[Tt]ruck[\w]*'),
+}
+
+# RGB color AirSim uses for each object ID (from AirSim's seg_rgbs.txt).
+SEGMENTATION_PALETTE = {
+    0: (0, 0, 0),
+    1: (153, 108, 6),
+    2: (112, 105, 191),
+    3: (89, 121, 72),
+}
+
+
+def configure_segmentation(client, classes: dict = None) -> None:
+    """
+    Assigns segmentation object IDs so only the meshes of interest stand out.
+
+    Every mesh is first set to ID 0 (background), then each class pattern gets its ID.
+
+    Args:
+        client: AirSim CarClient object.
+        classes (dict, optional): Object ID to (label, class id, mesh regex). Defaults
+            to `SEGMENTATION_CLASSES`.
+    """
+    classes = classes or SEGMENTATION_CLASSES
+    client.simSetSegmentationObjectID(r"[\w]*", 0, True)
+    for object_id, (label, _, pattern) in classes.items():
+        if not client.simSetSegmentationObjectID(pattern, object_id, True):
+            logger.warning("No meshes matched '%s' for segmentation class %s", pattern, label)
+
+
+class SegmentationDetector:
+    """
+    Turns Segmentation frames into detection dicts.
+
+    Args:
+        classes (dict, optional): Object ID to (label, class id, mesh regex). Defaults
+            to `SEGMENTATION_CLASSES`.
+        palette (dict, optional): Object ID to RGB color. Defaults to `SEGMENTATION_PALETTE`.
+        min_area (int, optional): Smallest component kept, in pixels. Defaults to 50.
+    """
+
+    def __init__(self, classes: dict = None, palette: dict = None, min_area: int = 50):
+        self.classes = classes or SEGMENTATION_CLASSES
+        palette = palette or SEGMENTATION_PALETTE
+        self.min_area = min_area
+
+        # Class index 0 is background; classes are numbered 1..K in `self.labels` order.
+        self.labels = [None]
+        self.class_ids = [None]
+        keys, values = [], []
+        for object_id, (label, class_id, _) in self.classes.items():
+            r, g, b = palette[object_id]
+            keys.append((r << 16) | (g << 8) | b)
+            values.append(len(self.labels))
+            self.labels.append(label)
+            self.class_ids.append(class_id)
+        order = np.argsort(keys)
+        self._keys = np.asarray(keys, dtype=np.int32)[order]
+        self._values = np.asarray(values, dtype=np.uint8)[order]
+
+    def class_map(self, seg_bgr: np.ndarray) -> np.ndarray:
+        """
+        Maps every pixel of a BGR Segmentation frame to its class index (0 for background).
+
+        Args:
+            seg_bgr (np.ndarray): (H, W, 3) Segmentation frame as decoded by OpenCV.
+
+        Returns:
+            np.ndarray: (H, W) uint8 class indices.
+        """
+        if len(self._keys) == 0:
+            return np.zeros(seg_bgr.shape[:2], dtype=np.uint8)
+        packed = (seg_bgr[..., 2].astype(np.int32) << 16) | (seg_bgr[..., 1].astype(np.int32) << 8) | seg_bgr[..., 0]
+        idx = np.minimum(np.searchsorted(self._keys, packed), len(self._keys) - 1)
+        return np.where(self._keys[idx] == packed, self._values[idx], 0).astype(np.uint8)
+
+    def detect(self, seg_bgr: np.ndarray) -> list:
+        """
+        Extracts one box per connected region of every class.
+
+        Args:
+            seg_bgr (np.ndarray): (H, W, 3) Segmentation frame as decoded by OpenCV.
+
+        Returns:
+            list: Detection dicts with 'box', 'class_id', 'label' and 'confidence' (always 1.0).
+        """
+        classes = self.class_map(seg_bgr)
+        detections = []
+        present = np.flatnonzero(np.bincount(classes.ravel(), minlength=len(self.labels))[1:]) + 1
+        for index in present:
+            mask = (classes == index).astype(np.uint8)
+            count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+            stats = stats[1:count]
+            stats = stats[stats[:, cv2.CC_STAT_AREA] >= self.min_area]
+            for x, y, w, h, _ in stats.tolist():
+                detections.append({'box': (x, y, x + w - 1, y + h - 1), 'class_id': self.class_ids[index],
+                                   'label': self.labels[index], 'confidence': 1.0})
+        return detections
+
+
+def get_scene_and_segmentation(client, camera: str = "0", vehicle_name: str = '', with_depth: bool = False) -> tuple:
+    """
+    Captures Scene, Segmentation and optionally DepthPerspective images in one RPC.
+
+    Args:
+        client: AirSim CarClient object.
+        camera (str, optional): Camera name. Defaults to "0".
+        vehicle_name (str, optional): Vehicle owning the camera. Defaults to the first vehicle.
+        with_depth (bool, optional): Also request the depth image. Defaults to False.
+
+    Returns:
+        tuple: (scene, segmentation, depth) - BGR frames and an (H, W) float32 depth map
+               in meters (None unless requested); (None, None, None) on failure.
+    """
+    requests = [
+        airsim.ImageRequest(camera, airsim.ImageType.Scene, False, True),
+        airsim.ImageRequest(camera, airsim.ImageType.Segmentation, False, True),
+    ]
+    if with_depth:
+        requests.append(airsim.ImageRequest(camera, airsim.ImageType.DepthPerspective, True, False))
+    try:
+        responses = client.simGetImages(requests, vehicle_name)
+    except Exception as e:
+        logger.error("Scene/segmentation retrieval failed: %s", e)
+        return None, None, None
+    if not responses or len(responses) < len(requests):
+        return None, None, None
+
+    frames = []
+    for response in responses[:2]:
+        if not response.image_data_uint8:
+            return None, None, None
+        frames.append(cv2.imdecode(np.frombuffer(response.image_data_uint8, np.uint8), cv2.IMREAD_COLOR))
+    if frames[0] is None or frames[1] is None:
+        return None, None, None
+
+    depth = None
+    if with_depth:
+        response = responses[2]
+        depth = np.asarray(response.image_data_float, dtype=np.float32)
+        depth = depth.reshape(response.height, response.width) if depth.size == response.height * response.width else None
+    return frames[0], frames[1], depth
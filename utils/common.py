@@ -1,5 +1,5 @@
 # utils/common.py
-import numpy as np
+from utils import geometry
 
 def distance(pt1: tuple, pt2: tuple) -> float:
     """
@@ -12,7 +12,7 @@ def distance(pt1: tuple, pt2: tuple) -> float:
     Returns:
         float: The Euclidean distance between the two points.
     """
-    return np.sqrt((pt1[0] - pt2[0]) ** 2 + (pt1[1] - pt2[1]) ** 2)
+    return geometry.distance(pt1, pt2)
 
 def get_heading_from_quaternion(quaternion) -> float:
     """
@@ -25,9 +25,4 @@ def get_heading_from_quaternion(quaternion) -> float:
         The heading angle in degrees.
 
     """
-    w = quaternion.w_val
-    x = quaternion.x_val
-    y = quaternion.y_val
-    z = quaternion.z_val
-    yaw = np.arctan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z))
-    return np.rad2deg(yaw)
+    return geometry.heading_from_quaternion(quaternion)
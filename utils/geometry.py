@@ -0,0 +1,161 @@
+# utils/geometry.py
+"""
+Geometry helpers in two flavours.
+
+Scalar functions use the `math` module, which is an order of magnitude faster than
+NumPy ufuncs on Python floats and is what the per-tick control code should call.
+Batched functions take NumPy arrays and process many points at once.
+"""
+
+import math
+import numpy as np
+
+
+# Scalar fast paths
+
+def distance(pt1: tuple, pt2: tuple) -> float:
+    """
+    Calculates the Euclidean distance between two points.
+
+    Args:
+        pt1 (tuple): The first point (x1, y1).
+        pt2 (tuple): The second point (x2, y2).
+
+    Returns:
+        float: The distance between the points.
+    """
+    return math.hypot(pt1[0] - pt2[0], pt1[1] - pt2[1])
+
+
+def yaw_from_quaternion(w: float, x: float, y: float, z: float) -> float:
+    """
+    Calculates the yaw angle of a quaternion.
+
+    Args:
+        w (float): The scalar component.
+        x (float): The x component.
+        y (float): The y component.
+        z (float): The z component.
+
+    Returns:
+        float: The yaw angle in radians.
+    """
+    return math.atan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z))
+
+
+def heading_from_quaternion(quaternion) -> float:
+    """
+    Calculates the heading (yaw) angle in degrees from an AirSim quaternion.
+
+    Args:
+        quaternion: A quaternion object with w_val, x_val, y_val and z_val.
+
+    Returns:
+        float: The heading angle in degrees.
+    """
+    return math.degrees(yaw_from_quaternion(quaternion.w_val, quaternion.x_val, quaternion.y_val, quaternion.z_val))
+
+
+def wrap_angle(angle: float) -> float:
+    """
+    Wraps an angle to [-pi, pi).
+
+    Args:
+        angle (float): The angle in radians.
+
+    Returns:
+        float: The wrapped angle in radians.
+    """
+    return (angle + math.pi) % (2.0 * math.pi) - math.pi
+
+
+# Batched versions
+
+def distances(points_a, points_b) -> np.ndarray:
+    """
+    Calculates element-wise distances between two broadcastable arrays of points.
+
+    Args:
+        points_a: An (..., 2) array of points.
+        points_b: An (..., 2) array of points.
+
+    Returns:
+        np.ndarray: The distances, with the broadcast shape minus the last axis.
+    """
+    delta = np.asarray(points_a, dtype=float) - np.asarray(points_b, dtype=float)
+    return np.hypot(delta[..., 0], delta[..., 1])
+
+
+def pairwise_distances(points_a, points_b) -> np.ndarray:
+    """
+    Calculates the distance between every point of `points_a` and every point of `points_b`.
+
+    Args:
+        points_a: An (N, 2) array of points.
+        points_b: An (M, 2) array of points.
+
+    Returns:
+        np.ndarray: An (N, M) distance matrix.
+    """
+    a = np.asarray(points_a, dtype=float)
+    b = np.asarray(points_b, dtype=float)
+    return distances(a[:, None, :], b[None, :, :])
+
+
+def project_to_polyline(points, polyline) -> tuple:
+    """
+    Projects points onto their closest segment of a polyline.
+
+    Args:
+        points: An (N, 2) array of points.
+        polyline: An (M, 2) array of vertices, M >= 2.
+
+    Returns:
+        tuple: (projections, segments, t, dist) where `projections` is (N, 2),
+               `segments` holds the index of the closest segment, `t` the position along
+               it in [0, 1], and `dist` the distance from each point to its projection.
+    """
+    p = np.asarray(points, dtype=float).reshape(-1, 2)
+    v = np.asarray(polyline, dtype=float)
+    a = v[:-1]
+    ab = v[1:] - a
+    length2 = (ab * ab).sum(axis=1)
+    length2[length2 == 0] = 1.0
+    ap = p[:, None, :] - a[None, :, :]
+    t = np.clip((ap * ab).sum(axis=2) / length2, 0.0, 1.0)
+    proj = a + ab * t[..., None]
+    d2 = ((p[:, None, :] - proj) ** 2).sum(axis=2)
+    segments = d2.argmin(axis=1)
+    rows = np.arange(len(p))
+    return proj[rows, segments], segments, t[rows, segments], np.sqrt(d2[rows, segments])
+
+
+def quaternions_to_euler(quaternions) -> np.ndarray:
+    """
+    Converts quaternions to roll, pitch and yaw.
+
+    Args:
+        quaternions: An (N, 4) array of (w, x, y, z) quaternions.
+
+    Returns:
+        np.ndarray: An (N, 3) array of (roll, pitch, yaw) in radians.
+    """
+    q = np.asarray(quaternions, dtype=float).reshape(-1, 4)
+    w, x, y, z = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+    roll = np.arctan2(2.0 * (w * x + y * z), 1.0 - 2.0 * (x * x + y * y))
+    pitch = np.arcsin(np.clip(2.0 * (w * y - z * x), -1.0, 1.0))
+    yaw = np.arctan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z))
+    return np.stack((roll, pitch, yaw), axis=1)
+
+
+def wrap_angles(angles) -> np.ndarray:
+    """
+    Wraps an array of angles to [-pi, pi).
+
+    Args:
+        angles: Angles in radians.
+
+    Returns:
+        np.ndarray: The wrapped angles in radians.
+    """
+    return np.mod(np.asarray(angles, dtype=float) + np.pi, 2.0 * np.pi) - np.pi
@@ -0,0 +1,142 @@
+# utils/hot_logging.py
+"""
+Logging for code that runs every control tick.
+
+`get_logger(__name__)` returns a `HotLogger`, a thin wrapper around the standard
+module logger with the same `debug`/`info`/`warning`/`error` methods, that:
+
+- formats lazily: arguments use %-style and nothing is formatted unless the level
+  is enabled (never pass f-strings to it);
+- rate-limits per call site: each source line emits at most `burst` records per
+  `interval` seconds, and the first record after a quiet period reports how many
+  were suppressed, so a simulator stall produces a few lines instead of hundreds
+  per second.
+
+`configure_logging` is the one place that installs handlers, meant to be called by
+entry points rather than at import time. With `async_handlers=True` records are put
+on a queue and written by a background `QueueListener`, so slow terminals or files
+never block the control loop.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+DEFAULT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+_listener = None
+
+
+class HotLogger:
+    """
+    Rate-limited, lazily formatting wrapper around a `logging.Logger`.
+
+    Args:
+        logger (logging.Logger): The logger records go to.
+        interval (float, optional): Rate-limit window per call site, seconds. Defaults to 1.
+        burst (int, optional): Records allowed per call site and window. Defaults to 5.
+    """
+
+    def __init__(self, logger: logging.Logger, interval: float = 1.0, burst: int = 5):
+        self.logger = logger
+        self.interval = interval
+        self.burst = burst
+        # call site -> [window start, emitted in window, suppressed in window]
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def _log(self, level: int, msg: str, args: tuple, exc_info=None) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        # Caller of debug()/info()/...; two frames up from here.
+        frame = sys._getframe(2)
+        site = (frame.f_code.co_filename, frame.f_lineno)
+        now = time.monotonic()
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None:
+                state = self._sites[site] = [now, 0, 0]
+            elif now - state[0] >= self.interval:
+                suppressed = state[2]
+                state[0], state[1], state[2] = now, 0, 0
+                if suppressed:
+                    # Without args the message was never %-formatted, so literal '%' must be escaped.
+                    msg = str(msg) if args else str(msg).replace('%', '%%')
+                    msg = f"{msg} [%d similar messages suppressed]"
+                    args = args + (suppressed,)
+            if state[1] >= self.burst:
+                state[2] += 1
+                return
+            state[1] += 1
+        self.logger.log(level, msg, *args, exc_info=exc_info, stacklevel=3)
+
+    def debug(self, msg: str, *args) -> None:
+        self._log(logging.DEBUG, msg, args)
+
+    def info(self, msg: str, *args) -> None:
+        self._log(logging.INFO, msg, args)
+
+    def warning(self, msg: str, *args) -> None:
+        self._log(logging.WARNING, msg, args)
+
+    def error(self, msg: str, *args, exc_info=None) -> None:
+        self._log(logging.ERROR, msg, args, exc_info)
+
+    def isEnabledFor(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
+
+def get_logger(name: str, interval: float = 1.0, burst: int = 5) -> HotLogger:
+    """
+    Returns a `HotLogger` for the standard logger `name`.
+
+    Args:
+        name (str): Logger name, usually `__name__`.
+        interval (float, optional): Rate-limit window per call site, seconds. Defaults to 1.
+        burst (int, optional): Records allowed per call site and window. Defaults to 5.
+    """
+    return HotLogger(logging.getLogger(name), interval, burst)
+
+
+def configure_logging(level: int = logging.INFO, async_handlers: bool = False, fmt: str = DEFAULT_FORMAT,
+                      filename: str = None) -> None:
+    """
+    Installs the root handler; meant to be called once by entry points.
+
+    Args:
+        level (int, optional): Root level. Defaults to logging.INFO.
+        async_handlers (bool, optional): Write records from a background thread through a
+            queue instead of in the logging thread. Defaults to False.
+        fmt (str, optional): Record format. Defaults to `DEFAULT_FORMAT`.
+        filename (str, optional): Log to this file instead of stderr.
+    """
+    global _listener
+    handler = logging.FileHandler(filename) if filename else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(fmt))
+    root = logging.getLogger()
+    stop_listener()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.setLevel(level)
+    if async_handlers:
+        records = queue.SimpleQueue()
+        root.addHandler(logging.handlers.QueueHandler(records))
+        _listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+        _listener.start()
+    else:
+        root.addHandler(handler)
+
+
+def stop_listener() -> None:
+    """Flushes and stops the background listener started by `configure_logging`, if any."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_listener)
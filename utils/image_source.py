@@ -0,0 +1,338 @@
+# utils/image_source.py
+"""
+Frame sources behind one interface.
+
+Every source yields BGR uint8 frames through `read()` / `read_batch()` and can be
+iterated, so the detection pipeline runs the same way on the live simulator, a
+video file, a directory of PNG/JPEG images or a memory-mapped `.npy` recording.
+The offline sources read as fast as the CPU allows, which is what perception
+throughput benchmarks need.
+"""
+
+import abc
+import glob
+import os
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from utils.hot_logging import get_logger
+
+logger = get_logger(__name__)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+class ImageSource(abc.ABC):
+    """
+    Base class for frame sources.
+
+    Subclasses implement `read`; `read_batch` falls back to repeated reads.
+    """
+
+    @abc.abstractmethod
+    def read(self) -> Optional[np.ndarray]:
+        """
+        Returns:
+            np.ndarray: The next BGR frame, or None when the source is exhausted or the
+                        frame could not be retrieved.
+        """
+        raise NotImplementedError
+
+    def read_batch(self, size: int) -> list:
+        """
+        Reads up to `size` frames.
+
+        Args:
+            size (int): Number of frames wanted.
+
+        Returns:
+            list: The frames read; shorter than `size` at the end of the source.
+        """
+        frames = []
+        for _ in range(size):
+            frame = self.read()
+            if frame is None:
+                break
+            frames.append(frame)
+        return frames
+
+    def close(self) -> None:
+        """Releases the source."""
+        pass
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class AirSimSource(ImageSource):
+    """
+    Live frames from AirSim cameras.
+
+    `read` returns the frame of the first camera through the robust `get_image`
+    path; `read_batch` fetches one frame from each camera in a single
+    `simGetImages` call.
+
+    Args:
+        client: AirSim CarClient object.
+        cameras (tuple, optional): Camera names. Defaults to ("0",).
+        vehicle_name (str, optional): Vehicle owning the cameras. Defaults to the first vehicle.
+        compress (bool or str, optional): Passed to `get_image`. Defaults to "auto".
+    """
+
+    def __init__(self, client, cameras: tuple = ("0",), vehicle_name: str = '', compress="auto"):
+        self.client = client
+        self.cameras = tuple(cameras)
+        self.vehicle_name = vehicle_name
+        self.compress = compress
+
+    def read(self) -> Optional[np.ndarray]:
+        from utils.robust_image import default_retry_policy, get_image
+        return get_image(self.client, camera=self.cameras[0], compress=self.compress,
+                         vehicle_name=self.vehicle_name, policy=default_retry_policy())
+
+    def read_batch(self, size: int = None) -> list:
+        """
+        Fetches one compressed frame per camera in one RPC.
+
+        Args:
+            size (int, optional): Ignored; the batch is one frame per camera.
+
+        Returns:
+            list: The decoded frames, in camera order; frames that failed to decode are skipped.
+        """
+        import airsim
+        try:
+            responses = self.client.simGetImages(
+                [airsim.ImageRequest(camera, airsim.ImageType.Scene, False, True) for camera in self.cameras],
+                self.vehicle_name)
+        except Exception as e:
+            logger.error("Batched image retrieval failed: %s", e)
+            return []
+        frames = []
+        for response in responses or []:
+            if not response.image_data_uint8:
+                continue
+            frame = cv2.imdecode(np.frombuffer(response.image_data_uint8, np.uint8), cv2.IMREAD_COLOR)
+            if frame is not None:
+                frames.append(frame)
+        return frames
+
+    def __iter__(self):
+        # A live source never ends; failed grabs are skipped.
+        while True:
+            frame = self.read()
+            if frame is not None:
+                yield frame
+
+
+class VideoSource(ImageSource):
+    """
+    Frames from a video file.
+
+    Args:
+        path (str): Path to the video.
+        loop (bool, optional): Restart at the end of the file. Defaults to False.
+    """
+
+    def __init__(self, path: str, loop: bool = False):
+        self.path = path
+        self.loop = loop
+        self._capture = cv2.VideoCapture(path)
+        if not self._capture.isOpened():
+            raise IOError(f"Cannot open video '{path}'")
+
+    def read(self) -> Optional[np.ndarray]:
+        ok, frame = self._capture.read()
+        if not ok and self.loop:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self._capture.read()
+        return frame if ok else None
+
+    def close(self) -> None:
+        self._capture.release()
+
+
+class DirectorySource(ImageSource):
+    """
+    Frames from the PNG/JPEG images of a directory, in file name order.
+
+    Args:
+        path (str): The directory.
+        loop (bool, optional): Restart after the last image. Defaults to False.
+    """
+
+    def __init__(self, path: str, loop: bool = False):
+        self.files = sorted(f for f in glob.glob(os.path.join(path, '*')) if f.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.files:
+            raise IOError(f"No images found in '{path}'")
+        self.loop = loop
+        self._index = 0
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def read(self) -> Optional[np.ndarray]:
+        while True:
+            if self._index >= len(self.files):
+                if not self.loop:
+                    return None
+                self._index = 0
+            path = self.files[self._index]
+            self._index += 1
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is not None:
+                return frame
+            logger.warning("Skipping unreadable image '%s'", path)
+
+
+class MemmapSource(ImageSource):
+    """
+    Frames from an (N, H, W, 3) uint8 `.npy` recording, memory-mapped.
+
+    Frames are read-only views into the file; copy one before drawing on it.
+
+    Args:
+        path (str): Path to the `.npy` file (see `record_frames`).
+        loop (bool, optional): Restart after the last frame. Defaults to False.
+    """
+
+    def __init__(self, path: str, loop: bool = False):
+        self.frames = np.load(path, mmap_mode='r')
+        if self.frames.ndim != 4:
+            raise ValueError(f"Expected an (N, H, W, C) array in '{path}', got shape {self.frames.shape}")
+        self.loop = loop
+        self._index = 0
+
+    def __len__(self) -> int:
+        return 0 if self.frames is None else len(self.frames)
+
+    def read(self) -> Optional[np.ndarray]:
+        if self.frames is None:
+            return None
+        if self._index >= len(self.frames):
+            if not self.loop or len(self.frames) == 0:
+                return None
+            self._index = 0
+        frame = self.frames[self._index]
+        self._index += 1
+        return frame
+
+    def read_batch(self, size: int) -> list:
+        if self.frames is None:
+            return []
+        end = min(self._index + size, len(self.frames))
+        frames = list(self.frames[self._index:end])
+        self._index = end
+        if len(frames) < size and self.loop and len(self.frames):
+            self._index = 0
+            frames += self.read_batch(size - len(frames))
+        return frames
+
+    def close(self) -> None:
+        # Drop our reference to the mapping; it is unmapped once frames handed out
+        # by read() are released too, after which the file can be replaced.
+        self.frames = None
+
+
+def open_source(spec: str, client=None, loop: bool = False, **kwargs) -> ImageSource:
+    """
+    Opens a source from a string.
+
+    Args:
+        spec (str): "airsim" for the live simulator (requires `client`), a directory,
+            a `.npy` recording, or a video file.
+        client (optional): AirSim CarClient for the "airsim" source. Defaults to None.
+        loop (bool, optional): Loop offline sources. Defaults to False.
+        **kwargs: Extra arguments for `AirSimSource`.
+
+    Returns:
+        ImageSource: The opened source.
+    """
+    if spec == "airsim":
+        if client is None:
+            raise ValueError("The airsim source needs a client")
+        return AirSimSource(client, **kwargs)
+    if os.path.isdir(spec):
+        return DirectorySource(spec, loop)
+    if spec.endswith('.npy'):
+        return MemmapSource(spec, loop)
+    return VideoSource(spec, loop)
+
+
+def record_frames(source: ImageSource, path: str, count: int) -> int:
+    """
+    Writes the next `count` frames of a source into a `.npy` file for `MemmapSource`.
+
+    All frames must have the shape of the first one.
+
+    Args:
+        source (ImageSource): The source to record.
+        path (str): Output `.npy` path.
+        count (int): Number of frames to record.
+
+    Returns:
+        int: Number of frames written (less than `count` if the source ended early).
+    """
+    first = source.read()
+    if first is None:
+        return 0
+    frames = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=(count,) + first.shape)
+    frames[0] = first
+    written = 1
+    while written < count:
+        frame = source.read()
+        if frame is None:
+            break
+        if frame.shape != first.shape:
+            logger.warning("Skipping frame of shape %s (recording is %s)", frame.shape, first.shape)
+            continue
+        frames[written] = frame
+        written += 1
+    frames.flush()
+    del frames
+    if written < count:
+        _truncate_npy(path, written)
+    return written
+
+
+def _truncate_npy(path: str, length: int) -> None:
+    """
+    Shortens the first axis of a C-ordered `.npy` file in place.
+
+    The shape in the header is rewritten within the header's existing length, so the
+    data offset does not move, and the file is cut after the first `length` rows.
+    Nothing is copied, however large the recording.
+
+    Args:
+        path (str): The `.npy` file.
+        length (int): The new length of the first axis; at most the current one.
+    """
+    with open(path, 'r+b') as f:
+        version = np.lib.format.read_magic(f)
+        header_start = f.tell()
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(f)
+        data_offset = f.tell()
+        size_bytes = 2 if version == (1, 0) else 4
+        header_len = data_offset - header_start - size_bytes
+
+        new_shape = (length,) + tuple(shape[1:])
+        header = "{'descr': %r, 'fortran_order': %r, 'shape': %r, }" % (
+            np.lib.format.dtype_to_descr(dtype), fortran_order, new_shape)
+        # The new shape never has more digits than the old one, so it fits; pad with
+        # spaces to keep the header length and the data alignment.
+        f.seek(header_start + size_bytes)
+        f.write(header.ljust(header_len - 1).encode('latin1') + b'\n')
+        f.truncate(data_offset + length * int(np.prod(shape[1:], dtype=np.int64)) * dtype.itemsize)
@@ -3,12 +3,10 @@ import airsim
 import numpy as np
 import cv2
 import time
-import logging
 from typing import Optional, Tuple
+from utils.hot_logging import get_logger
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 class ImageRetrievalError(Exception):
     """Custom exception for image retrieval errors"""
@@ -43,13 +41,13 @@ def get_image(
     # Validate camera name - common AirSim camera names
     valid_cameras = ["0", "1", "2", "3", "FrontCenter", "FrontLeft", "FrontRight", "BackCenter"]
     if camera not in valid_cameras:
-        logger.warning(f"Camera '{camera}' may not be valid. Valid cameras: {valid_cameras}")
+        logger.warning("Camera '%s' may not be valid. Valid cameras: %s", camera, valid_cameras)
     
     last_exception = None
     
     for attempt in range(retries):
         try:
-            logger.debug(f"Attempt {attempt + 1}/{retries} to get image from camera '{camera}'")
+            logger.debug("Attempt %d/%d to get image from camera '%s'", attempt + 1, retries, camera)
             
             # Get raw image data
             if compress:
@@ -91,12 +89,12 @@ def get_image(
             if len(img.shape) == 3 and img.shape[2] == 4:
                 img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
             
-            logger.debug(f"Successfully retrieved image: shape={img.shape}, dtype={img.dtype}")
+            logger.debug("Successfully retrieved image: shape=%s, dtype=%s", img.shape, img.dtype)
             return img
             
         except Exception as e:
             last_exception = e
-            logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
+            logger.warning("Attempt %d failed: %s", attempt + 1, e)
             
             if attempt < retries - 1:  # Don't sleep on last attempt
                 time.sleep(sleep_time)
@@ -108,7 +106,7 @@ def get_image(
     
     # All attempts failed
     error_msg = f"Failed to retrieve image after {retries} attempts. Last error: {str(last_exception)}"
-    logger.error(error_msg)
+    logger.error("%s", error_msg)
     raise ImageRetrievalError(error_msg)
 
 
@@ -140,7 +138,7 @@ def get_image_safe(
         return get_image(client, camera, image_type, retries, sleep_time, compress)
     except ImageRetrievalError as e:
         if return_none_on_error:
-            logger.error(f"Image retrieval failed, returning None: {str(e)}")
+            logger.error("Image retrieval failed, returning None: %s", e)
             return None
         else:
             raise
@@ -173,12 +171,12 @@ def validate_airsim_connection(client: airsim.CarClient, timeout: float = 5.0) -
                     return True
                     
             except Exception as e:
-                logger.debug(f"Connection validation attempt failed: {str(e)}")
+                logger.debug("Connection validation attempt failed: %s", e)
                 time.sleep(0.1)
         
         logger.error("AirSim connection validation timed out")
         return False
         
     except Exception as e:
-        logger.error(f"AirSim connection validation failed: {str(e)}")
+        logger.error("AirSim connection validation failed: %s", e)
         return False
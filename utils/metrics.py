@@ -0,0 +1,261 @@
+# utils/metrics.py
+"""
+Process-wide metrics with a Prometheus text endpoint.
+
+Counters, gauges and fixed-bucket histograms are created once, usually at module
+level, and updated from the hot paths; an update is a lock acquisition and an
+addition (plus a bisect for histograms). Values that already live elsewhere, such
+as the retry policy's statistics, are read only when the metrics are rendered,
+through collectors registered with `add_collector`.
+
+    from utils.metrics import default_registry
+
+    FETCH_SECONDS = default_registry().histogram(
+        'airsim_image_fetch_seconds', 'Image fetch and decode time', labels={'method': 'raw'})
+    FETCH_SECONDS.observe(elapsed)
+
+`serve()` exposes the registry on a localhost HTTP port (scrape `/metrics`) and
+`dump()` writes the same text to a file, e.g. at shutdown.
+"""
+
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans a fast sensor RPC up to a stalled image fetch.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_default_registry = None
+
+
+def _label_text(labels: dict) -> str:
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+
+def _value_text(value) -> str:
+    if isinstance(value, (bool, int)):
+        return str(int(value))
+    value = float(value)
+    if value != value:
+        return 'NaN'
+    if value in (float('inf'), float('-inf')):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+
+class Counter:
+    """A monotonically increasing value."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, labels: dict = None):
+        self.name = name
+        self.labels = dict(labels or {})
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def samples(self) -> list:
+        return [(self.name, self.labels, self.value)]
+
+
+class Gauge:
+    """A value that can go up and down."""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, labels: dict = None):
+        self.name = name
+        self.labels = dict(labels or {})
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def samples(self) -> list:
+        return [(self.name, self.labels, self.value)]
+
+
+class Histogram:
+    """
+    Counts observations into fixed cumulative buckets.
+
+    Args:
+        name (str): Metric name.
+        labels (dict, optional): Constant labels. Defaults to None.
+        buckets (tuple, optional): Increasing upper bounds. Defaults to `DEFAULT_BUCKETS`.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, labels: dict = None, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.labels = dict(labels or {})
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def samples(self) -> list:
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            samples.append((self.name + '_bucket', {**self.labels, 'le': le}, cumulative))
+        samples.append((self.name + '_sum', self.labels, total))
+        samples.append((self.name + '_count', self.labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Holds the metrics of a process and renders them in the Prometheus text format.
+
+    Metrics are identified by name and labels; asking for an existing one returns it,
+    so modules can declare their metrics independently.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._help = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _get(self, cls, name: str, help: str, labels: dict, **kwargs):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = self._metrics[key] = cls(name, labels, **kwargs)
+                self._help.setdefault(name, (cls.kind, help))
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric '{name}' is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name: str, help: str = '', labels: dict = None) -> Counter:
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str = '', labels: dict = None) -> Gauge:
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str = '', labels: dict = None, buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    def add_collector(self, fn) -> None:
+        """
+        Registers a callable run at render time.
+
+        Args:
+            fn: Returns an iterable of (name, kind, help, labels, value) samples, where
+                kind is 'counter' or 'gauge'.
+        """
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format."""
+        families = {}
+        with self._lock:
+            metrics = list(self._metrics.values())
+            meta = dict(self._help)
+        for metric in metrics:
+            families.setdefault(metric.name, []).extend(metric.samples())
+        for collector in list(self._collectors):
+            try:
+                for name, kind, help, labels, value in collector():
+                    meta.setdefault(name, (kind, help))
+                    families.setdefault(name, []).append((name, labels, value))
+            except Exception as e:
+                logger.error("Metrics collector %r failed: %s", collector, e)
+
+        lines = []
+        for name in sorted(families):
+            kind, help = meta[name]
+            if help:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in families[name]:
+                lines.append(f"{sample_name}{_label_text(labels)} {_value_text(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path: str) -> None:
+        """Writes the rendered metrics to a file."""
+        with open(path, 'w') as f:
+            f.write(self.render())
+
+    def serve(self, port: int = 9108, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """
+        Serves the metrics over HTTP from a daemon thread.
+
+        Args:
+            port (int, optional): Port to listen on; 0 picks a free one. Defaults to 9108.
+            host (str, optional): Interface to bind. Defaults to localhost only.
+
+        Returns:
+            ThreadingHTTPServer: The server; `server_address` holds the bound port.
+        """
+        if self._server is not None:
+            return self._server
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("metrics %s - %s", self.address_string(), format % args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info("Serving metrics on http://%s:%d/metrics", *self._server.server_address[:2])
+        return self._server
+
+    def stop(self) -> None:
+        """Stops the HTTP server, if running."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def default_registry() -> MetricsRegistry:
+    """Returns the process-wide metrics registry, creating it on first use."""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = MetricsRegistry()
+    return _default_registry
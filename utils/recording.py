@@ -0,0 +1,447 @@
+# utils/recording.py
+"""
+Session recording and deterministic replay.
+
+`RecordingClient` wraps an `airsim.CarClient` and logs, with timestamps, every
+car state, distance sensor reading, captured image and issued `CarControls` to a
+session directory:
+
+    meta.json          names table and frame chunk list
+    frames_00000.bin   append-only image payloads, rolled over every `chunk_bytes`
+    images.npz         frame index (chunk, offset, length, request fields) per image
+    states.npz         car state columns
+    sensors.npz        distance sensor columns
+    controls.npz       issued control columns
+
+`ReplayClient` implements the same methods over a recording. Every stream
+(states and image calls per vehicle, readings per vehicle and sensor) is replayed
+in the recorded call order, with frames re-encoded if the replayed code asks for
+the other format than was recorded, so `control_vehicle` and the perception code see
+exactly the inputs of the original drive and can be re-run and profiled offline.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+import airsim
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STATE_COLUMNS = ('t', 'source', 'vehicle', 'timestamp', 'x', 'y', 'z', 'qw', 'qx', 'qy', 'qz',
+                 'vx', 'vy', 'vz', 'speed', 'gear', 'rpm', 'maxrpm', 'handbrake')
+SENSOR_COLUMNS = ('t', 'source', 'vehicle', 'sensor', 'time_stamp', 'distance', 'min_distance', 'max_distance')
+CONTROL_COLUMNS = ('t', 'source', 'vehicle', 'throttle', 'steering', 'brake', 'handbrake', 'is_manual_gear', 'manual_gear')
+IMAGE_COLUMNS = ('t', 'source', 'vehicle', 'call', 'single', 'camera', 'image_type', 'pixels_as_float', 'compress',
+                 'width', 'height', 'time_stamp', 'chunk', 'offset', 'length')
+
+_INT_COLUMNS = {'source', 'vehicle', 'sensor', 'call', 'single', 'camera', 'image_type', 'pixels_as_float', 'compress',
+                'width', 'height', 'chunk', 'offset', 'length', 'gear', 'handbrake', 'is_manual_gear',
+                'manual_gear', 'timestamp', 'time_stamp'}
+
+
+class ReplayFinished(Exception):
+    """Raised when a replayed stream has no more recorded calls."""
+    pass
+
+
+class SessionRecorder:
+    """
+    Writes a session directory.
+
+    Safe to share between threads, e.g. the control loop and the safety watchdog.
+    Anything JSON-serializable put in `meta` (e.g. the planned path) is saved with
+    the session.
+
+    Args:
+        path (str): Session directory; created if missing.
+        chunk_bytes (int, optional): Size at which a new frame chunk file is started.
+            Defaults to 256 MiB.
+    """
+
+    def __init__(self, path: str, chunk_bytes: int = 256 * 1024 * 1024):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_bytes = chunk_bytes
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._names = {}
+        self._tables = {name: defaultdict(list) for name in ('states', 'sensors', 'controls', 'images')}
+        self._calls = 0
+        self._chunks = []
+        self._chunk_file = None
+        self._chunk_size = 0
+        self.closed = False
+        self.meta = {}
+
+    def _now(self) -> float:
+        return time.monotonic() - self._start
+
+    def _name(self, name: str) -> int:
+        return self._names.setdefault(name, len(self._names))
+
+    def _append(self, table: str, row: dict) -> None:
+        columns = self._tables[table]
+        for key, value in row.items():
+            columns[key].append(value)
+
+    def _write_frame(self, data: bytes) -> tuple:
+        if self._chunk_file is None or self._chunk_size + len(data) > self.chunk_bytes and self._chunk_size:
+            if self._chunk_file is not None:
+                self._chunk_file.close()
+            name = f"frames_{len(self._chunks):05d}.bin"
+            self._chunks.append(name)
+            self._chunk_file = open(os.path.join(self.path, name), 'wb')
+            self._chunk_size = 0
+        offset = self._chunk_size
+        self._chunk_file.write(data)
+        self._chunk_size += len(data)
+        return len(self._chunks) - 1, offset, len(data)
+
+    def record_state(self, source: str, vehicle_name: str, state) -> float:
+        """Logs one `getCarState` result and returns its session time."""
+        k = state.kinematics_estimated
+        row = {
+            't': self._now(), 'timestamp': int(getattr(state, 'timestamp', 0)),
+            'x': k.position.x_val, 'y': k.position.y_val, 'z': k.position.z_val,
+            'qw': k.orientation.w_val, 'qx': k.orientation.x_val, 'qy': k.orientation.y_val, 'qz': k.orientation.z_val,
+            'vx': k.linear_velocity.x_val, 'vy': k.linear_velocity.y_val, 'vz': k.linear_velocity.z_val,
+            'speed': state.speed, 'gear': int(state.gear), 'rpm': state.rpm, 'maxrpm': state.maxrpm,
+            'handbrake': int(bool(state.handbrake)),
+        }
+        with self._lock:
+            if not self.closed:
+                row['source'] = self._name(source)
+                row['vehicle'] = self._name(vehicle_name)
+                self._append('states', row)
+        return row['t']
+
+    def record_sensor(self, source: str, vehicle_name: str, sensor_name: str, data) -> None:
+        """Logs one `getDistanceSensorData` result."""
+        row = {'t': self._now(), 'time_stamp': int(data.time_stamp), 'distance': data.distance,
+               'min_distance': data.min_distance, 'max_distance': data.max_distance}
+        with self._lock:
+            if self.closed:
+                return
+            row['source'] = self._name(source)
+            row['vehicle'] = self._name(vehicle_name)
+            row['sensor'] = self._name(sensor_name)
+            self._append('sensors', row)
+
+    def record_controls(self, source: str, vehicle_name: str, controls) -> None:
+        """Logs one `setCarControls` call."""
+        row = {'t': self._now(), 'throttle': controls.throttle, 'steering': controls.steering,
+               'brake': controls.brake, 'handbrake': int(bool(controls.handbrake)),
+               'is_manual_gear': int(bool(controls.is_manual_gear)), 'manual_gear': int(controls.manual_gear)}
+        with self._lock:
+            if self.closed:
+                return
+            row['source'] = self._name(source)
+            row['vehicle'] = self._name(vehicle_name)
+            self._append('controls', row)
+
+    def record_images(self, source: str, vehicle_name: str, requests: list, responses: list) -> None:
+        """Logs one `simGetImages` call; every response becomes one frame record."""
+        t = self._now()
+        with self._lock:
+            if self.closed:
+                return
+            call = self._calls
+            self._calls += 1
+            for request, response in zip(requests, responses):
+                if response.pixels_as_float:
+                    payload = np.asarray(response.image_data_float, dtype=np.float32).tobytes()
+                else:
+                    payload = bytes(response.image_data_uint8)
+                chunk, offset, length = self._write_frame(payload)
+                self._append('images', {
+                    't': t, 'source': self._name(source), 'vehicle': self._name(vehicle_name), 'call': call, 'single': 0,
+                    'camera': self._name(str(request.camera_name)), 'image_type': int(request.image_type),
+                    'pixels_as_float': int(bool(response.pixels_as_float)), 'compress': int(bool(response.compress)),
+                    'width': response.width, 'height': response.height, 'time_stamp': int(response.time_stamp),
+                    'chunk': chunk, 'offset': offset, 'length': length,
+                })
+
+    def record_image(self, source: str, vehicle_name: str, camera_name: str, image_type, data) -> None:
+        """Logs one `simGetImage` call."""
+        t = self._now()
+        with self._lock:
+            if self.closed:
+                return
+            call = self._calls
+            self._calls += 1
+            chunk, offset, length = self._write_frame(bytes(data or b''))
+            self._append('images', {
+                't': t, 'source': self._name(source), 'vehicle': self._name(vehicle_name), 'call': call, 'single': 1,
+                'camera': self._name(str(camera_name)), 'image_type': int(image_type), 'pixels_as_float': 0,
+                'compress': 1, 'width': 0, 'height': 0, 'time_stamp': 0,
+                'chunk': chunk, 'offset': offset, 'length': length,
+            })
+
+    def close(self) -> None:
+        """
+        Writes the index, the scalar columns and the metadata.
+
+        Calls recorded after this, e.g. by a control thread still running after a
+        KeyboardInterrupt, are ignored.
+        """
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            if self._chunk_file is not None:
+                self._chunk_file.close()
+            for table, columns in (('states', STATE_COLUMNS), ('sensors', SENSOR_COLUMNS),
+                                   ('controls', CONTROL_COLUMNS), ('images', IMAGE_COLUMNS)):
+                data = self._tables[table]
+                np.savez(os.path.join(self.path, f"{table}.npz"),
+                         **{c: np.asarray(data[c], dtype=np.int64 if c in _INT_COLUMNS else np.float64)
+                            for c in columns})
+            names = sorted(self._names, key=self._names.get)
+            with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+                json.dump({'names': names, 'chunks': self._chunks, 'duration_s': self._now(), 'session': self.meta},
+                      f, indent=2)
+
+
+class RecordingClient:
+    """
+    CarClient wrapper that records through a `SessionRecorder`.
+
+    Recorded methods are passed through and logged; every other attribute is
+    forwarded to the wrapped client unchanged. Each connection of a drive (e.g. the
+    control loop and the safety watchdog) should use its own `source` so their
+    calls replay as separate streams.
+
+    Args:
+        client: The airsim.CarClient to wrap.
+        recorder (SessionRecorder): Where to log.
+        source (str, optional): Name of the stream this client's calls belong to.
+            Defaults to 'control'.
+    """
+
+    def __init__(self, client, recorder: SessionRecorder, source: str = 'control'):
+        self.client = client
+        self.recorder = recorder
+        self.source = source
+        self._state_time = 0.0
+
+    def clock(self) -> float:
+        """Returns the session time of this client's latest `getCarState`, the `clock` for `control_vehicle`."""
+        return self._state_time
+
+    def getCarState(self, vehicle_name: str = ''):
+        state = self.client.getCarState(vehicle_name)
+        self._state_time = self.recorder.record_state(self.source, vehicle_name, state)
+        return state
+
+    def getDistanceSensorData(self, distance_sensor_name: str = '', vehicle_name: str = ''):
+        data = self.client.getDistanceSensorData(distance_sensor_name=distance_sensor_name, vehicle_name=vehicle_name)
+        self.recorder.record_sensor(self.source, vehicle_name, distance_sensor_name, data)
+        return data
+
+    def simGetImages(self, requests, vehicle_name: str = '', external: bool = False):
+        responses = self.client.simGetImages(requests, vehicle_name, external)
+        if responses:
+            self.recorder.record_images(self.source, vehicle_name, requests, responses)
+        return responses
+
+    def simGetImage(self, camera_name, image_type, vehicle_name: str = '', external: bool = False):
+        data = self.client.simGetImage(camera_name, image_type, vehicle_name, external)
+        self.recorder.record_image(self.source, vehicle_name, camera_name, image_type, data)
+        return data
+
+    def setCarControls(self, controls, vehicle_name: str = ''):
+        self.recorder.record_controls(self.source, vehicle_name, controls)
+        return self.client.setCarControls(controls, vehicle_name)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class Recording:
+    """
+    Read access to a session directory.
+
+    Scalar tables are loaded as dicts of column arrays; frame chunks are memory-mapped.
+
+    Args:
+        path (str): The session directory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.names = meta['names']
+        self.duration_s = meta.get('duration_s')
+        self.meta = meta.get('session', {})
+        self._ids = {name: i for i, name in enumerate(self.names)}
+        self.tables = {}
+        for table in ('states', 'sensors', 'controls', 'images'):
+            with np.load(os.path.join(path, f"{table}.npz")) as data:
+                self.tables[table] = {key: data[key] for key in data.files}
+        self._chunks = [np.memmap(os.path.join(path, name), dtype=np.uint8, mode='r')
+                        if os.path.getsize(os.path.join(path, name)) else np.empty(0, np.uint8)
+                        for name in meta['chunks']]
+
+    def name_id(self, name: str) -> int:
+        """Returns the id of a vehicle, sensor or camera name, or -1 if it was never recorded."""
+        return self._ids.get(name, -1)
+
+    def frame(self, index: int) -> np.ndarray:
+        """Returns the payload of an image record as a read-only uint8 view."""
+        images = self.tables['images']
+        chunk, offset, length = images['chunk'][index], images['offset'][index], images['length'][index]
+        return self._chunks[chunk][offset:offset + length]
+
+
+class ReplayClient:
+    """
+    Stands in for `airsim.CarClient` by replaying a `Recording`.
+
+    Issued controls are not sent anywhere; they are collected in `issued_controls`
+    so a re-run can be compared with the recorded `controls` table. `clock` and
+    `mpc_seed` are meant for the matching `control_vehicle` arguments: time follows
+    the recorded state times, so the controller sees the same tick intervals.
+
+    Args:
+        recording (Recording or str): The recording or its directory.
+        source (str, optional): The recorded stream to replay. Defaults to 'control'.
+    """
+
+    def __init__(self, recording, source: str = 'control'):
+        self.recording = recording if isinstance(recording, Recording) else Recording(recording)
+        self.source = self.recording.name_id(source)
+        self.mpc_seed = self.recording.meta.get('mpc_seed')
+        self.issued_controls = []
+        self._cursors = defaultdict(int)
+        self._streams = {}
+        self._state_time = 0.0
+
+    def clock(self) -> float:
+        """Returns the recorded session time of the latest replayed car state."""
+        return self._state_time
+
+    def _stream(self, key: tuple, table: str, mask_fn) -> np.ndarray:
+        if key not in self._streams:
+            columns = self.recording.tables[table]
+            self._streams[key] = np.flatnonzero(mask_fn(columns) & (columns['source'] == self.source))
+        return self._streams[key]
+
+    def _next(self, key: tuple, table: str, mask_fn) -> int:
+        rows = self._stream(key, table, mask_fn)
+        cursor = self._cursors[key]
+        if cursor >= len(rows):
+            raise ReplayFinished(f"No more recorded {table} for {key[1:]}")
+        self._cursors[key] = cursor + 1
+        return int(rows[cursor])
+
+    def getCarState(self, vehicle_name: str = ''):
+        vehicle = self.recording.name_id(vehicle_name)
+        row = self._next(('states', vehicle), 'states', lambda t: t['vehicle'] == vehicle)
+        c = {k: v[row] for k, v in self.recording.tables['states'].items()}
+        self._state_time = float(c['t'])
+        state = airsim.CarState()
+        state.speed = float(c['speed'])
+        state.gear = int(c['gear'])
+        state.rpm = float(c['rpm'])
+        state.maxrpm = float(c['maxrpm'])
+        state.handbrake = bool(c['handbrake'])
+        state.timestamp = int(c['timestamp'])
+        kinematics = airsim.KinematicsState()
+        kinematics.position = airsim.Vector3r(float(c['x']), float(c['y']), float(c['z']))
+        kinematics.orientation = airsim.Quaternionr(float(c['qx']), float(c['qy']), float(c['qz']), float(c['qw']))
+        kinematics.linear_velocity = airsim.Vector3r(float(c['vx']), float(c['vy']), float(c['vz']))
+        state.kinematics_estimated = kinematics
+        return state
+
+    def getDistanceSensorData(self, distance_sensor_name: str = '', vehicle_name: str = ''):
+        vehicle = self.recording.name_id(vehicle_name)
+        sensor = self.recording.name_id(distance_sensor_name)
+        row = self._next(('sensors', vehicle, sensor), 'sensors',
+                         lambda t: (t['vehicle'] == vehicle) & (t['sensor'] == sensor))
+        c = {k: v[row] for k, v in self.recording.tables['sensors'].items()}
+        data = airsim.DistanceSensorData()
+        data.time_stamp = int(c['time_stamp'])
+        data.distance = float(c['distance'])
+        data.min_distance = float(c['min_distance'])
+        data.max_distance = float(c['max_distance'])
+        return data
+
+    def _next_call(self, vehicle_name: str) -> range:
+        """Returns the rows of the next recorded image call of a vehicle, `simGetImage` or `simGetImages`."""
+        vehicle = self.recording.name_id(vehicle_name)
+        images = self.recording.tables['images']
+        first = self._next(('images', vehicle), 'images',
+                           lambda t: (t['vehicle'] == vehicle) & np.r_[True, t['call'][1:] != t['call'][:-1]])
+        last = first + 1
+        while last < len(images['call']) and images['call'][last] == images['call'][first]:
+            last += 1
+        return range(first, last)
+
+    def _convert(self, row: int, compress: bool) -> bytes:
+        """Returns a uint8 payload in the requested format, re-encoding if it was recorded in the other one."""
+        images = self.recording.tables['images']
+        payload = self.recording.frame(row)
+        recorded_compressed = bool(images['compress'][row]) or bool(images['single'][row])
+        if recorded_compressed == compress:
+            return payload.tobytes()
+        if compress:
+            width, height = int(images['width'][row]), int(images['height'][row])
+            return cv2.imencode('.png', payload.reshape(height, width, -1))[1].tobytes()
+        return cv2.imdecode(payload, cv2.IMREAD_COLOR).tobytes()
+
+    def simGetImages(self, requests, vehicle_name: str = '', external: bool = False):
+        images = self.recording.tables['images']
+        rows = self._next_call(vehicle_name)
+        if len(rows) != len(requests):
+            logger.warning("Replayed call has %d images for %d requests", len(rows), len(requests))
+        responses = []
+        for request, row in zip(requests, rows):
+            response = airsim.ImageResponse()
+            response.width = int(images['width'][row])
+            response.height = int(images['height'][row])
+            response.image_type = int(images['image_type'][row])
+            response.pixels_as_float = bool(images['pixels_as_float'][row])
+            response.compress = bool(request.compress)
+            response.time_stamp = int(images['time_stamp'][row])
+            response.camera_name = self.recording.names[images['camera'][row]]
+            if response.pixels_as_float:
+                response.image_data_float = self.recording.frame(row).view(np.float32)
+                response.image_data_uint8 = b''
+            else:
+                response.image_data_uint8 = self._convert(row, response.compress)
+                if not response.compress and images['single'][row]:
+                    # simGetImage records carry no size; take it from the decoded frame.
+                    decoded = cv2.imdecode(self.recording.frame(row), cv2.IMREAD_COLOR)
+                    response.height, response.width = decoded.shape[:2]
+                response.image_data_float = []
+            responses.append(response)
+        return responses
+
+    def simGetImage(self, camera_name, image_type, vehicle_name: str = '', external: bool = False):
+        return self._convert(self._next_call(vehicle_name)[0], True)
+
+    def setCarControls(self, controls, vehicle_name: str = ''):
+        self.issued_controls.append((vehicle_name, controls.throttle, controls.steering, controls.brake))
+
+    def confirmConnection(self):
+        pass
+
+    def enableApiControl(self, is_enabled: bool, vehicle_name: str = ''):
+        pass
+
+    def isApiControlEnabled(self, vehicle_name: str = '') -> bool:
+        return True
+
+    def reset(self):
+        self._cursors.clear()
+        self._state_time = 0.0
+
+    def simSetSegmentationObjectID(self, mesh_name, object_id, is_name_regex: bool = False) -> bool:
+        return True
@@ -0,0 +1,179 @@
+# utils/retry.py
+"""
+Retry policy with a deadline, jittered exponential backoff and a circuit breaker.
+
+A `RetryPolicy` is long-lived: it remembers how every method (e.g. the compressed
+and raw image paths) has been doing and uses that to order the methods of the
+next call. After `failure_threshold` consecutive failures the breaker opens and
+calls fail immediately with `CircuitOpenError` until the cool-down has passed;
+the first call after that is a trial that closes the breaker again on success.
+"""
+
+import random
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open."""
+    pass
+
+
+class RetryPolicy:
+    """
+    Shared retry state for calls to a flaky service.
+
+    Args:
+        retries (int, optional): Most attempts per call. Defaults to 3.
+        deadline (float, optional): Time budget per call in seconds; no new attempt
+            starts after it. Defaults to 0.25.
+        base_delay (float, optional): Backoff ceiling for the first retry, seconds. Defaults to 0.01.
+        max_delay (float, optional): Largest backoff, seconds. Defaults to 0.1.
+        failure_threshold (int, optional): Consecutive failures that open the breaker. Defaults to 5.
+        cooldown (float, optional): Seconds the breaker stays open. Defaults to 1.
+        min_success_rate (float, optional): Methods below this smoothed success rate are
+            tried after the healthy ones. Defaults to 0.5.
+        smoothing (float, optional): Weight of the newest sample in the moving averages. Defaults to 0.2.
+        seed (int, optional): Seed for the backoff jitter. Defaults to None.
+    """
+
+    def __init__(self, retries: int = 3, deadline: float = 0.25, base_delay: float = 0.01, max_delay: float = 0.1,
+                 failure_threshold: int = 5, cooldown: float = 1.0, min_success_rate: float = 0.5,
+                 smoothing: float = 0.2, seed: int = None):
+        self.retries = retries
+        self.deadline = deadline
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.min_success_rate = min_success_rate
+        self.smoothing = smoothing
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.methods = {}
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.rejected = 0
+
+    def backoff(self, attempt: int) -> float:
+        """Returns a full-jitter delay for the given retry attempt (0-based)."""
+        return self._rng.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def allow(self) -> bool:
+        """Checks whether the breaker lets a call through."""
+        return time.monotonic() >= self.open_until
+
+    @property
+    def is_open(self) -> bool:
+        return not self.allow()
+
+    def record(self, method: str, ok: bool, latency: float) -> None:
+        """
+        Records the outcome of one attempt.
+
+        Args:
+            method (str): The method that was attempted.
+            ok (bool): Whether it succeeded.
+            latency (float): How long the attempt took, seconds.
+        """
+        with self._lock:
+            stats = self.methods.setdefault(method, {'attempts': 0, 'successes': 0, 'failures': 0,
+                                                     'success_rate': 1.0, 'latency': None})
+            stats['attempts'] += 1
+            a = self.smoothing
+            stats['success_rate'] = (1 - a) * stats['success_rate'] + a * (1.0 if ok else 0.0)
+            if ok:
+                stats['successes'] += 1
+                stats['latency'] = latency if stats['latency'] is None else (1 - a) * stats['latency'] + a * latency
+                self.consecutive_failures = 0
+            else:
+                stats['failures'] += 1
+                self.consecutive_failures += 1
+                if self.consecutive_failures >= self.failure_threshold:
+                    self.open_until = time.monotonic() + self.cooldown
+
+    def order(self, methods: tuple, preferred: str = None) -> list:
+        """
+        Orders methods for the next call.
+
+        The preferred method goes first while it is healthy; the rest follow by
+        expected cost (latency divided by success rate), unhealthy methods last.
+
+        Args:
+            methods (tuple): The available methods.
+            preferred (str, optional): The method to use when it is healthy. Defaults to None.
+
+        Returns:
+            list: The methods in the order to try them.
+        """
+        def cost(method):
+            stats = self.methods.get(method)
+            if stats is None or stats['latency'] is None:
+                return (0, 0.0)
+            healthy = stats['success_rate'] >= self.min_success_rate
+            return (0 if healthy else 1, stats['latency'] / max(stats['success_rate'], 1e-3))
+
+        ordered = sorted(methods, key=cost)
+        if preferred in methods and cost(preferred)[0] == 0:
+            ordered.remove(preferred)
+            ordered.insert(0, preferred)
+        return ordered
+
+    def call(self, fn, methods: tuple = (None,), preferred: str = None):
+        """
+        Calls `fn(method)` until it succeeds, the attempts or deadline run out, or the breaker opens.
+
+        Attempts cycle through the methods in `order`.
+
+        Args:
+            fn: The callable; it receives the method and raises on failure.
+            methods (tuple, optional): The methods to choose from. Defaults to (None,).
+            preferred (str, optional): See `order`. Defaults to None.
+
+        Returns:
+            The result of the first successful attempt.
+
+        Raises:
+            CircuitOpenError: If the breaker is open.
+            Exception: The last attempt's error if every attempt failed.
+        """
+        if not self.allow():
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit open for another {self.open_until - time.monotonic():.2f}s")
+
+        deadline = time.monotonic() + self.deadline
+        order = self.order(methods, preferred)
+        last_error = None
+        for attempt in range(self.retries):
+            method = order[attempt % len(order)]
+            start = time.monotonic()
+            try:
+                result = fn(method)
+            except Exception as e:
+                self.record(method, False, time.monotonic() - start)
+                last_error = e
+            else:
+                self.record(method, True, time.monotonic() - start)
+                return result
+
+            if not self.allow() or attempt == self.retries - 1:
+                break
+            delay = self.backoff(attempt)
+            if time.monotonic() + delay >= deadline:
+                break
+            time.sleep(delay)
+        raise last_error
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Breaker state ('open', 'consecutive_failures', 'rejected') and a
+                  copy of the per-method stats under 'methods'.
+        """
+        with self._lock:
+            return {
+                'open': self.is_open,
+                'consecutive_failures': self.consecutive_failures,
+                'rejected': self.rejected,
+                'methods': {name: dict(stats) for name, stats in self.methods.items()},
+            }
@@ -10,23 +10,245 @@ import airsim
 import numpy as np
 import cv2
 import time
-import logging
-from typing import Optional
+from typing import Optional, Union
 
-# Configure logging
-logger = logging.getLogger(__name__)
+from utils.retry import CircuitOpenError, RetryPolicy
+from utils import tracing
+from utils.hot_logging import get_logger
+from utils.metrics import default_registry
+
+logger = get_logger(__name__)
 
 class ImageRetrievalError(Exception):
     """Custom exception for image retrieval failures."""
     pass
 
 
+METHODS = ("compressed", "uncompressed", "raw")
+
+_default_policy = None
+_default_selector = None
+
+_fetch_seconds = {
+    method: default_registry().histogram('airsim_image_fetch_seconds', 'Successful image fetch and decode time',
+                                         labels={'method': method})
+    for method in METHODS
+}
+
+
+class FormatSelector:
+    """
+    Picks the capture format with the lowest measured fetch+decode time.
+
+    The current format is used for every call except every `probe_interval`-th,
+    which measures one of the other formats instead. A format only takes over
+    when its smoothed time is below the current one by more than `hysteresis`.
+
+    Args:
+        formats (tuple, optional): Formats to choose from. Defaults to ("compressed", "uncompressed").
+        probe_interval (int, optional): Calls between probes. Defaults to 50.
+        hysteresis (float, optional): Relative margin required to switch. Defaults to 0.15.
+        min_samples (int, optional): Samples a format needs before it can take over. Defaults to 3.
+        smoothing (float, optional): Weight of the newest sample in the moving averages. Defaults to 0.2.
+    """
+
+    def __init__(self, formats: tuple = ("compressed", "uncompressed"), probe_interval: int = 50,
+                 hysteresis: float = 0.15, min_samples: int = 3, smoothing: float = 0.2):
+        self.formats = tuple(formats)
+        self.probe_interval = probe_interval
+        self.hysteresis = hysteresis
+        self.min_samples = min_samples
+        self.smoothing = smoothing
+        self.current = self.formats[0]
+        self.switches = 0
+        self.calls = 0
+        self._probe = 0
+        self.timings = {fmt: {'samples': 0, 'seconds': None} for fmt in self.formats}
+
+    def next_format(self) -> str:
+        """Returns the format to use for the next capture."""
+        self.calls += 1
+        others = [fmt for fmt in self.formats if fmt != self.current]
+        # Measure every format a few times up front, then probe periodically.
+        unmeasured = [fmt for fmt in others if self.timings[fmt]['samples'] < self.min_samples]
+        if self.timings[self.current]['samples'] >= self.min_samples and unmeasured:
+            return unmeasured[0]
+        if others and self.calls % self.probe_interval == 0:
+            self._probe += 1
+            return others[self._probe % len(others)]
+        return self.current
+
+    def record(self, fmt: str, seconds: float) -> None:
+        """
+        Records the fetch+decode time of a successful capture and switches formats if warranted.
+
+        Args:
+            fmt (str): The format used.
+            seconds (float): The measured time.
+        """
+        timing = self.timings.get(fmt)
+        if timing is None:
+            return
+        timing['samples'] += 1
+        timing['seconds'] = seconds if timing['seconds'] is None else \
+            (1 - self.smoothing) * timing['seconds'] + self.smoothing * seconds
+
+        current = self.timings[self.current]
+        if fmt == self.current or timing['samples'] < self.min_samples or current['samples'] < self.min_samples:
+            return
+        if timing['seconds'] < current['seconds'] * (1.0 - self.hysteresis):
+            logger.info("Switching capture format from %s to %s (%.1f ms -> %.1f ms)",
+                        self.current, fmt, current['seconds'] * 1000, timing['seconds'] * 1000)
+            self.current = fmt
+            self.switches += 1
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: The current format, number of switches, and per-format sample count
+                  and smoothed fetch+decode time in milliseconds.
+        """
+        return {
+            'current': self.current,
+            'switches': self.switches,
+            'formats': {fmt: {'samples': t['samples'],
+                              'mean_ms': None if t['seconds'] is None else t['seconds'] * 1000.0}
+                        for fmt, t in self.timings.items()},
+        }
+
+
+def default_format_selector() -> FormatSelector:
+    """Returns the process-wide selector used by `get_image(compress="auto")`."""
+    global _default_selector
+    if _default_selector is None:
+        _default_selector = FormatSelector()
+    return _default_selector
+
+
+def default_retry_policy() -> RetryPolicy:
+    """
+    Returns the process-wide retry policy for image retrieval, creating it on first use.
+
+    Sharing one policy lets the circuit breaker and method statistics span calls.
+    """
+    global _default_policy
+    if _default_policy is None:
+        _default_policy = RetryPolicy()
+    return _default_policy
+
+
+
+def _collect_capture_metrics():
+    """Reports the shared retry policy and format selector statistics to the metrics registry."""
+    if _default_policy is not None:
+        stats = _default_policy.stats()
+        yield ('image_circuit_open', 'gauge', 'Whether the image capture circuit breaker is open',
+               {}, float(stats['open']))
+        yield ('image_circuit_rejected_total', 'counter', 'Image captures rejected by the open circuit breaker',
+               {}, stats['rejected'])
+        for method, m in stats['methods'].items():
+            yield ('image_attempts_total', 'counter', 'Image fetch attempts within the retry policy',
+                   {'method': method}, m['attempts'])
+            yield ('image_failures_total', 'counter', 'Failed image fetch attempts within the retry policy',
+                   {'method': method}, m['failures'])
+    if _default_selector is not None:
+        yield ('image_format_switches_total', 'counter', 'Capture format switches by the format selector',
+               {}, _default_selector.switches)
+
+
+default_registry().add_collector(_collect_capture_metrics)
+
+def _fetch(client: airsim.CarClient, method: str, camera: str, image_type, vehicle_name: str) -> np.ndarray:
+    """Fetches and decodes one image with the given method, raising ImageRetrievalError on bad data."""
+    # Method 1: Use simGetImages with compression (more reliable)
+    if method == "compressed":
+        response = client.simGetImages([
+            airsim.ImageRequest(camera, image_type, False, True)
+        ], vehicle_name)
+        
+        # Validate response
+        if not response or len(response) == 0:
+            raise ImageRetrievalError("Empty response from simGetImages")
+        
+        img_data = response[0]
+        if img_data.image_data_uint8 is None or len(img_data.image_data_uint8) == 0:
+            raise ImageRetrievalError("Empty image data in response")
+        
+        # Convert compressed data to image
+        nparr = np.frombuffer(img_data.image_data_uint8, np.uint8)
+        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        
+    # Method 2: Use simGetImages without compression (raw pixels, no PNG decode)
+    elif method == "uncompressed":
+        response = client.simGetImages([
+            airsim.ImageRequest(camera, image_type, False, False)
+        ], vehicle_name)
+        
+        if not response or len(response) == 0:
+            raise ImageRetrievalError("Empty response from simGetImages")
+        
+        img_data = response[0]
+        pixels = img_data.height * img_data.width
+        if img_data.image_data_uint8 is None or pixels == 0 or len(img_data.image_data_uint8) % pixels:
+            raise ImageRetrievalError("Uncompressed image data does not match the reported size")
+        
+        nparr = np.frombuffer(img_data.image_data_uint8, np.uint8)
+        img = nparr.reshape(img_data.height, img_data.width, nparr.size // pixels)
+        
+    # Method 3: Use simGetImage (fallback)
+    else:
+        result = client.simGetImage(camera, image_type, vehicle_name)
+        
+        # Validate result
+        if result is None or len(result) == 0:
+            raise ImageRetrievalError("Empty result from simGetImage")
+        
+        # Convert uncompressed data to image (FIX: use uint8 instead of int8)
+        raw_image = np.frombuffer(result, np.uint8)
+        img = cv2.imdecode(raw_image, cv2.IMREAD_UNCHANGED)
+    
+    # Validate decoded image
+    if img is None:
+        raise ImageRetrievalError("Failed to decode image data")
+    
+    if img.size == 0:
+        raise ImageRetrievalError("Decoded image is empty")
+    return img
+
+
+def _to_bgr(img: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+    """Converts BGRA to BGR if necessary, writing into `out` when its shape matches."""
+    is_bgra = len(img.shape) == 3 and img.shape[2] == 4
+    if out is not None:
+        bgr_shape = img.shape[:2] + (3,) if is_bgra else img.shape
+        if out.shape == bgr_shape:
+            if is_bgra:
+                cv2.cvtColor(img, cv2.COLOR_BGRA2BGR, dst=out)
+            else:
+                np.copyto(out, img)
+            logger.debug("Successfully retrieved image into buffer: shape=%s", out.shape)
+            return out
+        logger.warning("Image shape %s does not match output buffer %s", img.shape, out.shape)
+    if is_bgra:
+        img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    elif not img.flags.writeable:
+        # Uncompressed frames are views of the RPC buffer.
+        img = img.copy()
+    logger.debug("Successfully retrieved image: shape=%s, dtype=%s", img.shape, img.dtype)
+    return img
+
+
+@tracing.traced("get_image")
 def get_image(client: airsim.CarClient, 
               camera: str = "0", 
               image_type: airsim.ImageType = airsim.ImageType.Scene,
               retries: int = 3, 
               sleep: float = 0.2, 
-              compress: bool = True) -> Optional[np.ndarray]:
+              compress: Union[bool, str] = True,
+              vehicle_name: str = '',
+              out: Optional[np.ndarray] = None,
+              policy: Optional[RetryPolicy] = None,
+              selector: Optional[FormatSelector] = None) -> Optional[np.ndarray]:
     """
     Robust image retrieval with retry mechanism and comprehensive error handling.
     
@@ -37,88 +259,88 @@ def get_image(client: airsim.CarClient,
     - Camera name optimization ("0" vs "FrontCenter")
     - Data type fixes (uint8 vs int8)
     
+    With a `policy`, attempts follow its deadline, jittered backoff and circuit
+    breaker instead of `retries`/`sleep`, and the compressed or raw path is picked
+    from the policy's per-method success and latency statistics, with `compress`
+    as the preference.
+    
+    With `compress="auto"`, a FormatSelector picks the compressed (PNG) or
+    uncompressed request from measured fetch+decode times, probing the other
+    format periodically; see `default_format_selector().stats()`.
+    
     Args:
         client: AirSim CarClient object
         camera: Camera name/ID (default: "0" - more reliable than "FrontCenter")
         image_type: Type of image to retrieve (Scene, DepthVis, etc.)
         retries: Number of retry attempts (default: 3)
         sleep: Sleep time between retries in seconds (default: 0.2)
-        compress: Whether to use compression (default: True)
+        compress: Whether to use compression, or "auto" to pick the faster format (default: True)
+        vehicle_name: Vehicle owning the camera (default: "" - the first vehicle)
+        out: Preallocated uint8 BGR array (e.g. a shared frame slot) to write the
+             image into (default: None - allocate a new array)
+        policy: Shared RetryPolicy, e.g. `default_retry_policy()` (default: None -
+                fixed retries with a constant sleep)
+        selector: FormatSelector for `compress="auto"` (default: None - the
+                  process-wide selector)
     
     Returns:
-        np.ndarray: Decoded image as numpy array
-        None: If all retry attempts failed
+        np.ndarray: Decoded image as numpy array; `out` itself if it was given
+                    and matches the image shape
+        None: If all retry attempts failed or the circuit breaker is open
     
     Raises:
         ImageRetrievalError: If all retry attempts fail and strict mode
     """
     
+    if compress == "auto":
+        selector = selector or default_format_selector()
+        method = selector.next_format()
+    else:
+        selector = None
+        method = METHODS[0] if compress else METHODS[2]
+    
+    def fetch(method):
+        start = time.perf_counter()
+        img = _fetch(client, method, camera, image_type, vehicle_name)
+        elapsed = time.perf_counter() - start
+        _fetch_seconds[method].observe(elapsed)
+        if selector is not None:
+            selector.record(method, elapsed)
+        return img
+    
+    if policy is not None:
+        try:
+            img = policy.call(fetch, METHODS, method)
+        except CircuitOpenError as e:
+            logger.debug("Image retrieval skipped: %s", e)
+            return None
+        except Exception as e:
+            logger.error("Image retrieval failed within the retry policy: %s", e)
+            return None
+        return _to_bgr(img, out)
+    
     last_error = None
     
     for attempt in range(retries):
         try:
-            logger.debug(f"Image retrieval attempt {attempt + 1}/{retries} (camera={camera}, compress={compress})")
-            
-            # Method 1: Use simGetImages with compression (more reliable)
-            if compress:
-                response = client.simGetImages([
-                    airsim.ImageRequest(camera, image_type, False, True)
-                ])
-                
-                # Validate response
-                if not response or len(response) == 0:
-                    raise ImageRetrievalError("Empty response from simGetImages")
-                
-                img_data = response[0]
-                if img_data.image_data_uint8 is None or len(img_data.image_data_uint8) == 0:
-                    raise ImageRetrievalError("Empty image data in response")
-                
-                # Convert compressed data to image
-                nparr = np.frombuffer(img_data.image_data_uint8, np.uint8)
-                img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                
-            # Method 2: Use simGetImage without compression (fallback)
-            else:
-                result = client.simGetImage(camera, image_type)
-                
-                # Validate result
-                if result is None or len(result) == 0:
-                    raise ImageRetrievalError("Empty result from simGetImage")
-                
-                # Convert uncompressed data to image (FIX: use uint8 instead of int8)
-                raw_image = np.frombuffer(result, np.uint8)
-                img = cv2.imdecode(raw_image, cv2.IMREAD_UNCHANGED)
-            
-            # Validate decoded image
-            if img is None:
-                raise ImageRetrievalError("Failed to decode image data")
-            
-            if img.size == 0:
-                raise ImageRetrievalError("Decoded image is empty")
-            
-            # Convert BGRA to BGR if necessary
-            if len(img.shape) == 3 and img.shape[2] == 4:
-                img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-            
-            logger.debug(f"Successfully retrieved image: shape={img.shape}, dtype={img.dtype}")
-            return img
+            logger.debug("Image retrieval attempt %d/%d (camera=%s, method=%s)", attempt + 1, retries, camera, method)
+            return _to_bgr(fetch(method), out)
             
         except Exception as e:
             last_error = e
-            logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
+            logger.warning("Attempt %d failed: %s", attempt + 1, e)
             
             # Don't sleep on last attempt
             if attempt < retries - 1:
                 time.sleep(sleep)
                 
                 # Switch strategy on first failure
-                if attempt == 0 and compress:
-                    compress = False
-                    logger.debug("Switching to uncompressed method for next attempt")
+                if attempt == 0 and method != METHODS[2]:
+                    method = METHODS[2]
+                    logger.debug("Switching to simGetImage for next attempt")
     
     # All attempts failed
-    error_msg = f"Failed to retrieve image after {retries} attempts. Last error: {str(last_error)}"
-    logger.error(error_msg)
+    logger.error("Failed to retrieve image after %d attempts. Last error: %s", retries, last_error)
     return None
 
 
@@ -136,7 +358,7 @@ def get_image_safe(client: airsim.CarClient, **kwargs) -> Optional[np.ndarray]:
     try:
         return get_image(client, **kwargs)
     except Exception as e:
-        logger.error(f"Image retrieval failed: {str(e)}")
+        logger.error("Image retrieval failed: %s", e)
         return None
 
 
@@ -166,12 +388,12 @@ def validate_connection(client: airsim.CarClient, timeout: float = 5.0) -> bool:
                     return True
                     
             except Exception as e:
-                logger.debug(f"Connection validation attempt failed: {str(e)}")
+                logger.debug("Connection validation attempt failed: %s", e)
                 time.sleep(0.1)
         
         logger.error("Connection validation timed out")
         return False
         
     except Exception as e:
-        logger.error(f"Connection validation failed: {str(e)}")
+        logger.error("Connection validation failed: %s", e)
         return False
@@ -0,0 +1,215 @@
+# utils/shared_frames.py
+"""
+Shared-memory frame transport between capture and inference processes.
+
+A `SharedFramePool` is one `multiprocessing.shared_memory` block holding a small
+header and a fixed number of preallocated frame slots. The capture side writes a
+frame into the next slot and hands the consumer a tiny `FrameRef` instead of the
+pixels; the consumer attaches to the pool by name and reads the slot as a NumPy
+view without copying.
+
+Each slot carries a sequence number used as a seqlock: it is odd while the slot
+is being written and even once the frame is published. A reader checks that the
+slot still holds the sequence from its `FrameRef` before and after using the view,
+so a frame overwritten mid-read is detected instead of silently mixed.
+"""
+
+import itertools
+import math
+from multiprocessing import shared_memory
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+_HEADER_FIELDS = 5  # slots, slot_nbytes, frame height, width, channels
+_ALIGN = 64
+
+
+class FrameRef(NamedTuple):
+    """
+    Reference to a published frame.
+
+    Attributes:
+        pool (str): Shared memory name of the pool.
+        slot (int): Slot index.
+        seq (int): Sequence number the slot had when the frame was published.
+        shape (tuple): Frame shape; frames are uint8.
+    """
+    pool: str
+    slot: int
+    seq: int
+    shape: tuple
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attaches to an existing block without making this process responsible for unlinking it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers every attach with the resource tracker. Processes
+        # started by the pool owner share its tracker, so this is a no-op for them.
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFramePool:
+    """
+    Fixed pool of uint8 frame slots in shared memory.
+
+    Args:
+        slots (int, optional): Number of frame slots. Use more slots than frames that
+            can be in flight at once. Defaults to 4.
+        shape (tuple, optional): Expected (height, width, channels) of the frames; it
+            also sizes the slots. Defaults to (720, 1280, 3), the camera resolution in
+            `configs/settings.example.json`.
+        name (str, optional): Attach to the existing pool with this name instead of
+            creating one. Defaults to None.
+    """
+
+    def __init__(self, slots: int = 4, shape: tuple = (720, 1280, 3), name: str = None):
+        self.owner = name is None
+        if self.owner:
+            slot_nbytes = int(math.ceil(np.prod(shape) / _ALIGN) * _ALIGN)
+            header_nbytes = self._header_nbytes(slots)
+            self._shm = shared_memory.SharedMemory(create=True, size=header_nbytes + slots * slot_nbytes)
+            meta = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=self._shm.buf)
+            meta[:] = (slots, slot_nbytes, *shape)
+        else:
+            self._shm = _attach(name)
+            meta = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=self._shm.buf)
+            slots, slot_nbytes = int(meta[0]), int(meta[1])
+            shape = tuple(int(v) for v in meta[2:])
+
+        self.name = self._shm.name
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.slot_nbytes = slot_nbytes
+        self._seq = np.ndarray((slots,), dtype=np.int64, buffer=self._shm.buf, offset=_HEADER_FIELDS * 8)
+        self._data = np.ndarray((slots, slot_nbytes), dtype=np.uint8, buffer=self._shm.buf,
+                                offset=self._header_nbytes(slots))
+        self._next_slot = itertools.cycle(range(slots))
+
+    @staticmethod
+    def _header_nbytes(slots: int) -> int:
+        return int(math.ceil((_HEADER_FIELDS + slots) * 8 / _ALIGN) * _ALIGN)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedFramePool":
+        """
+        Attaches to a pool created by another process.
+
+        Args:
+            name (str): The pool name (`SharedFramePool.name` or `FrameRef.pool`).
+
+        Returns:
+            SharedFramePool: A non-owning handle to the pool.
+        """
+        return cls(name=name)
+
+    def _view(self, slot: int, shape: tuple) -> np.ndarray:
+        nbytes = int(np.prod(shape))
+        if nbytes > self.slot_nbytes:
+            raise ValueError(f"Frame of shape {shape} does not fit a {self.slot_nbytes}-byte slot")
+        return self._data[slot, :nbytes].reshape(shape)
+
+    def acquire(self, shape: tuple) -> tuple:
+        """
+        Claims the next slot for writing and marks it as in progress.
+
+        Only one process/thread may write to a pool. Call `publish` once the frame is written.
+
+        Args:
+            shape (tuple): Shape of the frame about to be written.
+
+        Returns:
+            tuple: (slot, view) - the slot index and a writable uint8 view of `shape`.
+        """
+        slot = next(self._next_slot)
+        view = self._view(slot, shape)
+        self._seq[slot] += 1  # Odd: being written.
+        return slot, view
+
+    def publish(self, slot: int, shape: tuple) -> FrameRef:
+        """
+        Marks a slot written by `acquire` as readable.
+
+        Args:
+            slot (int): The slot index returned by `acquire`.
+            shape (tuple): The shape of the written frame.
+
+        Returns:
+            FrameRef: Reference to hand to readers.
+        """
+        self._seq[slot] += 1  # Even: published.
+        return FrameRef(self.name, slot, int(self._seq[slot]), tuple(shape))
+
+    def write(self, frame: np.ndarray) -> FrameRef:
+        """
+        Copies a frame into the next slot and publishes it.
+
+        Args:
+            frame (np.ndarray): A uint8 frame.
+
+        Returns:
+            FrameRef: Reference to the published frame.
+        """
+        slot, view = self.acquire(frame.shape)
+        np.copyto(view, frame)
+        return self.publish(slot, frame.shape)
+
+    def capture(self, client, **kwargs) -> Optional[FrameRef]:
+        """
+        Grabs an image from AirSim straight into the next slot.
+
+        The frame is decoded into the slot through `get_image(out=...)`; a frame that
+        does not have the pool's shape is copied into a slot of its own shape instead.
+
+        Args:
+            client: AirSim CarClient object.
+            **kwargs: Arguments passed to `utils.robust_image.get_image`.
+
+        Returns:
+            FrameRef: Reference to the captured frame, or None if retrieval failed.
+        """
+        from utils.robust_image import get_image
+        slot, view = self.acquire(self.shape)
+        img = get_image(client, out=view, **kwargs)
+        if img is view:
+            return self.publish(slot, self.shape)
+        # Release the slot; frames it held before are invalidated either way.
+        self._seq[slot] += 1
+        return None if img is None else self.write(img)
+
+    def read(self, ref: FrameRef) -> Optional[np.ndarray]:
+        """
+        Returns a zero-copy view of a published frame.
+
+        The view stays valid only until the writer reuses the slot; call `is_current`
+        after using it to make sure it was not overwritten meanwhile.
+
+        Args:
+            ref (FrameRef): The frame reference.
+
+        Returns:
+            np.ndarray: The frame view, or None if the slot already holds a newer frame.
+        """
+        if not self.is_current(ref):
+            return None
+        return self._view(ref.slot, ref.shape)
+
+    def is_current(self, ref: FrameRef) -> bool:
+        """Checks that the slot of `ref` still holds that frame."""
+        return int(self._seq[ref.slot]) == ref.seq
+
+    def close(self):
+        """Detaches from the shared memory; the owner also frees it."""
+        self._seq = None
+        self._data = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
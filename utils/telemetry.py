@@ -0,0 +1,206 @@
+# utils/telemetry.py
+"""
+Per-tick telemetry in preallocated structured-array chunks.
+
+The control thread writes one row per tick into the current chunk, which is a
+plain NumPy structured array allocated up front. Full chunks are handed to a
+background thread that writes them to disk and returns them to a pool for
+reuse, so logging never allocates or touches the disk on the control thread.
+If the writer falls behind and its queue is full, chunks are dropped and
+counted rather than blocking the caller.
+
+`load_telemetry` concatenates a run's chunk files back into one structured
+array for vectorized analysis, e.g. `t[t['speed'] < 0.5]['tick_ms'].mean()`.
+"""
+
+import glob
+import logging
+import os
+import queue
+import threading
+
+import numpy as np
+
+from core.sensors import SENSOR_NAMES
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_DTYPE = np.dtype([
+    ('t', 'f8'),
+    ('tick', 'i8'),
+    ('x', 'f4'),
+    ('y', 'f4'),
+    ('heading', 'f4'),
+    ('speed', 'f4'),
+    ('target_speed', 'f4'),
+    ('steering', 'f4'),
+    ('throttle', 'f4'),
+    ('brake', 'f4'),
+    ('sensors', 'f4', (len(SENSOR_NAMES),)),
+    ('detections', 'i2'),
+    ('perception_ms', 'f4'),
+    ('sensing_ms', 'f4'),
+    ('planning_ms', 'f4'),
+    ('actuation_ms', 'f4'),
+    ('tick_ms', 'f4'),
+])
+
+FORMATS = ('npy', 'npz', 'parquet')
+
+
+class TelemetryLogger:
+    """
+    Chunked telemetry writer with a background flush thread.
+
+    Args:
+        path (str): Output directory; one file per chunk is written into it.
+        chunk_size (int, optional): Rows per chunk. Defaults to 4096.
+        fmt (str, optional): 'npy' (raw structured array), 'npz' (compressed, one
+            array per column) or 'parquet' (requires pyarrow). Defaults to 'npy'.
+        max_pending (int, optional): Full chunks allowed to wait for the writer. Defaults to 16.
+        dtype (np.dtype, optional): Row layout. Defaults to `TELEMETRY_DTYPE`.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 4096, fmt: str = 'npy', max_pending: int = 16,
+                 dtype: np.dtype = TELEMETRY_DTYPE):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown telemetry format '{fmt}'")
+        if fmt == 'parquet':
+            import pyarrow  # noqa: F401 - fail at construction rather than in the writer thread
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_size = chunk_size
+        self.fmt = fmt
+        self.dtype = dtype
+        self.rows = 0
+        self.dropped_rows = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._pool = queue.SimpleQueue()
+        for _ in range(2):
+            self._pool.put(np.zeros(chunk_size, dtype=dtype))
+        self._chunk = self._take_chunk()
+        self._fill = 0
+        self._seq = 0
+        self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+        self._thread.start()
+
+    def _take_chunk(self) -> np.ndarray:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return np.zeros(self.chunk_size, dtype=self.dtype)
+
+    def log(self, **fields) -> None:
+        """
+        Appends one row. Fields not given are left at zero.
+
+        Args:
+            **fields: Column values, e.g. `x=1.0, sensors=readings`.
+        """
+        row = self._chunk[self._fill]
+        for name, value in fields.items():
+            row[name] = value
+        self._fill += 1
+        self.rows += 1
+        if self._fill == self.chunk_size:
+            self._hand_off()
+
+    def _hand_off(self) -> None:
+        try:
+            self._queue.put_nowait((self._seq, self._chunk, self._fill))
+        except queue.Full:
+            self.dropped_rows += self._fill
+            self._chunk[:self._fill] = 0
+            self._fill = 0
+            return
+        self._seq += 1
+        self._chunk = self._take_chunk()
+        self._fill = 0
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            seq, chunk, fill = item
+            try:
+                with tracing.span("telemetry write"):
+                    self._write(seq, chunk[:fill])
+            except Exception as e:
+                logger.error("Failed to write telemetry chunk %d: %s", seq, e)
+            chunk[:] = 0
+            self._pool.put(chunk)
+
+    def _write(self, seq: int, rows: np.ndarray) -> None:
+        name = os.path.join(self.path, f"telemetry_{seq:06d}")
+        if self.fmt == 'npy':
+            np.save(name + '.npy', rows)
+        elif self.fmt == 'npz':
+            np.savez_compressed(name + '.npz', **{field: rows[field] for field in rows.dtype.names})
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            columns = {}
+            for field in rows.dtype.names:
+                column = rows[field]
+                if column.ndim > 1:
+                    # Vector columns (the sensors) become one column per element.
+                    for i in range(column.shape[1]):
+                        columns[f"{field}_{i}"] = column[:, i]
+                else:
+                    columns[field] = column
+            pq.write_table(pa.table(columns), name + '.parquet')
+
+    def flush(self) -> None:
+        """Hands the partially filled chunk to the writer."""
+        if self._fill:
+            self._hand_off()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flushes and waits for the writer to finish."""
+        self.flush()
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self.dropped_rows:
+            logger.warning("Telemetry writer fell behind; %d rows were dropped", self.dropped_rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_telemetry(path: str, dtype: np.dtype = TELEMETRY_DTYPE) -> np.ndarray:
+    """
+    Loads every telemetry chunk of a run, in order.
+
+    Args:
+        path (str): The directory given to `TelemetryLogger`.
+        dtype (np.dtype, optional): Row layout for npz and Parquet chunks. Defaults to `TELEMETRY_DTYPE`.
+
+    Returns:
+        np.ndarray: One structured array with all rows.
+    """
+    parts = []
+    for name in sorted(glob.glob(os.path.join(path, 'telemetry_*'))):
+        if name.endswith('.npy'):
+            parts.append(np.load(name))
+            continue
+        if name.endswith('.npz'):
+            with np.load(name) as data:
+                columns = {field: data[field] for field in data.files}
+        elif name.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            columns = {k: np.asarray(v) for k, v in pq.read_table(name).to_pydict().items()}
+        else:
+            continue
+        rows = np.zeros(len(next(iter(columns.values()))), dtype=dtype)
+        for field in dtype.names:
+            if field in columns:
+                rows[field] = columns[field]
+            elif dtype[field].shape:
+                rows[field] = np.stack([columns[f"{field}_{i}"] for i in range(dtype[field].shape[0])], axis=1)
+        parts.append(rows)
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
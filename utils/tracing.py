@@ -0,0 +1,235 @@
+# utils/tracing.py
+"""
+Span tracing for the hot paths, exported as Chrome trace JSON.
+
+    from utils import tracing
+
+    with tracing.span("perception"):
+        ...
+
+    @tracing.traced("get_image")
+    def get_image(...):
+        ...
+
+Tracing is off by default. While it is off `span` returns a shared no-op context
+manager and `traced` functions call straight through, so the instrumentation costs
+one global lookup per call. `enable()` preallocates a ring buffer of spans; each
+finished span stores its name id, thread id, start and duration there, and the
+oldest spans are overwritten once it is full. Slots are plain list entries
+rather than NumPy rows because a tuple store is several times cheaper than
+setting the fields of a structured-array row. `export_chrome_trace` writes the
+buffer as "complete" events that chrome://tracing and https://ui.perfetto.dev
+open directly, with one track per thread.
+
+Other processes (fleet vehicles, the detector service) send their spans back as a
+`snapshot()`, which the exporting process adds with `merge()`. Span times come
+from `time.perf_counter_ns`, a system-wide monotonic clock, so the processes
+line up on one timeline.
+"""
+
+import functools
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SPAN_DTYPE = np.dtype([('name', 'i4'), ('tid', 'i8'), ('start', 'i8'), ('dur', 'i8')])
+
+_enabled = False
+_capacity = 0
+_names = {}
+_name_ids = []
+_thread_names = {}
+_local = threading.local()
+_names_lock = threading.Lock()
+_counter = itertools.count()
+_buffer = None
+_merged = []
+_NULL_SPAN = nullcontext()
+
+
+def enable(capacity: int = 1 << 16) -> None:
+    """
+    Starts recording spans into a fresh ring buffer.
+
+    Args:
+        capacity (int, optional): Spans kept; older ones are overwritten. Defaults to 65536.
+    """
+    global _enabled, _capacity, _buffer, _counter, _thread_names
+    _buffer = [None] * capacity
+    _capacity = capacity
+    _counter = itertools.count()
+    _thread_names = {}
+    _merged.clear()
+    _enabled = True
+
+
+def disable() -> None:
+    """Stops recording; the recorded spans are kept for export."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _name_id(name: str) -> int:
+    name_id = _names.get(name)
+    if name_id is None:
+        with _names_lock:
+            name_id = _names.get(name)
+            if name_id is None:
+                name_id = len(_name_ids)
+                _name_ids.append(name)
+                _names[name] = name_id
+    return name_id
+
+
+def _record(name_id: int, start: int, end: int) -> None:
+    buffer = _buffer
+    if buffer is None:
+        return
+    tid = threading.get_ident()
+    if getattr(_local, 'names', None) is not _thread_names:
+        # First span of this thread since enable(). Idents of finished threads are
+        # reused, so a track shared by several threads is labelled with all their names.
+        _local.names = _thread_names
+        name = threading.current_thread().name
+        previous = _thread_names.get(tid)
+        _thread_names[tid] = name if previous in (None, name) else f"{previous} / {name}"
+    # next() on itertools.count is atomic under the GIL, so every span gets its own slot.
+    buffer[next(_counter) % _capacity] = (name_id, tid, start, end - start)
+
+
+class _Span:
+    __slots__ = ('name_id', 'start')
+
+    def __init__(self, name_id: int):
+        self.name_id = name_id
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _record(self.name_id, self.start, time.perf_counter_ns())
+        return False
+
+
+def span(name: str):
+    """
+    Times the enclosed block as a span named `name`.
+
+    Args:
+        name (str): Span name shown in the trace viewer.
+
+    Returns:
+        A context manager; a shared no-op one while tracing is disabled.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(_name_id(name))
+
+
+def traced(name: str = None):
+    """
+    Decorator recording every call of the function as a span.
+
+    Args:
+        name (str, optional): Span name. Defaults to the function's qualified name.
+    """
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            name_id = _name_id(span_name)
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record(name_id, start, time.perf_counter_ns())
+        return wrapper
+    return decorator
+
+
+def events() -> np.ndarray:
+    """
+    Returns the recorded spans, oldest first.
+
+    Returns:
+        np.ndarray: Structured array with 'name' (index into `span_names()`), 'tid',
+                    'start' and 'dur' in perf_counter nanoseconds.
+    """
+    if _buffer is None:
+        return np.zeros(0, dtype=SPAN_DTYPE)
+    recorded = np.array([entry for entry in _buffer if entry is not None], dtype=SPAN_DTYPE)
+    return recorded[np.argsort(recorded['start'], kind='stable')]
+
+
+def span_names() -> list:
+    """Returns the span names, indexed by the 'name' column of `events()`."""
+    return list(_name_ids)
+
+
+def snapshot() -> dict:
+    """
+    Returns this process's recorded spans in a picklable form, to be sent to the
+    process that exports the trace and passed to `merge` there.
+    """
+    return {'pid': os.getpid(), 'process': multiprocessing.current_process().name,
+            'names': span_names(), 'threads': dict(_thread_names), 'events': events().tolist()}
+
+
+def merge(spans: dict) -> None:
+    """Adds the spans of another process, from its `snapshot()`, to the exported trace."""
+    _merged.append(spans)
+
+
+def _chrome_events(spans: dict) -> list:
+    pid = spans['pid']
+    names = spans['names']
+    trace = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': spans['process']}}]
+    trace.extend(
+        {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}}
+        for tid, thread_name in spans['threads'].items()
+    )
+    trace.extend(
+        {'name': names[name_id], 'ph': 'X', 'pid': pid, 'tid': int(tid),
+         'ts': start / 1000.0, 'dur': dur / 1000.0}
+        for name_id, tid, start, dur in spans['events']
+    )
+    return trace
+
+
+def export_chrome_trace(path: str) -> int:
+    """
+    Writes the recorded spans, and those merged from other processes, as a Chrome
+    trace JSON file with one track per process and thread.
+
+    Args:
+        path (str): Output file, e.g. "trace.json"; open it in chrome://tracing or Perfetto.
+
+    Returns:
+        int: Number of spans written.
+    """
+    trace = []
+    count = 0
+    for spans in [snapshot()] + list(_merged):
+        trace.extend(_chrome_events(spans))
+        count += len(spans['events'])
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+    logger.info("Wrote %d spans to %s", count, path)
+    return count